@@ -0,0 +1,97 @@
+import time
+
+# ───────────────────────────────
+# 로컬 잔고 캐시
+#
+# 봇은 잔고가 바뀌는 경우가 우리 주문뿐인데도 루프마다 fetch_balance(비공개 API)를 호출했습니다.
+# AccountCache 는 KRW/BTC 잔고와 평균 매수가를 메모리에 두고
+#   • 주문 체결 결과(filled, cost, fee)로 바로 갱신하고
+#   • reconcile_seconds 마다, 또는 주문 직후(settle_seconds 뒤)에만 거래소와 맞춰 봅니다.
+# 맞춰 볼 때 차이가 허용 오차를 넘으면 drift 로 기록하고 거래소 값으로 강제 동기화한 뒤
+# 짧은 간격(drift_recheck_seconds)으로 한 번 더 확인합니다.
+# ───────────────────────────────
+
+
+class AccountCache:
+    def __init__(self, exchange, base='BTC', quote='KRW', reconcile_seconds=300, settle_seconds=2,
+                 drift_recheck_seconds=10, krw_tolerance=1.0, btc_tolerance=1e-8, on_drift=None):
+        self.exchange = exchange
+        self.base = base
+        self.quote = quote
+        self.reconcile_seconds = reconcile_seconds
+        self.settle_seconds = settle_seconds
+        self.drift_recheck_seconds = drift_recheck_seconds
+        self.krw_tolerance = krw_tolerance
+        self.btc_tolerance = btc_tolerance
+        self.on_drift = on_drift
+
+        self.krw = 0.0
+        self.btc = 0.0
+        self.avg_buy_price = 0.0
+        self.fetches = 0
+        self.drifts = 0
+        self._next_reconcile_at = 0.0     # 0 이면 다음 refresh 에서 바로 조회
+
+    # ── 봇 루프에서 호출 ──
+    def refresh(self, force=False):
+        # 조회 시점이 되었을 때만 거래소 잔고를 받아 옴. 실제로 조회했으면 True
+        if not force and time.time() < self._next_reconcile_at:
+            return False
+        self.reconcile()
+        return True
+
+    def reconcile(self):
+        balances = self.exchange.fetch_balance()
+        self.fetches += 1
+        krw = balances['total'].get(self.quote, 0) or 0
+        btc = balances['total'].get(self.base, 0) or 0
+
+        next_in = self.reconcile_seconds
+        if self.fetches > 1:
+            krw_diff, btc_diff = krw - self.krw, btc - self.btc
+            if abs(krw_diff) > self.krw_tolerance or abs(btc_diff) > self.btc_tolerance:
+                self.drifts += 1
+                message = (f"⚠️ 잔고 캐시 불일치 → 거래소 값으로 재동기화\n"
+                           f"KRW: {self.krw:,.0f} → {krw:,.0f} ({krw_diff:+,.0f})\n"
+                           f"{self.base}: {self.btc:.8f} → {btc:.8f} ({btc_diff:+.8f})")
+                print(message)
+                if self.on_drift:
+                    self.on_drift(message)
+                next_in = self.drift_recheck_seconds
+        if btc <= self.btc_tolerance:
+            self.avg_buy_price = 0.0
+        self.krw, self.btc = krw, btc
+        self._next_reconcile_at = time.time() + next_in
+
+    def invalidate(self):
+        # 다음 refresh 에서 바로 거래소와 맞춤
+        self._next_reconcile_at = 0.0
+
+    # ── 주문 체결 반영 ──
+    def apply_order(self, order, side):
+        """주문 결과로 캐시를 갱신하고 settle_seconds 뒤 거래소와 한 번 맞추도록 예약합니다.
+
+        체결 정보(filled/cost)가 아직 없는 주문이면 캐시는 그대로 두고 바로 조회하도록 합니다.
+        """
+        filled = order.get('filled')
+        cost = order.get('cost')
+        if not filled or cost is None:
+            self.invalidate()
+            return False
+
+        fee = order.get('fee') or {}
+        fee_cost = fee.get('cost') or 0
+        fee_krw = fee_cost if fee.get('currency') == self.quote else 0
+        fee_btc = fee_cost if fee.get('currency') == self.base else 0
+        if side == 'buy':
+            bought = filled - fee_btc
+            self.avg_buy_price = (self.avg_buy_price * self.btc + cost) / (self.btc + bought)
+            self.btc += bought
+            self.krw -= cost + fee_krw
+        else:
+            self.btc = max(self.btc - filled, 0.0)
+            self.krw += cost - fee_krw
+            if self.btc <= self.btc_tolerance:
+                self.avg_buy_price = 0.0
+        self._next_reconcile_at = min(self._next_reconcile_at, time.time() + self.settle_seconds)
+        return True
@@ -2,6 +2,10 @@ import ccxt
 import os
 import time
 from dotenv import load_dotenv
+from account_cache import AccountCache
+from market_feed import MarketFeed
+from request_scheduler import schedule
+from metrics import BotMetrics
 
 # ───────────────────────────────
 # 1. API 키 불러오기
@@ -18,49 +22,71 @@ upbit = ccxt.upbit({
     'secret': secret_key,
 })
 
+# 같은 계정으로 도는 다른 봇들과 업비트 요청 한도를 나눠 씀 (주문 요청 우선)
+schedule(upbit, api_key)
+
+# 루프 단계별 지연 시간 계측 (BOT_METRICS_PORT / BOT_METRICS_DIR 로 내보내기)
+metrics = BotMetrics.from_env('auto_trade_bot')
+metrics.instrument(upbit)
+
+# 잔고 캐시: 주문 체결로 바로 갱신하고, 5분마다 또는 주문 직후에만 거래소 잔고와 대조
+account = AccountCache(upbit)
+
 # ───────────────────────────────
 # 3. 설정 값
 # ───────────────────────────────
 buy_price_threshold = 142400000    # 4천만 원 이하일 때 매수
 sell_price_threshold = 142379000    # 4천5백만 원 이상일 때 매도
 krw_to_spend = 5000                # 매수 금액
+REST_REFRESH_SECONDS = 60          # 잔고 조회 주기 (시세는 웹소켓 체결마다 갱신)
 
-print("🚀 자동 매수·매도 봇 시작! 1분마다 시세 확인 중...\n")
+# 실시간 체결 피드 (끊기면 자동 재연결, 체결이 없으면 REST 현재가로 대체)
+feed = MarketFeed('BTC/KRW', rest=upbit).start()
+balance_checked_at = 0
+
+print("🚀 자동 매수·매도 봇 시작! 체결마다 시세 확인 중...\n")
 
 # ───────────────────────────────
 # 4. 반복 감시
 # ───────────────────────────────
 while True:
+    metrics.loop_tick()
     try:
-        # 현재 시세 확인
-        ticker = upbit.fetch_ticker('BTC/KRW')
-        current_price = ticker['last']
-        print(f"[{time.strftime('%H:%M:%S')}] 현재 BTC 가격: {current_price}원")
+        # 현재 시세 확인 (새 체결이 들어올 때까지 대기)
+        with metrics.span('market_wait'):
+            current_price = feed.wait(timeout=60)
 
-        # 내 잔고 정보 가져오기
-        balances = upbit.fetch_balance()
-        krw_balance = balances['total'].get('KRW', 0)
-        btc_balance = balances['total'].get('BTC', 0)
+        # 내 잔고 정보 가져오기 (REST_REFRESH_SECONDS 마다, 주문 직후에는 즉시)
+        refreshed = time.time() - balance_checked_at >= REST_REFRESH_SECONDS
+        if refreshed:
+            print(f"[{time.strftime('%H:%M:%S')}] 현재 BTC 가격: {current_price}원")
+            account.refresh()
+            krw_balance, btc_balance = account.krw, account.btc
+            balance_checked_at = time.time()
 
         # ── 매수 조건 ──
         if current_price < buy_price_threshold and krw_balance >= krw_to_spend:
             amount = krw_to_spend / current_price
             print("💡 매수 조건 만족! 비트코인 매수 실행")
             order = upbit.create_market_buy_order('BTC/KRW', krw_to_spend, params={"cost": krw_to_spend})
+            account.apply_order(order, 'buy')
             print("✅ 매수 완료:", order)
-            time.sleep(300)  # 5분 대기 후 재시작
+            balance_checked_at = 0
+            metrics.sleep(300)  # 5분 대기 후 재시작
 
         # ── 매도 조건 ──
         elif current_price > sell_price_threshold and btc_balance > 0:
             print("📈 매도 조건 만족! 비트코인 전량 매도 실행")
             order = upbit.create_market_sell_order('BTC/KRW', round(btc_balance, 8))
+            account.apply_order(order, 'sell')
             print("✅ 매도 완료:", order)
-            time.sleep(300)  # 5분 대기 후 재시작
+            balance_checked_at = 0
+            metrics.sleep(300)  # 5분 대기 후 재시작
 
-        else:
+        elif refreshed:
             print("⏳ 조건 미충족: 대기 중...\n")
 
     except Exception as e:
+        metrics.loop_error(e)
         print("❌ 오류 발생:", e)
-
-    time.sleep(60)  # 1분마다 반복
+        metrics.sleep(10)
@@ -1,15 +1,28 @@
 import ccxt
+import numpy as np
 import pandas as pd
 import ta
 import datetime
 import time
 import json
-
-# 1. CCXT 업비트 객체 생성
+import argparse
+import sys
+
+import backtest_cache
+import backtest_engine
+from backtest_cache import BacktestCache, data_digest
+from candle_file import CandleFile
+from candle_store import CandleStore
+from downloader import download_ohlcv
+from request_scheduler import schedule
+from resampler import DAILY_OPEN_OFFSETS, resample_chunks, resample_store
+
+# 1. CCXT 업비트 객체 생성 (마켓 정보는 첫 데이터 요청 시 ccxt 가 자동으로 로드)
 upbit = ccxt.upbit({
     'enableRateLimit': True, # 너무 빠르게 요청하는 것을 방지
 })
-upbit.load_markets()
+# 시세 조회 한도(IP 단위)를 같은 PC 의 라이브 봇들과 나눠 씀 (ccxt 자체 제한 대신 공유 스케줄러 사용)
+schedule(upbit)
 
 # 2. 전략 파라미터
 MA_SHORT = 20
@@ -24,6 +37,12 @@ TRADE_FEE_RATE = 0.0005
 symbol = 'BTC/KRW'
 timeframe = '1d'
 
+# 손절 판정 방식 (backtest_engine.IntrabarStops)
+#   close: 종가 기준 (라이브 ma_adx.py 와 같은 방식), low: 일봉 저가 기준,
+#   subbar: 저가가 손절가에 닿은 날만 하위 봉(SUB_TIMEFRAME)을 캔들 저장소에서 읽어 처음 닿은 시점으로 체결
+STOP_MODE = 'low'
+SUB_TIMEFRAME = '1h'
+
 # 백테스팅 기간 설정
 START_DATE = '2020-01-01 00:00:00'
 END_DATE = '2024-12-31 23:59:59'
@@ -32,17 +51,14 @@ END_DATE = '2024-12-31 23:59:59'
 INITIAL_KRW_BALANCE = 1_000_000 # 100만원 시작
 
 # 3. 데이터 로드 및 전처리 함수
-def fetch_historical_ohlcv(exchange, symbol, timeframe, start_date_str, end_date_str):
+# [since_ms, until_ms] 구간을 199개씩 페이지로 순서대로 받아 옵니다. (캔들 목록, 구간 끝까지 받았는지 여부) 반환
+# 실제 로딩은 downloader.download_ohlcv (병렬) 를 쓰고, 이 함수는 비교 기준으로 남겨 둡니다.
+def fetch_ohlcv_range(exchange, symbol, timeframe, since_ms, until_ms):
     all_ohlcv = []
     
-    start_timestamp_ms = int(pd.to_datetime(start_date_str).timestamp() * 1000)
-    end_timestamp_ms = int(pd.to_datetime(end_date_str).timestamp() * 1000)
-
-    print(f"⏳ {symbol} 과거 데이터 ({timeframe}) 로딩 중... ({start_date_str} ~ {end_date_str})")
-    
     fetch_limit = 199 
 
-    current_since = start_timestamp_ms
+    current_since = since_ms
 
     while True:
         try:
@@ -51,7 +67,7 @@ def fetch_historical_ohlcv(exchange, symbol, timeframe, start_date_str, end_date
             if not ohlcvs:
                 break
             
-            filtered_ohlcvs = [data for data in ohlcvs if data[0] <= end_timestamp_ms]
+            filtered_ohlcvs = [data for data in ohlcvs if data[0] <= until_ms]
             all_ohlcv.extend(filtered_ohlcvs)
 
             if filtered_ohlcvs:
@@ -59,7 +75,7 @@ def fetch_historical_ohlcv(exchange, symbol, timeframe, start_date_str, end_date
             else:
                 break
             
-            if ohlcvs[-1][0] >= end_timestamp_ms:
+            if ohlcvs[-1][0] >= until_ms:
                 break
 
             time.sleep(exchange.rateLimit / 1000)
@@ -69,11 +85,47 @@ def fetch_historical_ohlcv(exchange, symbol, timeframe, start_date_str, end_date
             time.sleep(5)
         except ccxt.ExchangeError as e:
             print(f"❌ 거래소 오류 발생: {e}. 데이터 로딩을 중단합니다.")
-            break
+            return all_ohlcv, False
         except Exception as e:
             print(f"❌ 알 수 없는 오류 발생: {e}. 데이터 로딩을 중단합니다.")
-            break
-            
+            return all_ohlcv, False
+
+    return all_ohlcv, True
+
+# 로컬 캔들 저장소에서 [start_ms, end_ms] 중 아직 받아 오지 않은 구간(앞/뒤/중간 구멍)만 받아 저장합니다.
+# 누락 구간은 downloader.download_ohlcv 로 페이지 단위 병렬 다운로드 (요청 속도는 토큰 버킷으로 제한)
+def sync_store(exchange, symbol, timeframe, start_ms, end_ms, store):
+    closed_until = store.closed_until_ms(timeframe)
+    for since_ms, until_ms in store.missing_ranges(symbol, timeframe, start_ms, end_ms):
+        print(f"   ↳ 누락 구간 요청: {pd.to_datetime(since_ms, unit='ms')} ~ {pd.to_datetime(until_ms, unit='ms')}")
+        result = download_ohlcv(exchange, symbol, timeframe, since_ms, until_ms)
+        store.save(symbol, timeframe, result.rows)
+        print(f"     {len(result.rows):,}개 ({result.requests}회 요청, 재시도 {result.retries}회, "
+              f"{result.elapsed:.1f}초) | 실패 구간 {len(result.failed)}개")
+
+        # 실패한 페이지는 다음 실행 때 다시 받도록, 받은 구간 중 마감된 캔들까지만 기록
+        for covered_from, covered_until in result.covered:
+            covered_until = min(covered_until, closed_until)
+            if covered_until >= covered_from:
+                store.mark_covered(symbol, timeframe, covered_from, covered_until)
+
+# store 가 주어지면 로컬 캔들 저장소를 먼저 읽고, 아직 받아 오지 않은 구간(앞/뒤/중간 구멍)만 요청합니다.
+def fetch_historical_ohlcv(exchange, symbol, timeframe, start_date_str, end_date_str, store=None):
+    start_timestamp_ms = int(pd.to_datetime(start_date_str).timestamp() * 1000)
+    end_timestamp_ms = int(pd.to_datetime(end_date_str).timestamp() * 1000)
+
+    print(f"⏳ {symbol} 과거 데이터 ({timeframe}) 로딩 중... ({start_date_str} ~ {end_date_str})")
+
+    if store is None:
+        all_ohlcv = download_ohlcv(exchange, symbol, timeframe, start_timestamp_ms, end_timestamp_ms).rows
+    else:
+        sync_store(exchange, symbol, timeframe, start_timestamp_ms, end_timestamp_ms, store)
+        all_ohlcv = store.load(symbol, timeframe, start_timestamp_ms, end_timestamp_ms)
+
+    return ohlcv_frame(all_ohlcv, start_date_str, end_date_str)
+
+# ccxt OHLCV 행 목록 → 기간으로 자른 DataFrame (중복 제거, 시간순 정렬)
+def ohlcv_frame(all_ohlcv, start_date_str, end_date_str):
     df = pd.DataFrame(all_ohlcv, columns=['timestamp', 'open', 'high', 'low', 'close', 'vol'])
     df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
     df.set_index('timestamp', inplace=True)
@@ -84,17 +136,41 @@ def fetch_historical_ohlcv(exchange, symbol, timeframe, start_date_str, end_date
     
     return df
 
-# 백테스팅 로직을 함수로 캡슐화
-def run_backtest():
-    # 데이터 로딩
-    ohlcv_data = fetch_historical_ohlcv(upbit, symbol, timeframe, START_DATE, END_DATE)
-
-    if ohlcv_data.empty:
-        print("❌ 지정된 기간의 데이터를 가져오지 못했습니다. 백테스팅을 종료합니다.")
-        return
-
-    print(f"✅ 데이터 로딩 완료. 총 {len(ohlcv_data)}개의 일봉 데이터.")
+def _date_ms(date_str):
+    return int(pd.to_datetime(date_str).timestamp() * 1000)
+
+# 백테스트 기간의 캔들 로딩 (컬럼형 캔들 파일 → 로컬 캔들 저장소 → 거래소 순)
+def load_backtest_data(start_date_str=START_DATE, end_date_str=END_DATE, use_store=True, candle_file=None,
+                       base_timeframe=None, daily_open='utc'):
+    if base_timeframe and base_timeframe != timeframe:
+        return load_resampled_data(start_date_str, end_date_str, base_timeframe, use_store, candle_file, daily_open)
+    if candle_file:
+        print(f"⏳ 캔들 파일 로딩 중... ({candle_file})")
+        return CandleFile(candle_file).frame(_date_ms(start_date_str), _date_ms(end_date_str))
+    store = CandleStore() if use_store else None
+    return fetch_historical_ohlcv(upbit, symbol, timeframe, start_date_str, end_date_str, store=store)
+
+# 하위 봉(예: 1m)만 받아 두고 일봉은 로컬에서 만듦 (resampler.py, 업비트와 같은 봉 경계)
+# 1분봉 저장소 하나로 일봉·시간봉 백테스트와 subbar 손절 판정을 같이 쓰려는 경우 timeframe 별로 따로 받지 않아도 됩니다.
+def load_resampled_data(start_date_str, end_date_str, base_timeframe, use_store=True, candle_file=None,
+                        daily_open='utc'):
+    start_ms, end_ms = _date_ms(start_date_str), _date_ms(end_date_str)
+    print(f"⏳ {base_timeframe} 캔들로 {timeframe} 봉 만드는 중... ({start_date_str} ~ {end_date_str}, 일봉 시작 {daily_open})")
+    if candle_file:
+        parts = list(resample_chunks(CandleFile(candle_file).chunks(start_ms, end_ms), timeframe, daily_open))
+        bars = np.vstack(parts) if parts else np.zeros((0, 6))
+    elif use_store:
+        store = CandleStore()
+        sync_store(upbit, symbol, base_timeframe, start_ms, end_ms, store)
+        bars = resample_store(store, symbol, timeframe, start_ms, end_ms, daily_open)
+    else:
+        rows = download_ohlcv(upbit, symbol, base_timeframe, start_ms, end_ms).rows
+        parts = list(resample_chunks([np.array(rows, dtype=float).reshape(-1, 6)], timeframe, daily_open))
+        bars = np.vstack(parts) if parts else np.zeros((0, 6))
+    return ohlcv_frame(bars.tolist(), start_date_str, end_date_str)
 
+# 기존 슬라이스 재계산 루프 (O(n²)). 벡터화 엔진 검증용으로 남겨 둡니다.
+def run_backtest_loop(ohlcv_data):
     trade_logs = []
     portfolio_values = []
 
@@ -102,14 +178,8 @@ def run_backtest():
     current_btc_balance = 0
     current_last_buy_price = None
 
-    # 4. 백테스팅 메인 루프
     min_data_points_for_indicators = max(MA_LONG, ADX_WINDOW * 2) 
 
-    if len(ohlcv_data) < min_data_points_for_indicators:
-        print(f"⚠️ 백테스팅 시작을 위한 최소 데이터 ({min_data_points_for_indicators}개) 부족. 현재 {len(ohlcv_data)}개.")
-        print("백테스팅 기간을 짧게 설정했거나, 데이터를 불러오지 못했을 수 있습니다.")
-        return
-
     for i in range(min_data_points_for_indicators, len(ohlcv_data)):
         df_slice = ohlcv_data.iloc[:i+1].copy()
 
@@ -201,12 +271,122 @@ def run_backtest():
             current_btc_balance = 0
             current_last_buy_price = None
 
-    # 5. 백테스팅 결과 계산 및 출력
-    print("\n📊 백테스팅 결과 분석 중...")
+    return {'trade_logs': trade_logs, 'portfolio_values': portfolio_values,
+            'krw_balance': current_krw_balance, 'btc_balance': current_btc_balance}
+
+# 현재 전략 파라미터 (backtest_engine.simulate_ma_adx 인자 형식)
+def strategy_params():
+    return {
+        'ma_short': MA_SHORT,
+        'ma_long': MA_LONG,
+        'adx_window': ADX_WINDOW,
+        'adx_buy_thresh': ADX_BUY_THRESH,
+        'adx_sell_thresh': ADX_SELL_THRESH,
+        'stop_loss_pct': STOP_LOSS_PCT,
+        'min_krw_trade': MIN_KRW_TRADE,
+        'trade_fee_rate': TRADE_FEE_RATE,
+        'initial_krw': INITIAL_KRW_BALANCE,
+    }
+
+# 벡터화 엔진 (지표 1회 계산 + 상태 머신 루프). stops 가 없으면 종가 손절 (기존 루프와 같음)
+# cache 를 주면 이동평균·ADX 열을 디스크 캐시에서 읽음 (기간이 같은 다른 실행과 공유)
+def run_backtest_vectorized(ohlcv_data, stops=None, cache=None):
+    indicators = None
+    if cache is not None:
+        indicators = backtest_cache.indicators(cache, ohlcv_data, 'ma_adx', MA_SHORT, MA_LONG, ADX_WINDOW)
+    return backtest_engine.simulate_ma_adx(ohlcv_data, stops=stops, indicators=indicators, **strategy_params())
+
+# subbar 손절 판정용 하위 봉 읽기 함수: 손절가에 닿은 날 하루치만 읽음
+# (캔들 파일은 memmap 이진 탐색, 캔들 저장소는 그날 구간 중 아직 없는 부분만 받아 저장한 뒤 읽기)
+def sub_bar_loader(sub_timeframe=SUB_TIMEFRAME, sub_candle_file=None):
+    if sub_candle_file:
+        candles = CandleFile(sub_candle_file)
+        return lambda start_ms, end_ms: candles.array(*candles.index_range(start_ms, end_ms))
+    store = CandleStore()
+
+    def load(start_ms, end_ms):
+        sync_store(upbit, symbol, sub_timeframe, start_ms, end_ms, store)
+        return store.load(symbol, sub_timeframe, start_ms, end_ms)
+    return load
+
+# 두 엔진의 결과가 같은지 확인하고 실행 시간을 비교
+def check_engines(ohlcv_data):
+    started = time.perf_counter()
+    loop_result = run_backtest_loop(ohlcv_data)
+    loop_elapsed = time.perf_counter() - started
+
+    started = time.perf_counter()
+    vector_result = run_backtest_vectorized(ohlcv_data)
+    vector_elapsed = time.perf_counter() - started
+
+    same = all(loop_result[key] == vector_result[key] for key in loop_result)
+    print(f"{'✅' if same else '❌'} 기존 루프와 벡터화 엔진 결과 {'일치' if same else '불일치'}")
+    print(f"기존 루프: {loop_elapsed:.3f}초 | 벡터화 엔진: {vector_elapsed:.3f}초 | {loop_elapsed / max(vector_elapsed, 1e-9):.0f}배")
+    return same
 
-    final_portfolio_value = current_krw_balance
-    if current_btc_balance > 0 and not ohlcv_data.empty:
-        final_portfolio_value += (current_btc_balance * ohlcv_data.iloc[-1]['close'])
+# 백테스팅 로직을 함수로 캡슐화
+def run_backtest(engine='vectorized', use_store=True, candle_file=None, stop_mode=STOP_MODE,
+                 sub_timeframe=SUB_TIMEFRAME, sub_candle_file=None, use_cache=True, base_timeframe=None,
+                 daily_open='utc'):
+    # 데이터 로딩 (로컬 캔들 저장소 우선)
+    ohlcv_data = load_backtest_data(use_store=use_store, candle_file=candle_file, base_timeframe=base_timeframe,
+                                    daily_open=daily_open)
+
+    if ohlcv_data.empty:
+        print("❌ 지정된 기간의 데이터를 가져오지 못했습니다. 백테스팅을 종료합니다.")
+        return
+
+    print(f"✅ 데이터 로딩 완료. 총 {len(ohlcv_data)}개의 일봉 데이터.")
+
+    # 4. 백테스팅 메인 루프
+    min_data_points_for_indicators = max(MA_LONG, ADX_WINDOW * 2) 
+
+    if len(ohlcv_data) < min_data_points_for_indicators:
+        print(f"⚠️ 백테스팅 시작을 위한 최소 데이터 ({min_data_points_for_indicators}개) 부족. 현재 {len(ohlcv_data)}개.")
+        print("백테스팅 기간을 짧게 설정했거나, 데이터를 불러오지 못했을 수 있습니다.")
+        return
+
+    if engine == 'check':
+        check_engines(ohlcv_data)
+        return
+
+    if engine == 'loop':
+        result = run_backtest_loop(ohlcv_data)
+        stop_mode = 'close'
+        touched = sub_loads = 0
+    else:
+        # subbar 결과는 그때그때 받는 하위 봉에 달려 있으므로 결과 전체는 캐시하지 않음 (지표 열만 캐시)
+        cache = BacktestCache.from_env() if use_cache else None
+
+        def compute():
+            sub_bars = sub_bar_loader(sub_timeframe, sub_candle_file) if stop_mode == 'subbar' else None
+            stops = backtest_engine.IntrabarStops(ohlcv_data, stop_mode, sub_bars=sub_bars)
+            return {'result': run_backtest_vectorized(ohlcv_data, stops, cache=cache),
+                    'touched': stops.touched, 'sub_loads': stops.sub_loads}
+
+        started = time.perf_counter()
+        if cache is not None and stop_mode != 'subbar':
+            key = cache.key('backtest', data_digest(ohlcv_data), modules=(sys.modules[__name__],),
+                            stop_mode=stop_mode, **strategy_params())
+            run = cache.cached(key, compute)
+        else:
+            run = compute()
+        result, touched, sub_loads = run['result'], run['touched'], run['sub_loads']
+        if cache is not None:
+            print(f"⚡ 백테스트 {time.perf_counter() - started:.3f}초 (캐시 적중 {cache.hits} · 미적중 {cache.misses})")
+    print_report(result, backtest_engine.final_portfolio_value(result, ohlcv_data))
+
+    stop_count = sum(log['type'] == 'SELL (Stop Loss)' for log in result['trade_logs'])
+    print(f"\n손절 판정: {stop_mode} | 손절 {stop_count}회", end='')
+    if engine != 'loop' and stop_mode != 'close':
+        print(f" | 저가가 손절가에 닿은 날 {touched}일 | 하위 봉 조회 {sub_loads}회", end='')
+    print()
+
+# 5. 백테스팅 결과 계산 및 출력
+def print_report(result, final_portfolio_value):
+    portfolio_values = result['portfolio_values']
+
+    print("\n📊 백테스팅 결과 분석 중...")
 
     initial_portfolio_value = INITIAL_KRW_BALANCE
 
@@ -217,22 +397,11 @@ def run_backtest():
     print(f"최종 포트폴리오 가치: {final_portfolio_value:,.0f} KRW")
     print(f"총 누적 수익률: {total_return * 100:.2f}%")
 
-    portfolio_df = pd.DataFrame(portfolio_values)
-    if portfolio_df.empty:
+    monthly_portfolio_values, monthly_returns = backtest_engine.monthly_returns(portfolio_values, INITIAL_KRW_BALANCE)
+    if monthly_portfolio_values is None:
         print("\n포트폴리오 가치 데이터가 없습니다. 월별 수익률 계산 불가.")
         return
 
-    portfolio_df['date'] = pd.to_datetime(portfolio_df['date'])
-    portfolio_df.set_index('date', inplace=True)
-
-    monthly_portfolio_values = portfolio_df['value'].resample('M').last()
-    
-    monthly_returns = monthly_portfolio_values.pct_change()
-    
-    if not monthly_returns.empty:
-        first_month_end_value = monthly_portfolio_values.iloc[0]
-        monthly_returns.iloc[0] = (first_month_end_value / INITIAL_KRW_BALANCE) - 1
-
     print("\n--- 월별 수익률 ---")
     for date, ret in monthly_returns.items():
         if pd.notna(ret):
@@ -254,6 +423,79 @@ def run_backtest():
     else:
         print("\n월평균 수익률을 계산할 데이터가 충분하지 않습니다.")
 
+# 1분봉처럼 긴 구간은 캔들 저장소(또는 캔들 파일)에서 청크 단위로 읽어 스트리밍 엔진으로 돌립니다
+# (메모리는 청크 크기에 비례). check=True 면 같은 캔들을 메모리에 모두 올려 벡터화 엔진 결과와 비교합니다.
+def run_backtest_stream(timeframe=timeframe, chunk_size=100_000, start_date_str=START_DATE, end_date_str=END_DATE,
+                        check=False, candle_file=None):
+    start_ms = _date_ms(start_date_str)
+    end_ms = _date_ms(end_date_str)
+    if candle_file:
+        candles = CandleFile(candle_file)
+
+        def chunks():
+            return candles.chunks(start_ms, end_ms, chunk_size)
+
+        def frame():
+            return candles.frame(start_ms, end_ms)
+    else:
+        store = CandleStore()
+        print(f"⏳ {symbol} 과거 데이터 ({timeframe}) 동기화 중... ({start_date_str} ~ {end_date_str})")
+        sync_store(upbit, symbol, timeframe, start_ms, end_ms, store)
+
+        def chunks():
+            for rows in store.iter_chunks(symbol, timeframe, start_ms, end_ms, chunk_size):
+                yield np.array(rows, dtype=float)
+
+        def frame():
+            # 저장소 캔들은 ts 가 유일하므로 ohlcv_frame 의 값 기준 중복 제거 없이 그대로 비교
+            ohlcv_data = pd.DataFrame(store.load(symbol, timeframe, start_ms, end_ms),
+                                      columns=['timestamp'] + backtest_engine.OHLCV_COLUMNS)
+            ohlcv_data.index = pd.to_datetime(ohlcv_data.pop('timestamp'), unit='ms')
+            return ohlcv_data
+
+    started = time.perf_counter()
+    result = backtest_engine.simulate_ma_adx_stream(chunks(), keep_values=check, **strategy_params())
+    elapsed = time.perf_counter() - started
+    print(f"✅ 스트리밍 백테스트 완료. 총 {result['bars']:,}개 캔들, {elapsed:.3f}초 (청크 {chunk_size:,}개)")
+
+    if check:
+        expected = run_backtest_vectorized(frame())
+        same = (expected['trade_logs'] == result['trade_logs']
+                and expected['portfolio_values'] == result['portfolio_values'])
+        print(f"결과 일치 여부 (스트리밍 vs 메모리): {'✅ 일치' if same else '❌ 불일치'}")
+        return same
+
+    summary = backtest_engine.summarize_stream(result, INITIAL_KRW_BALANCE)
+    print_report(result, summary['final_value'])
+    print(f"최대 낙폭: {summary['max_drawdown'] * 100:.2f}%")
+    return summary
+
 # 백테스팅 실행
 if __name__ == "__main__":
-    run_backtest()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="MA/ADX 전략 백테스트")
+    parser.add_argument('--engine', choices=['vectorized', 'loop', 'check', 'stream', 'stream-check'],
+                        default='vectorized',
+                        help="vectorized: 벡터화 엔진, loop: 기존 루프, check: 두 엔진 결과 비교 및 속도 측정, "
+                             "stream: 캔들 저장소 청크 스트리밍, stream-check: 스트리밍 결과를 메모리 엔진과 비교")
+    parser.add_argument('--no-store', action='store_true', help="로컬 캔들 저장소를 쓰지 않고 전체 구간을 다시 받기")
+    parser.add_argument('--timeframe', default=timeframe, help="stream 엔진의 캔들 주기 (예: 1m, 1h, 1d)")
+    parser.add_argument('--chunk-size', type=int, default=100_000, help="stream 엔진이 한 번에 읽는 캔들 수")
+    parser.add_argument('--candle-file', default=None, help="캔들 저장소 대신 읽을 컬럼형 캔들 파일 (.upc, candle_file.py 로 생성)")
+    parser.add_argument('--stop', choices=backtest_engine.STOP_MODES, default=STOP_MODE,
+                        help="손절 판정: close(종가), low(일봉 저가), subbar(저가가 닿은 날만 하위 봉 확인). "
+                             "stream 엔진은 종가 기준")
+    parser.add_argument('--sub-timeframe', default=SUB_TIMEFRAME, help="subbar 손절 판정에 쓸 하위 봉 주기 (예: 1h, 1m)")
+    parser.add_argument('--sub-candle-file', default=None, help="subbar 하위 봉을 캔들 저장소 대신 읽을 .upc 파일")
+    parser.add_argument('--no-cache', action='store_true', help="지표·결과 디스크 캐시(backtest_cache)를 쓰지 않기")
+    parser.add_argument('--base-timeframe', default=None,
+                        help="이 주기(예: 1m)의 캔들로 일봉을 로컬에서 만들어 백테스트 (--candle-file 도 이 주기)")
+    parser.add_argument('--daily-open', choices=list(DAILY_OPEN_OFFSETS), default='utc',
+                        help="--base-timeframe 일봉 시작: utc(업비트, KST 09:00) / kst(KST 자정)")
+    args = parser.parse_args()
+    if args.engine.startswith('stream'):
+        run_backtest_stream(timeframe=args.timeframe, chunk_size=args.chunk_size, check=args.engine == 'stream-check',
+                            candle_file=args.candle_file)
+    else:
+        run_backtest(engine=args.engine, use_store=not args.no_store, candle_file=args.candle_file,
+                     stop_mode=args.stop, sub_timeframe=args.sub_timeframe, sub_candle_file=args.sub_candle_file,
+                     use_cache=not args.no_cache, base_timeframe=args.base_timeframe, daily_open=args.daily_open)
@@ -0,0 +1,211 @@
+import argparse
+import hashlib
+import json
+import os
+import pickle
+import time
+
+import numpy as np
+
+import backtest_engine
+
+# ───────────────────────────────
+# 백테스트 결과·지표 디스크 캐시 (내용 주소 방식, LRU 용량 제한)
+#
+# 데이터와 파라미터가 같으면 backtest_bot 을 다시 돌려도 같은 계산을 반복했고, 스윕에서는
+# ADX_WINDOW=30, MA_LONG=50 처럼 같은 지표 열을 임계값 조합마다 다시 계산했습니다.
+# 키는 (종류, 데이터 구간 해시, 파라미터, 엔진 코드 버전) 의 해시이므로
+#   • 캔들이 한 개라도 바뀌거나 backtest_engine.py 가 수정되면 자동으로 다른 키가 되고 (무효화 불필요)
+#     결과를 만드는 코드가 엔진 밖에도 있으면 key(..., modules=(모듈,)) 로 그 모듈 소스도 키에 넣습니다
+#     (param_sweep 의 조합별 결과, backtest_bot 의 전체 실행 결과)
+#   • 지표는 열 단위(이동평균 기간, ADX 기간)로 저장되어 다른 조합·다른 실행에서도 재사용됩니다.
+# 값은 pickle 파일 하나씩이고, 임시 파일에 쓴 뒤 os.replace 하므로 여러 프로세스가 같이 써도 안전합니다.
+# 읽을 때 파일 수정 시각을 갱신해 두고, 전체 크기가 max_bytes 를 넘으면 가장 오래 안 쓴 것부터 지웁니다.
+# ───────────────────────────────
+
+DEFAULT_DIRECTORY = 'backtest_cache'
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+EVICT_TO = 0.9            # 정리할 때 max_bytes 의 이 비율까지 줄임
+
+_code_versions = {}
+
+
+def data_digest(ohlcv_data):
+    # 캔들 구간의 내용 해시 (타임스탬프 + OHLCV 값)
+    digest = hashlib.sha256()
+    digest.update(np.ascontiguousarray(ohlcv_data.index.asi8).tobytes())
+    digest.update(np.ascontiguousarray(ohlcv_data[backtest_engine.OHLCV_COLUMNS].to_numpy(dtype=float)).tobytes())
+    return digest.hexdigest()
+
+
+def code_version(*modules):
+    # 모듈 소스 파일 내용의 해시 (전략·엔진 코드가 바뀌면 캐시 키도 바뀜)
+    names = tuple(module.__name__ for module in modules)
+    if names not in _code_versions:
+        digest = hashlib.sha256()
+        for module in modules:
+            with open(module.__file__, 'rb') as f:
+                digest.update(f.read())
+        _code_versions[names] = digest.hexdigest()[:16]
+    return _code_versions[names]
+
+
+class BacktestCache:
+    def __init__(self, directory=DEFAULT_DIRECTORY, max_bytes=DEFAULT_MAX_BYTES, modules=(backtest_engine,)):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.version = code_version(*modules)
+        self.hits = 0
+        self.misses = 0
+        self._total = None
+        os.makedirs(directory, exist_ok=True)
+
+    @classmethod
+    def from_env(cls):
+        directory = os.getenv('BACKTEST_CACHE_DIR', DEFAULT_DIRECTORY)
+        max_mb = os.getenv('BACKTEST_CACHE_MB')
+        return cls(directory, int(float(max_mb) * 1024 * 1024) if max_mb else DEFAULT_MAX_BYTES)
+
+    # ── 키 / 읽기 / 쓰기 ──
+    def key(self, kind, digest, modules=(), **params):
+        # modules: 이 종류의 결과를 만드는 엔진 밖 모듈 (소스가 바뀌면 키도 바뀜)
+        code = self.version + (code_version(*modules) if modules else '')
+        payload = json.dumps({'kind': kind, 'data': digest, 'code': code, 'params': params},
+                             sort_keys=True, default=str)
+        return f"{kind}-{hashlib.sha256(payload.encode()).hexdigest()[:32]}"
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.pkl")
+
+    def get(self, key, default=None):
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                value = pickle.load(f)
+        except FileNotFoundError:
+            self.misses += 1
+            return default
+        except (OSError, pickle.UnpicklingError, EOFError):
+            # 깨진 항목은 지우고 다시 계산
+            self.misses += 1
+            self._remove(path)
+            return default
+        try:
+            os.utime(path)        # LRU: 마지막 사용 시각
+        except FileNotFoundError:
+            pass
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        size = os.path.getsize(tmp_path)
+        os.replace(tmp_path, path)
+        if self._total is None:
+            self._total = self.size()
+        else:
+            self._total += size
+        if self._total > self.max_bytes:
+            self.evict()
+        return value
+
+    def cached(self, key, compute):
+        missing = object()
+        value = self.get(key, missing)
+        if value is missing:
+            value = self.put(key, compute())
+        return value
+
+    # ── 용량 관리 ──
+    def _entries(self):
+        entries = []
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if not entry.name.endswith('.pkl'):
+                    continue
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        return entries
+
+    def size(self):
+        return sum(size for _, size, _ in self._entries())
+
+    def evict(self, target=None):
+        # 오래 안 쓴 항목부터 지워 target 바이트 이하로 (다른 프로세스가 먼저 지운 파일은 건너뜀)
+        target = self.max_bytes * EVICT_TO if target is None else target
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, path in entries:
+            if total <= target:
+                break
+            if self._remove(path):
+                removed += 1
+            total -= size
+        self._total = total
+        return removed
+
+    def clear(self):
+        return self.evict(target=0)
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+            return True
+        except FileNotFoundError:
+            return False
+
+
+# ───────────────────────────────
+# 지표 열 캐시 (열 단위로 저장 → 기간이 같은 조합끼리 공유)
+# ───────────────────────────────
+def indicators(cache, ohlcv_data, strategy, ma_short, ma_long, window, digest=None):
+    """compute_ma_adx_indicators / compute_ma_mdi_indicators 와 같은 dict 를 캐시를 거쳐 만듭니다."""
+    digest = digest or data_digest(ohlcv_data)
+    close = ohlcv_data['close'].to_numpy(dtype=float)
+
+    def rolling(period):
+        return cache.cached(cache.key('rolling_mean', digest, window=period),
+                            lambda: backtest_engine.rolling_mean(close, period))
+
+    dmi = cache.cached(cache.key('adx', digest, window=window),
+                       lambda: backtest_engine.adx_arrays(ohlcv_data['high'], ohlcv_data['low'], close, window))
+    values = {'ma_short': rolling(ma_short), 'ma_long': rolling(ma_long)}
+    if strategy == 'ma_mdi':
+        values['mdi'] = dmi[2]
+    else:
+        values['adx'] = dmi[0]
+    return values
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="백테스트 캐시 상태 확인/정리")
+    parser.add_argument('--clear', action='store_true', help="모든 항목 삭제")
+    parser.add_argument('--evict', action='store_true', help="용량 한도까지 오래 안 쓴 항목 정리")
+    args = parser.parse_args()
+
+    cache = BacktestCache.from_env()
+    if args.clear:
+        print(f"🗑️ {cache.clear()}개 항목 삭제")
+    elif args.evict:
+        print(f"🧹 {cache.evict()}개 항목 정리")
+    entries = cache._entries()
+    kinds = {}
+    for _, size, path in entries:
+        kind = os.path.basename(path).split('-')[0]
+        count, total = kinds.get(kind, (0, 0))
+        kinds[kind] = (count + 1, total + size)
+    print(f"{cache.directory}: {len(entries)}개, {sum(size for _, size, _ in entries) / 1024 / 1024:.1f}MB "
+          f"/ 한도 {cache.max_bytes / 1024 / 1024:.0f}MB (엔진 코드 버전 {cache.version})")
+    for kind, (count, total) in sorted(kinds.items()):
+        print(f"  {kind}: {count}개, {total / 1024 / 1024:.2f}MB")
+    if entries:
+        oldest = min(mtime for mtime, _, _ in entries)
+        print(f"  가장 오래 안 쓴 항목: {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(oldest))}")
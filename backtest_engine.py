@@ -0,0 +1,683 @@
+import numpy as np
+import pandas as pd
+
+# ───────────────────────────────
+# MA/ADX 전략 벡터화 백테스트 엔진
+#
+# backtest_bot.run_backtest 의 기존 루프는 매일 iloc[:i+1] 슬라이스를 복사하고
+# 이동평균·ADX 를 처음부터 다시 계산했기 때문에 O(n²) 이었습니다.
+# 여기서는 지표를 전체 구간에 대해 한 번만 계산하고, 포지션 상태 머신만
+# 단순 루프로 돌립니다. 결과(trade_logs, portfolio_values)는 기존 루프와 동일합니다.
+# ───────────────────────────────
+
+OHLCV_COLUMNS = ['open', 'high', 'low', 'close', 'vol']
+
+# pandas 2.2 부터 월말 리샘플 별칭이 'M' → 'ME' 로 바뀌었습니다.
+MONTH_END = 'ME' if tuple(int(part) for part in pd.__version__.split('.')[:2]) >= (2, 2) else 'M'
+
+
+# ───────────────────────────────
+# 1. 지표 계산 (전체 구간 1회)
+# ───────────────────────────────
+def rolling_mean(close, window):
+    # pandas rolling 은 앞에서부터 누적 합을 갱신하므로 접두 구간 계산과 값이 같습니다.
+    return pd.Series(close).rolling(window).mean().to_numpy()
+
+
+def _wilder_sum(values, seed, window, length):
+    # ta 라이브러리와 같은 연산 순서: s[i] = s[i-1] - s[i-1]/w + x[w+i]
+    out = [0.0] * length
+    if length == 0:
+        return np.zeros(0)
+    out[0] = seed
+    w = float(window)
+    prev = seed
+    for i in range(1, length - 1):
+        prev = prev - (prev / w) + values[window + i]
+        out[i] = prev
+    return np.array(out)
+
+
+def adx_arrays(high, low, close, window):
+    """ta.trend.ADXIndicator 와 비트 단위로 같은 (adx, +DI, -DI) 배열을 반환합니다."""
+    high = pd.Series(np.asarray(high, dtype=float))
+    low = pd.Series(np.asarray(low, dtype=float))
+    close = pd.Series(np.asarray(close, dtype=float))
+    n = len(close)
+
+    adx = np.zeros(n)
+    adx_pos = np.zeros(n)
+    adx_neg = np.zeros(n)
+    length = n - (window - 1)
+    if length <= window:
+        return adx, adx_pos, adx_neg
+
+    close_shift = close.shift(1).to_numpy()
+    pdm = np.amax([high.to_numpy(), close_shift], axis=0)
+    pdn = np.amin([low.to_numpy(), close_shift], axis=0)
+    tr = pd.Series(pdm - pdn)
+
+    diff_up = high - high.shift(1)
+    diff_down = low.shift(1) - low
+    pos = abs(((diff_up > diff_down) & (diff_up > 0)) * diff_up)
+    neg = abs(((diff_down > diff_up) & (diff_down > 0)) * diff_down)
+
+    trs = _wilder_sum(tr.tolist(), tr.dropna().iloc[0:window].sum(), window, length)
+    dip = _wilder_sum(pos.tolist(), pos.dropna().iloc[0:window].sum(), window, length)
+    din = _wilder_sum(neg.tolist(), neg.dropna().iloc[0:window].sum(), window, length)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        di_pos = np.where(trs != 0, 100 * (dip / trs), 0.0)
+        di_neg = np.where(trs != 0, 100 * (din / trs), 0.0)
+        di_sum = di_pos + di_neg
+        dx = np.where(di_sum != 0, 100 * np.abs((di_pos - di_neg) / di_sum), 0.0)
+
+    # ADX: 첫 값은 DX 평균, 이후 Wilder 평활
+    smoothed = [0.0] * length
+    prev = dx[0:window].mean()
+    smoothed[window] = prev
+    dx_list = dx.tolist()
+    w = float(window)
+    for i in range(window + 1, length):
+        prev = ((prev * (window - 1)) + dx_list[i - 1]) / w
+        smoothed[i] = prev
+    adx[window - 1:] = smoothed
+
+    # +DI/-DI: ta 와 마찬가지로 window+1 번째 봉부터 값이 채워집니다.
+    adx_pos[window + 1:] = di_pos[1:length - 1]
+    adx_neg[window + 1:] = di_neg[1:length - 1]
+    return adx, adx_pos, adx_neg
+
+
+def compute_ma_adx_indicators(ohlcv_data, ma_short, ma_long, adx_window):
+    close = ohlcv_data['close'].to_numpy(dtype=float)
+    adx, _, _ = adx_arrays(ohlcv_data['high'], ohlcv_data['low'], close, adx_window)
+    return {
+        'ma_short': rolling_mean(close, ma_short),
+        'ma_long': rolling_mean(close, ma_long),
+        'adx': adx,
+    }
+
+
+def compute_ma_mdi_indicators(ohlcv_data, ma_short, ma_long, mdi_window):
+    # ma_mdi.py 전략: MA 크로스 + -DI(MDI)
+    close = ohlcv_data['close'].to_numpy(dtype=float)
+    _, _, adx_neg = adx_arrays(ohlcv_data['high'], ohlcv_data['low'], close, mdi_window)
+    return {
+        'ma_short': rolling_mean(close, ma_short),
+        'ma_long': rolling_mean(close, ma_long),
+        'mdi': adx_neg,
+    }
+
+
+def valid_rows(ohlcv_data, indicators):
+    # 기존 루프의 df_slice.dropna() 와 같은 기준의 유효 행 마스크
+    mask = ohlcv_data[OHLCV_COLUMNS].notna().all(axis=1).to_numpy()
+    for values in indicators.values():
+        mask &= ~np.isnan(values)
+    return mask
+
+
+def decision_rows(ohlcv_data, indicators, start):
+    # 각 날짜 i(start 부터)에서 판단에 쓰이는 행 번호. 기존 루프의 dropna 후 iloc[-1] 에 해당하며,
+    # 유효 행이 2개 미만인 날은 건너뜁니다.
+    n = len(ohlcv_data)
+    if n <= start:
+        return np.zeros(0, dtype=np.int64)
+    valid_idx = np.flatnonzero(valid_rows(ohlcv_data, indicators))
+    last_valid = np.searchsorted(valid_idx, np.arange(start, n), side='right') - 1
+    return valid_idx[last_valid[last_valid >= 1]]
+
+
+# ───────────────────────────────
+# 2. 포지션 상태 머신
+# ───────────────────────────────
+def new_portfolio_state(initial_krw):
+    return {'trade_logs': [], 'portfolio_values': [], 'krw_balance': initial_krw, 'btc_balance': 0,
+            'last_buy_price': None}
+
+
+def run_ma_adx_rows(state, rows, dates, closes, golden, death, adx_buy, adx_sell,
+                    stop_loss_pct, min_krw_trade, trade_fee_rate, stops=None):
+    # rows 순서대로 상태 머신을 진행 (state 를 이어 받아 청크 단위로 나눠 호출해도 결과가 같음)
+    # stops 가 없으면 종가로 손절을 판정하고, IntrabarStops 를 넘기면 봉 내부(저가·하위 봉) 기준으로 판정합니다.
+    trade_logs = state['trade_logs']
+    portfolio_values = state['portfolio_values']
+    current_krw_balance = state['krw_balance']
+    current_btc_balance = state['btc_balance']
+    current_last_buy_price = state['last_buy_price']
+
+    stop_mult = 1 - stop_loss_pct
+    fee_mult = 1 - trade_fee_rate
+
+    for cur in rows:
+        today_date = dates[cur]
+        today_close = closes[cur]
+
+        portfolio_values.append({'date': today_date,
+                                 'value': current_krw_balance + (current_btc_balance * today_close)})
+
+        # 손절
+        if current_last_buy_price is not None and current_btc_balance > 0:
+            stop_price = current_last_buy_price * stop_mult
+            if stops is None:
+                stop_fill = today_close if today_close <= stop_price else None
+            else:
+                stop_fill = stops.fill(cur, stop_price)
+            if stop_fill is not None:
+                sell_amount_krw = current_btc_balance * stop_fill * fee_mult
+                current_krw_balance += sell_amount_krw
+                trade_logs.append({
+                    'date': today_date,
+                    'type': 'SELL (Stop Loss)',
+                    'price': stop_fill,
+                    'amount_btc': current_btc_balance,
+                    'amount_krw_gained': sell_amount_krw,
+                    'balance_krw': current_krw_balance,
+                    'balance_btc': 0,
+                    'prev_buy_price': current_last_buy_price
+                })
+                current_btc_balance = 0
+                current_last_buy_price = None
+                continue
+
+        # 매수
+        if golden[cur] and adx_buy[cur] and current_krw_balance >= min_krw_trade and current_btc_balance == 0:
+            buy_amount_krw_to_use = current_krw_balance
+            buy_amount_btc = (buy_amount_krw_to_use * fee_mult) / today_close
+            current_last_buy_price = today_close
+            current_krw_balance = 0
+            trade_logs.append({
+                'date': today_date,
+                'type': 'BUY',
+                'price': today_close,
+                'amount_btc': buy_amount_btc,
+                'amount_krw_used': buy_amount_krw_to_use,
+                'balance_krw': current_krw_balance,
+                'balance_btc': current_btc_balance + buy_amount_btc,
+                'prev_buy_price': current_last_buy_price
+            })
+            current_btc_balance += buy_amount_btc
+
+        # 매도
+        if (death[cur] or adx_sell[cur]) and current_btc_balance > 0:
+            sell_amount_krw = current_btc_balance * today_close * fee_mult
+            current_krw_balance += sell_amount_krw
+            trade_logs.append({
+                'date': today_date,
+                'type': 'SELL',
+                'price': today_close,
+                'amount_btc': current_btc_balance,
+                'amount_krw_gained': sell_amount_krw,
+                'balance_krw': current_krw_balance,
+                'balance_btc': 0,
+                'prev_buy_price': current_last_buy_price
+            })
+            current_btc_balance = 0
+            current_last_buy_price = None
+
+    state['krw_balance'] = current_krw_balance
+    state['btc_balance'] = current_btc_balance
+    state['last_buy_price'] = current_last_buy_price
+    return state
+
+
+def simulate_ma_adx(ohlcv_data, ma_short, ma_long, adx_window, adx_buy_thresh, adx_sell_thresh,
+                    stop_loss_pct, min_krw_trade, trade_fee_rate, initial_krw, indicators=None, stops=None):
+    if indicators is None:
+        indicators = compute_ma_adx_indicators(ohlcv_data, ma_short, ma_long, adx_window)
+
+    # 골든/데드 크로스 조건은 "현재 단기 > 장기" 항이 교차 항을 포함하므로 현재 값 비교로 충분합니다.
+    ma_s = indicators['ma_short']
+    ma_l = indicators['ma_long']
+    adx = indicators['adx']
+
+    state = run_ma_adx_rows(
+        new_portfolio_state(initial_krw),
+        decision_rows(ohlcv_data, indicators, max(ma_long, adx_window * 2)).tolist(),
+        ohlcv_data.index.date,
+        ohlcv_data['close'].to_numpy(dtype=float).tolist(),
+        (ma_s > ma_l).tolist(), (ma_s < ma_l).tolist(),
+        (adx > adx_buy_thresh).tolist(), (adx < adx_sell_thresh).tolist(),
+        stop_loss_pct, min_krw_trade, trade_fee_rate, stops=stops,
+    )
+    return {'trade_logs': state['trade_logs'], 'portfolio_values': state['portfolio_values'],
+            'krw_balance': state['krw_balance'], 'btc_balance': state['btc_balance']}
+
+
+# ───────────────────────────────
+# 2-1. 임계값 브로드캐스트 (봉 × 파라미터 세트)
+#
+# 지표는 한 번만 계산하고, 임계값 조합 P 개의 상태(KRW, BTC, 매수가)를 길이 P 배열로
+# 두어 모든 조합을 한 번의 시간 루프로 함께 시뮬레이션합니다.
+# 조합별 결과는 simulate_ma_adx 를 각각 돌린 것과 같습니다.
+# ───────────────────────────────
+def threshold_signals(strategy, indicators, buy_thresh, sell_thresh):
+    # (봉, 조합) 매수/매도 신호 행렬
+    golden = (indicators['ma_short'] > indicators['ma_long'])[:, None]
+    death = (indicators['ma_short'] < indicators['ma_long'])[:, None]
+    buy_thresh = np.asarray(buy_thresh, dtype=float)[None, :]
+    sell_thresh = np.asarray(sell_thresh, dtype=float)[None, :]
+    if strategy == 'ma_adx':
+        adx = indicators['adx'][:, None]
+        return golden & (adx > buy_thresh), death | (adx < sell_thresh)
+    if strategy == 'ma_mdi':
+        # ma_mdi.py: MDI ≤ 매수 기준이면 매수, MDI ≥ 매도 기준이면 매도
+        mdi = indicators['mdi'][:, None]
+        return golden & (mdi <= buy_thresh), death | (mdi >= sell_thresh)
+    raise ValueError(f"알 수 없는 전략: {strategy}")
+
+
+def simulate_threshold_grid(ohlcv_data, indicators, rows, buy_signal, sell_signal,
+                            stop_loss_pct, min_krw_trade, trade_fee_rate, initial_krw, stop_mode='close'):
+    """rows 순서대로 봉을 진행하며 P 개 조합을 동시에 시뮬레이션합니다.
+
+    stop_mode 는 IntrabarStops 와 같은 'close'(종가) / 'low'(저가가 닿으면 손절가, 갭 하락이면 시가) 판정입니다.
+    반환값의 'values' 는 (len(rows), P) 포트폴리오 가치 행렬입니다.
+    """
+    if stop_mode not in GRID_STOP_MODES:
+        raise ValueError(f"그리드 시뮬레이션에서 쓸 수 없는 손절 판정 방식: {stop_mode} ({', '.join(GRID_STOP_MODES)})")
+    count = buy_signal.shape[1]
+    closes = ohlcv_data['close'].to_numpy(dtype=float)
+    stop_low = stop_mode == 'low'
+    if stop_low:
+        opens = ohlcv_data['open'].to_numpy(dtype=float)
+        lows = ohlcv_data['low'].to_numpy(dtype=float)
+    stop_mult = 1 - np.broadcast_to(np.asarray(stop_loss_pct, dtype=float), (count,))
+    fee_mult = 1 - trade_fee_rate
+
+    krw = np.full(count, float(initial_krw))
+    btc = np.zeros(count)
+    last_buy = np.full(count, np.nan)
+    trades = np.zeros(count, dtype=np.int64)
+    values = np.empty((len(rows), count))
+
+    for step, cur in enumerate(rows.tolist()):
+        close = closes[cur]
+        values[step] = krw + (btc * close)
+
+        # 손절 (손절한 날은 매수/매도 판단을 건너뜀)
+        holding = btc > 0
+        stop_price = last_buy * stop_mult
+        if stop_low:
+            stop = holding & (lows[cur] <= stop_price)
+            stop_fill = np.minimum(opens[cur], stop_price)
+        else:
+            stop = holding & (close <= stop_price)
+            stop_fill = close
+        krw = np.where(stop, krw + btc * stop_fill * fee_mult, krw)
+        btc = np.where(stop, 0.0, btc)
+        last_buy = np.where(stop, np.nan, last_buy)
+
+        # 매수
+        buy = ~stop & buy_signal[cur] & (krw >= min_krw_trade) & (btc == 0)
+        btc = np.where(buy, (krw * fee_mult) / close, btc)
+        last_buy = np.where(buy, close, last_buy)
+        krw = np.where(buy, 0.0, krw)
+
+        # 매도
+        sell = ~stop & sell_signal[cur] & (btc > 0)
+        krw = np.where(sell, krw + btc * close * fee_mult, krw)
+        btc = np.where(sell, 0.0, btc)
+        last_buy = np.where(sell, np.nan, last_buy)
+
+        trades += stop.astype(np.int64) + buy + sell
+
+    return {'values': values, 'krw_balance': krw, 'btc_balance': btc, 'trades': trades}
+
+
+def summarize_grid(grid_result, ohlcv_data, rows, initial_krw):
+    # summarize() 의 조합별 벡터화 버전: total_return, monthly_avg_return, max_drawdown, trades
+    values = grid_result['values']
+    final_value = grid_result['krw_balance'].copy()
+    if not ohlcv_data.empty:
+        last_close = ohlcv_data.iloc[-1]['close']
+        final_value = np.where(grid_result['btc_balance'] > 0,
+                               final_value + grid_result['btc_balance'] * last_close, final_value)
+
+    count = values.shape[1]
+    if len(rows) == 0:
+        monthly_avg = np.full(count, np.nan)
+        drawdown = np.zeros(count)
+    else:
+        # 월말 = 각 달의 마지막 판단 행
+        months = ohlcv_data.index[rows].to_period('M').asi8
+        month_last = np.flatnonzero(np.r_[months[1:] != months[:-1], True])
+        monthly_values = values[month_last]
+        monthly = np.empty_like(monthly_values)
+        monthly[0] = monthly_values[0] / initial_krw - 1
+        monthly[1:] = monthly_values[1:] / monthly_values[:-1] - 1
+        monthly_avg = monthly.mean(axis=0)
+        drawdown = (values / np.maximum.accumulate(values, axis=0) - 1).min(axis=0)
+
+    return {
+        'total_return': final_value / initial_krw - 1,
+        'monthly_avg_return': monthly_avg,
+        'max_drawdown': drawdown,
+        'trades': grid_result['trades'],
+        'final_value': final_value,
+    }
+
+
+# ───────────────────────────────
+# 2-2. 봉 내부 손절 판정
+#
+# 종가만 보고 손절하면 장중에 손절가를 뚫고 내려갔다 회복한 날을 놓치고, 손절가보다 훨씬 낮은
+# 종가에 파는 것으로 계산되어 일봉 결과가 낙관적이 됩니다. IntrabarStops 는
+#   • 'low':    봉 저가가 손절가 이하이면 손절가에 체결 (시가부터 갭 하락이면 시가)
+#   • 'subbar': 저가가 손절가에 닿은 봉에서만 하위 봉(1h/1m)을 불러와, 처음 닿은 하위 봉 기준으로 체결
+# 하위 봉은 전체 배열(봉 → 하위 봉 구간 색인을 searchsorted 한 번으로 미리 계산) 또는
+# load(start_ms, end_ms) 함수(캔들 저장소·캔들 파일에서 그날 구간만 읽기)로 받습니다.
+# ───────────────────────────────
+STOP_MODES = ('close', 'low', 'subbar')
+GRID_STOP_MODES = ('close', 'low')   # simulate_threshold_grid 가 지원하는 판정 (subbar 는 단일 실행에서만)
+
+
+def bar_ranges(bar_ts, sub_ts, bar_ms):
+    # 각 봉 [ts, ts + bar_ms) 에 드는 하위 봉의 [시작, 끝) 인덱스 (sub_ts 는 정렬되어 있어야 함)
+    bar_ts = np.asarray(bar_ts, dtype=np.int64)
+    sub_ts = np.asarray(sub_ts, dtype=np.int64)
+    return np.searchsorted(sub_ts, bar_ts, side='left'), np.searchsorted(sub_ts, bar_ts + bar_ms, side='left')
+
+
+def first_touch(sub_bars, stop_price):
+    # 시간순 하위 봉 중 저가가 손절가에 처음 닿는 봉의 체결가 (그 봉 시가가 이미 아래면 시가). 없으면 None
+    if len(sub_bars) == 0:
+        return None
+    sub_bars = np.asarray(sub_bars, dtype=float)
+    hit = np.flatnonzero(sub_bars[:, 3] <= stop_price)
+    if hit.size == 0:
+        return None
+    return min(float(sub_bars[hit[0], 1]), stop_price)
+
+
+class IntrabarStops:
+    """run_ma_adx_rows 의 손절 판정기. fill(행 번호, 손절가) → 체결가 또는 None."""
+
+    def __init__(self, ohlcv_data, mode='low', sub_bars=None, bar_ms=None):
+        if mode not in STOP_MODES:
+            raise ValueError(f"알 수 없는 손절 판정 방식: {mode} ({', '.join(STOP_MODES)})")
+        if mode == 'subbar' and sub_bars is None:
+            raise ValueError("subbar 손절 판정에는 하위 봉(sub_bars)이 필요합니다.")
+        self.mode = mode
+        self.opens = ohlcv_data['open'].to_numpy(dtype=float)
+        self.lows = ohlcv_data['low'].to_numpy(dtype=float)
+        self.closes = ohlcv_data['close'].to_numpy(dtype=float)
+        self.bar_ts = ohlcv_data.index.asi8 // 1_000_000
+        if bar_ms is None:
+            bar_ms = int(np.median(np.diff(self.bar_ts))) if len(self.bar_ts) > 1 else 86_400_000
+        self.bar_ms = bar_ms
+        self.touched = 0          # 저가가 손절가에 닿은 봉 수
+        self.sub_loads = 0        # 하위 봉을 읽은 횟수
+        self._sub_array = None
+        self._load = None
+        if mode == 'subbar':
+            if callable(sub_bars):
+                self._load = sub_bars
+            else:
+                self._sub_array = np.asarray(sub_bars, dtype=float)
+                self._starts, self._ends = bar_ranges(self.bar_ts, self._sub_array[:, 0], bar_ms)
+
+    def _sub_bars(self, cur):
+        self.sub_loads += 1
+        if self._load is not None:
+            start_ms = int(self.bar_ts[cur])
+            return self._load(start_ms, start_ms + self.bar_ms - 1)
+        return self._sub_array[self._starts[cur]:self._ends[cur]]
+
+    def fill(self, cur, stop_price):
+        if self.mode == 'close':
+            return self.closes[cur] if self.closes[cur] <= stop_price else None
+        if self.lows[cur] > stop_price:
+            return None
+        self.touched += 1
+        if self.mode == 'subbar':
+            price = first_touch(self._sub_bars(cur), stop_price)
+            if price is not None:
+                return price
+            # 하위 봉이 비었거나 (수집 누락) 저가와 맞지 않으면 봉 저가 기준으로 처리
+        return min(self.opens[cur], stop_price)
+
+
+# ───────────────────────────────
+# 3. 성과 요약
+# ───────────────────────────────
+def final_portfolio_value(result, ohlcv_data):
+    value = result['krw_balance']
+    if result['btc_balance'] > 0 and not ohlcv_data.empty:
+        value += result['btc_balance'] * ohlcv_data.iloc[-1]['close']
+    return value
+
+
+def monthly_returns(portfolio_values, initial_krw):
+    # (월말 포트폴리오 가치, 월별 수익률). 첫 달은 초기 자산 대비 수익률입니다.
+    portfolio_df = pd.DataFrame(portfolio_values)
+    if portfolio_df.empty:
+        return None, None
+
+    portfolio_df['date'] = pd.to_datetime(portfolio_df['date'])
+    portfolio_df.set_index('date', inplace=True)
+
+    monthly_values = portfolio_df['value'].resample(MONTH_END).last()
+    returns = monthly_values.pct_change()
+    if not returns.empty:
+        returns.iloc[0] = (monthly_values.iloc[0] / initial_krw) - 1
+    return monthly_values, returns
+
+
+def max_drawdown(portfolio_values):
+    values = np.array([row['value'] for row in portfolio_values], dtype=float)
+    if len(values) == 0:
+        return 0.0
+    return float((values / np.maximum.accumulate(values) - 1).min())
+
+
+def summarize(result, ohlcv_data, initial_krw):
+    final_value = final_portfolio_value(result, ohlcv_data)
+    _, returns = monthly_returns(result['portfolio_values'], initial_krw)
+    valid_returns = returns.dropna() if returns is not None else pd.Series(dtype=float)
+    return {
+        'total_return': (final_value / initial_krw) - 1,
+        'monthly_avg_return': valid_returns.mean() if not valid_returns.empty else np.nan,
+        'max_drawdown': max_drawdown(result['portfolio_values']),
+        'trades': len(result['trade_logs']),
+        'final_value': final_value,
+    }
+
+
+# ───────────────────────────────
+# 4. 스트리밍(청크) 백테스트
+#
+# 1분봉 수년치(수백만 행)를 한 번에 DataFrame 으로 올리지 않고, 디스크에서 청크 단위로 읽으며
+# 지표의 워밍업 상태(이동평균 꼬리, ADX Wilder 합)와 포지션 상태를 청크 경계 너머로 이어 갑니다.
+# 메모리는 청크 크기 + 일별 포트폴리오 가치 + 거래 기록에 비례하고 전체 기간 길이와는 무관합니다.
+#
+# 결과는 같은 캔들로 simulate_ma_adx / summarize 를 돌린 것과 같습니다. 단,
+#   • 입력 캔들에 결측(NaN)이 없어야 하고 (CandleStore 에 저장된 캔들은 항상 채워져 있음)
+#   • 이동평균은 종가가 정수(원화 호가)일 때 비트 단위로 같습니다. pandas rolling 의 누적 합이
+#     정수 구간에서는 오차 없이 계산되어, 꼬리(window-1 개)부터 다시 굴려도 값이 같기 때문입니다.
+# ───────────────────────────────
+class RollingMeanStream:
+    def __init__(self, window):
+        self.window = window
+        self.tail = np.zeros(0)
+
+    def update(self, close):
+        values = np.concatenate([self.tail, close])
+        out = rolling_mean(values, self.window)[len(self.tail):]
+        keep = self.window - 1
+        self.tail = values[len(values) - keep:] if keep else values[:0]
+        return out
+
+
+class AdxStream:
+    """adx_arrays 와 같은 연산 순서로 (adx, +DI, -DI) 를 청크마다 이어서 계산합니다."""
+
+    def __init__(self, window):
+        self.window = window
+        self.count = 0              # 지금까지 받은 봉 개수
+        self.prev = None            # 직전 봉 (high, low, close)
+        self.seed = ([], [], [])    # 첫 window 개의 (TR, +DM, -DM) → 합으로 Wilder 합 시작
+        self.sums = None            # (TR, +DM, -DM) Wilder 합
+        self.dx_seed = []           # 첫 window 개의 DX → 평균으로 ADX 시작
+        self.adx = None
+
+    def update(self, high, low, close):
+        high = np.asarray(high, dtype=float)
+        low = np.asarray(low, dtype=float)
+        close = np.asarray(close, dtype=float)
+        m = len(close)
+        adx = np.zeros(m)
+        adx_pos = np.zeros(m)
+        adx_neg = np.zeros(m)
+        if m == 0:
+            return adx, adx_pos, adx_neg
+
+        prev_high, prev_low, prev_close = self.prev if self.prev else (np.nan, np.nan, np.nan)
+        high_shift = np.r_[prev_high, high[:-1]]
+        low_shift = np.r_[prev_low, low[:-1]]
+        close_shift = np.r_[prev_close, close[:-1]]
+        tr = (np.amax([high, close_shift], axis=0) - np.amin([low, close_shift], axis=0)).tolist()
+        diff_up = high - high_shift
+        diff_down = low_shift - low
+        pos = np.where((diff_up > diff_down) & (diff_up > 0), diff_up, 0.0).tolist()
+        neg = np.where((diff_down > diff_up) & (diff_down > 0), diff_down, 0.0).tolist()
+
+        window = self.window
+        w = float(window)
+        trs, dip, din = np.zeros(m), np.zeros(m), np.zeros(m)
+        for k in range(m):
+            bar = self.count + k
+            if bar == 0:
+                continue
+            if bar <= window:
+                for seed, value in zip(self.seed, (tr[k], pos[k], neg[k])):
+                    seed.append(value)
+                if bar == window:
+                    self.sums = tuple(pd.Series(seed).sum() for seed in self.seed)
+                    self.seed = ([], [], [])
+                else:
+                    continue
+            else:
+                s_tr, s_pos, s_neg = self.sums
+                self.sums = (s_tr - (s_tr / w) + tr[k], s_pos - (s_pos / w) + pos[k], s_neg - (s_neg / w) + neg[k])
+            trs[k], dip[k], din[k] = self.sums
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            di_pos = np.where(trs != 0, 100 * (dip / trs), 0.0)
+            di_neg = np.where(trs != 0, 100 * (din / trs), 0.0)
+            di_sum = di_pos + di_neg
+            dx = np.where(di_sum != 0, 100 * np.abs((di_pos - di_neg) / di_sum), 0.0).tolist()
+
+        first = max(window + 1 - self.count, 0)
+        adx_pos[first:] = di_pos[first:]
+        adx_neg[first:] = di_neg[first:]
+        for k in range(max(window - self.count, 0), m):
+            bar = self.count + k
+            if bar < window * 2 - 1:
+                self.dx_seed.append(dx[k])
+                continue
+            if bar == window * 2 - 1:
+                self.dx_seed.append(dx[k])
+                self.adx = np.array(self.dx_seed).mean()
+                self.dx_seed = []
+            else:
+                self.adx = ((self.adx * (window - 1)) + dx[k]) / w
+            adx[k] = self.adx
+
+        self.prev = (high[-1], low[-1], close[-1])
+        self.count += m
+        return adx, adx_pos, adx_neg
+
+
+class MaAdxStream:
+    def __init__(self, ma_short, ma_long, adx_window):
+        self.ma_short = RollingMeanStream(ma_short)
+        self.ma_long = RollingMeanStream(ma_long)
+        self.adx = AdxStream(adx_window)
+
+    def update(self, high, low, close):
+        close = np.asarray(close, dtype=float)
+        adx, _, _ = self.adx.update(high, low, close)
+        return {
+            'ma_short': self.ma_short.update(close),
+            'ma_long': self.ma_long.update(close),
+            'adx': adx,
+        }
+
+
+def simulate_ma_adx_stream(chunks, ma_short, ma_long, adx_window, adx_buy_thresh, adx_sell_thresh,
+                           stop_loss_pct, min_krw_trade, trade_fee_rate, initial_krw, keep_values=False):
+    """(n, 6) 배열 [ts(ms), open, high, low, close, vol] 청크를 시간 순서대로 받아 simulate_ma_adx 를 수행합니다.
+
+    portfolio_values 는 날짜별 마지막 값만 남기고(월별 수익률 계산에는 충분), 최대 낙폭은 전체 봉 기준으로
+    누적 계산해 'max_drawdown' 에 담습니다. keep_values=True 면 봉별 값을 모두 보관합니다.
+    """
+    indicators = MaAdxStream(ma_short, ma_long, adx_window)
+    state = new_portfolio_state(initial_krw)
+    start = max(ma_long, adx_window * 2)
+    offset = 0
+    daily_values = []
+    peak = None
+    drawdown = 0.0
+    last_close = None
+
+    for chunk in chunks:
+        chunk = np.asarray(chunk, dtype=float)
+        m = len(chunk)
+        if m == 0:
+            continue
+        values = indicators.update(chunk[:, 2], chunk[:, 3], chunk[:, 4])
+        closes = chunk[:, 4]
+        first = max(start - offset, 0)
+        if first < m:
+            ma_s, ma_l, adx = values['ma_short'], values['ma_long'], values['adx']
+            dates = pd.to_datetime(chunk[:, 0].astype(np.int64), unit='ms').date
+            state = run_ma_adx_rows(
+                state, range(first, m), dates, closes.tolist(),
+                (ma_s > ma_l).tolist(), (ma_s < ma_l).tolist(),
+                (adx > adx_buy_thresh).tolist(), (adx < adx_sell_thresh).tolist(),
+                stop_loss_pct, min_krw_trade, trade_fee_rate,
+            )
+        offset += m
+        last_close = closes[-1]
+
+        if keep_values:
+            continue
+        # 봉별 가치 → (누적 최대 낙폭, 날짜별 마지막 값)
+        for row in state['portfolio_values']:
+            value = row['value']
+            peak = value if peak is None or value > peak else peak
+            drawdown = min(drawdown, value / peak - 1)
+            if daily_values and daily_values[-1]['date'] == row['date']:
+                daily_values[-1] = row
+            else:
+                daily_values.append(row)
+        state['portfolio_values'] = []
+
+    portfolio_values = state['portfolio_values'] if keep_values else daily_values
+    return {
+        'trade_logs': state['trade_logs'],
+        'portfolio_values': portfolio_values,
+        'krw_balance': state['krw_balance'],
+        'btc_balance': state['btc_balance'],
+        'max_drawdown': max_drawdown(portfolio_values) if keep_values else float(drawdown),
+        'last_close': last_close,
+        'bars': offset,
+    }
+
+
+def summarize_stream(result, initial_krw):
+    # summarize 와 같은 항목. 마지막 종가는 스트림에서 받은 값을 씁니다.
+    final_value = result['krw_balance']
+    if result['btc_balance'] > 0 and result['last_close'] is not None:
+        final_value += result['btc_balance'] * result['last_close']
+    _, returns = monthly_returns(result['portfolio_values'], initial_krw)
+    valid_returns = returns.dropna() if returns is not None else pd.Series(dtype=float)
+    return {
+        'total_return': (final_value / initial_krw) - 1,
+        'monthly_avg_return': valid_returns.mean() if not valid_returns.empty else np.nan,
+        'max_drawdown': result['max_drawdown'],
+        'trades': len(result['trade_logs']),
+        'final_value': final_value,
+    }
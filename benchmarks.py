@@ -0,0 +1,232 @@
+import argparse
+import gc
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+import backtest_engine
+from backtest_bot import ohlcv_frame, strategy_params
+from candle_file import CandleFile, write_candles
+from indicators import RSI, SMA, ADX
+
+# ───────────────────────────────
+# 성능 벤치마크 (오프라인)
+#
+# 시드 고정 합성 OHLCV(1분봉, 1만~1000만 개)로 아래 단계를 크기별로 측정합니다.
+#   • frame:      fetch_historical_ohlcv 후처리 (DataFrame 변환, 기간 자르기, 중복 제거, 정렬)
+#   • indicators: MA/ADX 지표 계산 (backtest_engine.compute_ma_adx_indicators)
+#   • backtest:   run_backtest 의 벡터화 엔진 (backtest_engine.simulate_ma_adx)
+#   • live_tick:  라이브 봇의 봉당 지표 블록 (RSI/SMA/ADX peek + update, 최대 live_tick_bars 개)
+#   • load_csv / load_parquet / load_upc: 디스크 캔들 파일 → DataFrame 로딩 (파일 크기도 기록)
+#     parquet 는 pyarrow/fastparquet 이 설치되어 있을 때만 측정합니다.
+# 시간은 repeat 회 중 최솟값, 메모리는 tracemalloc 최대 사용량(별도 실행)입니다.
+# 저장된 기준값(benchmark_baseline.json)보다 tolerance 이상 느린 단계는 회귀로 표시하고 종료 코드 1 을 냅니다.
+# ───────────────────────────────
+
+DEFAULT_BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmark_baseline.json')
+DEFAULT_SIZES = '10k,100k,1m'
+MIN_REGRESSION_SECONDS = 0.005   # 이보다 작은 차이는 측정 잡음으로 봄
+LOAD_FORMATS = ('csv', 'parquet', 'upc')
+
+
+def parse_size(text):
+    text = text.strip().lower()
+    multiplier = {'k': 1_000, 'm': 1_000_000}.get(text[-1], 1)
+    return int(float(text.rstrip('km')) * multiplier)
+
+
+def synthetic_ohlcv(bars, seed=42, start='2020-01-01', step_ms=60_000, duplicate_rate=0.001):
+    """시드 고정 합성 캔들: (n, 6) float64 배열 [ts(ms), open, high, low, close, vol].
+
+    페이지 경계에서 겹쳐 받은 것처럼 duplicate_rate 비율만큼 같은 시각의 중복 행이 섞여 있습니다.
+    """
+    rng = np.random.default_rng(seed)
+    close = np.round(50_000_000 * np.exp(np.cumsum(rng.normal(0, 0.001, bars))))
+    open_ = np.r_[close[0], close[:-1]]
+    high = np.round(np.maximum(open_, close) * (1 + rng.uniform(0, 0.002, bars)))
+    low = np.round(np.minimum(open_, close) * (1 - rng.uniform(0, 0.002, bars)))
+    volume = rng.uniform(0.1, 5.0, bars)
+    ts = pd.Timestamp(start).value // 1_000_000 + np.arange(bars, dtype=np.int64) * step_ms
+    rows = np.column_stack([ts, open_, high, low, close, volume]).astype(float)
+    duplicates = rng.choice(bars, size=int(bars * duplicate_rate), replace=False)
+    rows = np.concatenate([rows, rows[duplicates]])
+    return rows[np.argsort(rows[:, 0], kind='stable')]
+
+
+# ───────────────────────────────
+# 측정 단계
+# ───────────────────────────────
+def _date_range(rows):
+    start = pd.to_datetime(int(rows[:, 0].min()), unit='ms')
+    end = pd.to_datetime(int(rows[:, 0].max()), unit='ms')
+    return str(start), str(end)
+
+
+def stage_frame(rows):
+    start, end = _date_range(rows)
+    return lambda: ohlcv_frame(rows, start, end)
+
+
+def stage_indicators(df):
+    params = strategy_params()
+    return lambda: backtest_engine.compute_ma_adx_indicators(df, params['ma_short'], params['ma_long'], params['adx_window'])
+
+
+def stage_backtest(df):
+    params = strategy_params()
+    indicators = backtest_engine.compute_ma_adx_indicators(df, params['ma_short'], params['ma_long'], params['adx_window'])
+    return lambda: backtest_engine.simulate_ma_adx(df, indicators=indicators, **params)
+
+
+def stage_live_tick(rows):
+    bars = rows.tolist()
+
+    def run():
+        indicators = (RSI(14), SMA(50), SMA(200), ADX(14))
+        for bar in bars:
+            for indicator in indicators:
+                indicator.peek(bar)
+                indicator.update(bar)
+    return run
+
+
+def _unique_rows(rows):
+    # 파일 형식 비교용: 같은 시각 중복 행을 뺀 캔들
+    keep = np.r_[True, np.diff(rows[:, 0]) != 0]
+    return rows[keep]
+
+
+def stage_load(fmt, rows, directory):
+    # 캔들을 fmt 형식 파일로 한 번 써 두고, 파일 → DataFrame 로딩만 측정. (run, 파일 크기) 반환
+    rows = _unique_rows(rows)
+    path = os.path.join(directory, f"candles.{fmt}")
+    if fmt == 'upc':
+        write_candles(path, rows, 'BTC/KRW', '1m')
+        return (lambda: CandleFile(path).frame()), os.path.getsize(path)
+
+    df = pd.DataFrame(rows, columns=['timestamp'] + backtest_engine.OHLCV_COLUMNS)
+    df['timestamp'] = pd.to_datetime(df['timestamp'].astype(np.int64), unit='ms')
+    if fmt == 'csv':
+        df.to_csv(path, index=False)
+        return (lambda: pd.read_csv(path, index_col='timestamp', parse_dates=['timestamp'])), os.path.getsize(path)
+    df.to_parquet(path, index=False)
+    return (lambda: pd.read_parquet(path).set_index('timestamp')), os.path.getsize(path)
+
+
+def measure(run, repeat):
+    # (최소 실행 시간, tracemalloc 최대 메모리)
+    best = float('inf')
+    for _ in range(repeat):
+        gc.collect()
+        started = time.perf_counter()
+        run()
+        best = min(best, time.perf_counter() - started)
+    gc.collect()
+    tracemalloc.start()
+    run()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak
+
+
+def run_benchmarks(sizes, repeat=3, seed=42, live_tick_bars=100_000, stages=None):
+    results = {}
+    for size in sizes:
+        rows = synthetic_ohlcv(size, seed=seed)
+        df = ohlcv_frame(rows, *_date_range(rows))
+        builders = {
+            'frame': lambda: (stage_frame(rows), len(rows)),
+            'indicators': lambda: (stage_indicators(df), len(df)),
+            'backtest': lambda: (stage_backtest(df), len(df)),
+            'live_tick': lambda: (stage_live_tick(rows[:min(size, live_tick_bars)]), min(size, live_tick_bars)),
+        }
+        for fmt in LOAD_FORMATS:
+            builders[f'load_{fmt}'] = lambda fmt=fmt: (stage_load(fmt, rows, directory), len(df))
+        with tempfile.TemporaryDirectory() as directory:
+            for stage, build in builders.items():
+                if stages and stage not in stages:
+                    continue
+                try:
+                    run, bars = build()
+                except ImportError as e:
+                    print(f"  {stage:<11} {size:>10,}봉  건너뜀 ({str(e).splitlines()[0]})")
+                    continue
+                file_bytes = None
+                if isinstance(run, tuple):
+                    run, file_bytes = run
+                seconds, peak = measure(run, repeat if size < 1_000_000 else 1)
+                results[f"{stage}@{size}"] = {'stage': stage, 'size': size, 'bars': bars,
+                                              'seconds': seconds, 'peak_bytes': peak}
+                line = (f"  {stage:<12} {size:>10,}봉  {seconds:9.4f}초  {bars / seconds:>13,.0f}봉/초  "
+                        f"최대 메모리 {peak / 2**20:9.1f}MB")
+                if file_bytes is not None:
+                    results[f"{stage}@{size}"]['file_bytes'] = file_bytes
+                    line += f"  파일 {file_bytes / 2**20:9.1f}MB"
+                print(line)
+        del rows, df
+        gc.collect()
+    return results
+
+
+def compare(results, baseline, tolerance):
+    # 기준값 대비 느려진 단계 목록
+    regressions = []
+    for key, result in results.items():
+        base = baseline.get(key)
+        if base is None:
+            continue
+        ratio = result['seconds'] / base['seconds'] if base['seconds'] else float('inf')
+        slower = result['seconds'] - base['seconds']
+        flag = ratio > 1 + tolerance and slower > MIN_REGRESSION_SECONDS
+        mark = '❌' if flag else '✅'
+        print(f"  {mark} {key:<22} {base['seconds']:9.4f}초 → {result['seconds']:9.4f}초 ({ratio:5.2f}배) | "
+              f"메모리 {base['peak_bytes'] / 2**20:8.1f}MB → {result['peak_bytes'] / 2**20:8.1f}MB")
+        if flag:
+            regressions.append(key)
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="지표·데이터 로딩·백테스트 성능 벤치마크 (합성 데이터, 오프라인)")
+    parser.add_argument('--sizes', default=DEFAULT_SIZES, help="쉼표로 구분한 봉 개수, 예: 10k,100k,1m,10m")
+    parser.add_argument('--stages', default=None, help="측정할 단계 (기본: 전부) — frame,indicators,backtest,live_tick,"
+                                                              "load_csv,load_parquet,load_upc")
+    parser.add_argument('--repeat', type=int, default=3, help="반복 횟수 (100만 봉 이상은 1회)")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--live-tick-bars', type=int, default=100_000)
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE_PATH, help="기준값 JSON 경로")
+    parser.add_argument('--save-baseline', action='store_true', help="이번 결과를 기준값으로 저장")
+    parser.add_argument('--tolerance', type=float, default=0.25, help="회귀로 볼 속도 저하 비율 (0.25 = 25%%)")
+    args = parser.parse_args()
+
+    sizes = [parse_size(size) for size in args.sizes.split(',')]
+    stages = set(args.stages.split(',')) if args.stages else None
+    print(f"⏱️ 벤치마크 시작 (크기: {', '.join(f'{size:,}' for size in sizes)})")
+    results = run_benchmarks(sizes, repeat=args.repeat, seed=args.seed,
+                             live_tick_bars=args.live_tick_bars, stages=stages)
+
+    if args.save_baseline:
+        baseline = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline, encoding='utf-8') as f:
+                baseline = json.load(f)
+        baseline.update(results)
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(baseline, f, indent=2, ensure_ascii=False)
+        print(f"\n💾 기준값 저장: {args.baseline}")
+    elif os.path.exists(args.baseline):
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        print(f"\n📊 기준값 비교 (허용 {args.tolerance:.0%})")
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print(f"\n❌ 속도 회귀 {len(regressions)}건: {', '.join(regressions)}")
+            raise SystemExit(1)
+        print("\n✅ 속도 회귀 없음")
+    else:
+        print(f"\n기준값 파일이 없습니다. --save-baseline 으로 먼저 저장하세요. ({args.baseline})")
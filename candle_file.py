@@ -0,0 +1,195 @@
+import argparse
+import struct
+
+import numpy as np
+import pandas as pd
+
+from backtest_engine import OHLCV_COLUMNS
+from candle_store import CandleStore, timeframe_ms
+
+# ───────────────────────────────
+# 컬럼형 캔들 파일 (.upc)
+#
+# 업비트 원화 가격은 호가 단위의 정수배이고, 캔들 시각은 timeframe 의 정수배입니다.
+# float64 + datetime 으로 두면 행당 48바이트지만, 여기서는 고정 폭 정수 컬럼으로 저장합니다.
+#   • ts:     첫 캔들 시각 기준 봉 번호 (start_ts + n * step_ms, 거래 없는 구간은 번호만 건너뜀)
+#   • 가격:   frame-of-reference — (가격 / tick_size) - price_base 를 OHLC 공통 최소 폭 정수로
+#   • 거래량: float64 그대로
+# 모든 컬럼은 8바이트 경계에 이어 붙여 numpy.memmap 으로 복사 없이 바로 읽습니다.
+# 이전 값과의 차분(delta) 대신 기준값 차감(FOR)을 쓴 것은 임의 구간을 누적합 없이 읽기 위해서입니다.
+#
+# 헤더 (128 바이트, 리틀 엔디언)
+#   magic(4) version(u2) reserved(u2) symbol(24) timeframe(8) tick_size(f8)
+#   price_base(i8) start_ts(i8) step_ms(i8) rows(i8) ts_dtype(4) price_dtype(4) volume_dtype(4)
+# ───────────────────────────────
+
+MAGIC = b'UPC1'
+VERSION = 1
+HEADER_SIZE = 128
+_HEADER = struct.Struct('<4sHH24s8sdqqqq4s4s4s')
+_ALIGN = 8
+_PRICE_COLUMNS = ('open', 'high', 'low', 'close')
+
+
+def _smallest_int(low, high, signed=True):
+    candidates = ('<i1', '<i2', '<i4', '<i8') if signed else ('<u1', '<u2', '<u4', '<u8')
+    for dtype in candidates:
+        info = np.iinfo(dtype)
+        if info.min <= low and high <= info.max:
+            return np.dtype(dtype)
+    raise ValueError(f"정수 범위를 벗어났습니다: {low} ~ {high}")
+
+
+def _aligned(offset):
+    return (offset + _ALIGN - 1) // _ALIGN * _ALIGN
+
+
+def _layout(rows, ts_dtype, price_dtype, volume_dtype):
+    # 컬럼 이름 → (dtype, 파일 내 시작 위치)
+    layout = {}
+    offset = HEADER_SIZE
+    for name, dtype in [('ts', ts_dtype)] + [(column, price_dtype) for column in _PRICE_COLUMNS] + [('vol', volume_dtype)]:
+        layout[name] = (dtype, offset)
+        offset = _aligned(offset + rows * dtype.itemsize)
+    return layout, offset
+
+
+def write_candles(path, ohlcv, symbol, timeframe, tick_size=1.0):
+    """ccxt OHLCV 행(또는 (n, 6) 배열)을 .upc 파일로 저장합니다.
+
+    시각이 timeframe 의 정수배가 아니거나 가격이 tick_size 의 정수배가 아니면 ValueError 를 냅니다.
+    """
+    data = np.asarray(ohlcv, dtype=float).reshape(-1, 6)
+    ts = data[:, 0].astype(np.int64)
+    if len(ts) and np.any(np.diff(ts) <= 0):
+        raise ValueError("캔들 시각이 정렬되어 있지 않거나 중복이 있습니다.")
+
+    step_ms = timeframe_ms(timeframe)
+    start_ts = int(ts[0]) if len(ts) else 0
+    offsets, remainder = np.divmod(ts - start_ts, step_ms)
+    if np.any(remainder):
+        raise ValueError(f"캔들 시각이 {timeframe} 간격에 맞지 않습니다.")
+
+    prices = data[:, 1:5] / tick_size
+    ticks = np.rint(prices)
+    # 0.1·0.01 같은 소수 호가 단위는 나눗셈 결과가 정수에서 미세하게 어긋나므로 허용 오차로 비교
+    if np.any(np.abs(prices - ticks) > 1e-6):
+        raise ValueError(f"가격이 tick_size({tick_size}) 의 정수배가 아닙니다.")
+    ticks = ticks.astype(np.int64)
+    price_base = int(ticks.min()) if len(ticks) else 0
+    ticks -= price_base
+
+    ts_dtype = _smallest_int(0, int(offsets.max()) if len(offsets) else 0, signed=False)
+    price_dtype = _smallest_int(0, int(ticks.max()) if len(ticks) else 0, signed=False)
+    volume_dtype = np.dtype('<f8')
+    layout, size = _layout(len(data), ts_dtype, price_dtype, volume_dtype)
+
+    header = _HEADER.pack(MAGIC, VERSION, 0, symbol.encode(), timeframe.encode(), float(tick_size),
+                          price_base, start_ts, step_ms, len(data),
+                          ts_dtype.str.encode(), price_dtype.str.encode(), volume_dtype.str.encode())
+    with open(path, 'wb') as f:
+        f.truncate(size)
+        f.write(header)
+    out = np.memmap(path, dtype=np.uint8, mode='r+', shape=(size,))
+    columns = {'ts': offsets, 'vol': data[:, 5]}
+    columns.update({column: ticks[:, i] for i, column in enumerate(_PRICE_COLUMNS)})
+    for name, (dtype, offset) in layout.items():
+        out[offset:offset + len(data) * dtype.itemsize] = columns[name].astype(dtype).view(np.uint8)
+    out.flush()
+    del out
+    return size
+
+
+class CandleFile:
+    """.upc 파일을 memmap 으로 열어 컬럼을 복사 없이 노출합니다.
+
+    raw[...] 는 파일 그대로의 정수 컬럼(view), ts/open/... 은 원래 단위로 복원한 배열입니다.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._mm = np.memmap(path, dtype=np.uint8, mode='r')
+        (magic, version, _, symbol, timeframe, self.tick_size, self.price_base, self.start_ts, self.step_ms,
+         self.rows, ts_dtype, price_dtype, volume_dtype) = _HEADER.unpack_from(self._mm[:_HEADER.size].tobytes())
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path}: 캔들 파일 형식이 아닙니다.")
+        self.symbol = symbol.rstrip(b'\0').decode()
+        self.timeframe = timeframe.rstrip(b'\0').decode()
+        ts_dtype, price_dtype, volume_dtype = (np.dtype(code.rstrip(b'\0').decode())
+                                               for code in (ts_dtype, price_dtype, volume_dtype))
+        layout, _ = _layout(self.rows, ts_dtype, price_dtype, volume_dtype)
+        self.raw = {name: self._mm[offset:offset + self.rows * dtype.itemsize].view(dtype)
+                    for name, (dtype, offset) in layout.items()}
+
+    def __len__(self):
+        return self.rows
+
+    # ── 복원 ──
+    def ts(self, start=0, stop=None):
+        return self.start_ts + self.raw['ts'][start:stop].astype(np.int64) * self.step_ms
+
+    def prices(self, column, start=0, stop=None):
+        return (self.raw[column][start:stop].astype(np.int64) + self.price_base) * self.tick_size
+
+    def index_range(self, start_ms=None, end_ms=None):
+        # [start_ms, end_ms] 에 드는 행 번호 구간 (봉 번호 컬럼이 정렬되어 있으므로 이진 탐색)
+        offsets = self.raw['ts']
+        lo, hi = 0, self.rows
+        if start_ms is not None:
+            first = -(-(start_ms - self.start_ts) // self.step_ms)
+            lo = int(np.searchsorted(offsets, first)) if first > 0 else 0
+        if end_ms is not None:
+            last = (end_ms - self.start_ts) // self.step_ms
+            hi = int(np.searchsorted(offsets, last, side='right')) if last >= 0 else 0
+        return lo, max(lo, hi)
+
+    def array(self, start=0, stop=None):
+        # ccxt OHLCV 와 같은 (n, 6) float64 배열 [ts(ms), open, high, low, close, vol]
+        columns = [self.ts(start, stop)] + [self.prices(column, start, stop) for column in _PRICE_COLUMNS]
+        columns.append(self.raw['vol'][start:stop])
+        return np.column_stack(columns).astype(float)
+
+    def chunks(self, start_ms=None, end_ms=None, chunk_size=100_000):
+        # 스트리밍 백테스트용 (n, 6) 청크
+        lo, hi = self.index_range(start_ms, end_ms)
+        for start in range(lo, hi, chunk_size):
+            yield self.array(start, min(start + chunk_size, hi))
+
+    def frame(self, start_ms=None, end_ms=None):
+        # backtest_bot.ohlcv_frame 과 같은 모양의 DataFrame (timestamp 인덱스, OHLCV_COLUMNS)
+        lo, hi = self.index_range(start_ms, end_ms)
+        data = {column: self.prices(column, lo, hi) for column in _PRICE_COLUMNS}
+        data['vol'] = np.array(self.raw['vol'][lo:hi])
+        index = pd.DatetimeIndex(pd.to_datetime(self.ts(lo, hi), unit='ms'), name='timestamp')
+        return pd.DataFrame(data, index=index, columns=OHLCV_COLUMNS)
+
+
+def export_store(path, symbol, timeframe, start_ms, end_ms, tick_size=1.0, store=None):
+    # 로컬 캔들 저장소(SQLite) 구간을 .upc 파일로 내보내기
+    store = store or CandleStore()
+    return write_candles(path, store.load(symbol, timeframe, start_ms, end_ms), symbol, timeframe, tick_size)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="로컬 캔들 저장소 → 컬럼형 캔들 파일(.upc) 내보내기 / 정보 보기")
+    parser.add_argument('path', help=".upc 파일 경로")
+    parser.add_argument('--export', action='store_true', help="캔들 저장소에서 내보내기 (없으면 파일 정보만 출력)")
+    parser.add_argument('--symbol', default='BTC/KRW')
+    parser.add_argument('--timeframe', default='1d')
+    parser.add_argument('--start', default='2020-01-01 00:00:00')
+    parser.add_argument('--end', default='2024-12-31 23:59:59')
+    parser.add_argument('--tick-size', type=float, default=1.0, help="가격 단위 (원화 마켓은 1)")
+    args = parser.parse_args()
+
+    if args.export:
+        size = export_store(args.path, args.symbol, args.timeframe,
+                            int(pd.to_datetime(args.start).timestamp() * 1000),
+                            int(pd.to_datetime(args.end).timestamp() * 1000), args.tick_size)
+        print(f"💾 {args.path} 저장 ({size:,} 바이트)")
+
+    candles = CandleFile(args.path)
+    print(f"{candles.symbol} {candles.timeframe} | {len(candles):,}개 | tick {candles.tick_size:g} | "
+          f"ts {candles.raw['ts'].dtype} / 가격 {candles.raw['close'].dtype} / 거래량 {candles.raw['vol'].dtype}")
+    if len(candles):
+        first, last = candles.ts(0, 1)[0], candles.ts(len(candles) - 1)[0]
+        print(f"기간: {pd.to_datetime(first, unit='ms')} ~ {pd.to_datetime(last, unit='ms')}")
@@ -0,0 +1,126 @@
+import os
+import sqlite3
+import time
+
+# ───────────────────────────────
+# 로컬 OHLCV 캔들 저장소 (SQLite)
+#
+# (symbol, timeframe) 별로 캔들과 "이미 받아 온 구간"을 저장합니다.
+# 업비트는 거래가 없는 구간의 캔들을 만들지 않으므로, 빈 구멍 판단은
+# 캔들 연속성이 아니라 받아 온 구간(coverage) 기록을 기준으로 합니다.
+# ───────────────────────────────
+
+DEFAULT_STORE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'candles.db')
+
+_TIMEFRAME_UNITS_MS = {
+    'm': 60_000,
+    'h': 3_600_000,
+    'd': 86_400_000,
+    'w': 604_800_000,
+    'M': 2_592_000_000,
+}
+
+
+def timeframe_ms(timeframe):
+    # '1m', '4h', '1d' 같은 ccxt timeframe 을 밀리초로 변환
+    return int(timeframe[:-1]) * _TIMEFRAME_UNITS_MS[timeframe[-1]]
+
+
+class CandleStore:
+    def __init__(self, path=DEFAULT_STORE_PATH):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS candles (
+                symbol TEXT NOT NULL,
+                timeframe TEXT NOT NULL,
+                ts INTEGER NOT NULL,
+                open REAL, high REAL, low REAL, close REAL, volume REAL,
+                PRIMARY KEY (symbol, timeframe, ts)
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS coverage (
+                symbol TEXT NOT NULL,
+                timeframe TEXT NOT NULL,
+                start_ts INTEGER NOT NULL,
+                end_ts INTEGER NOT NULL
+            );
+        """)
+
+    def close(self):
+        self.conn.close()
+
+    # ── 캔들 읽기/쓰기 ──
+    def load(self, symbol, timeframe, start_ms, end_ms):
+        cursor = self.conn.execute(
+            "SELECT ts, open, high, low, close, volume FROM candles "
+            "WHERE symbol = ? AND timeframe = ? AND ts BETWEEN ? AND ? ORDER BY ts",
+            (symbol, timeframe, start_ms, end_ms),
+        )
+        return [list(row) for row in cursor]
+
+    def iter_chunks(self, symbol, timeframe, start_ms, end_ms, chunk_size=100_000):
+        # load 와 같은 캔들을 chunk_size 개씩 나눠 읽음 (ts 기준 키셋 페이지, 전체를 메모리에 올리지 않음)
+        cursor_ms = start_ms - 1
+        while True:
+            rows = self.conn.execute(
+                "SELECT ts, open, high, low, close, volume FROM candles "
+                "WHERE symbol = ? AND timeframe = ? AND ts > ? AND ts <= ? ORDER BY ts LIMIT ?",
+                (symbol, timeframe, cursor_ms, end_ms, chunk_size),
+            ).fetchall()
+            if not rows:
+                return
+            yield rows
+            cursor_ms = rows[-1][0]
+
+    def save(self, symbol, timeframe, ohlcv):
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO candles VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                [(symbol, timeframe, int(row[0]), *row[1:6]) for row in ohlcv],
+            )
+
+    # ── 받아 온 구간 관리 ──
+    def covered_ranges(self, symbol, timeframe):
+        cursor = self.conn.execute(
+            "SELECT start_ts, end_ts FROM coverage WHERE symbol = ? AND timeframe = ? ORDER BY start_ts",
+            (symbol, timeframe),
+        )
+        return [tuple(row) for row in cursor]
+
+    def mark_covered(self, symbol, timeframe, start_ms, end_ms):
+        # 새 구간을 기존 구간과 병합해서 저장 (구간 끝은 포함, 맞닿은 구간은 이어 붙임)
+        merged = []
+        for start, end in sorted(self.covered_ranges(symbol, timeframe) + [(start_ms, end_ms)]):
+            if merged and start <= merged[-1][1] + 1:
+                merged[-1][1] = max(merged[-1][1], end)
+            else:
+                merged.append([start, end])
+        with self.conn:
+            self.conn.execute("DELETE FROM coverage WHERE symbol = ? AND timeframe = ?", (symbol, timeframe))
+            self.conn.executemany(
+                "INSERT INTO coverage VALUES (?, ?, ?, ?)",
+                [(symbol, timeframe, start, end) for start, end in merged],
+            )
+
+    def missing_ranges(self, symbol, timeframe, start_ms, end_ms):
+        # [start_ms, end_ms] 중 아직 받아 오지 않은 구간 목록 (앞, 뒤, 중간 구멍)
+        missing = []
+        cursor = start_ms
+        for start, end in self.covered_ranges(symbol, timeframe):
+            if end < cursor:
+                continue
+            if start > end_ms:
+                break
+            if start > cursor:
+                missing.append((cursor, min(start - 1, end_ms)))
+            cursor = max(cursor, end + 1)
+        if cursor <= end_ms:
+            missing.append((cursor, end_ms))
+        return missing
+
+    @staticmethod
+    def closed_until_ms(timeframe, now_ms=None):
+        # 진행 중인 캔들은 값이 바뀌므로 그 직전까지만 "받아 온 구간"으로 기록합니다.
+        step = timeframe_ms(timeframe)
+        now_ms = int(time.time() * 1000) if now_ms is None else now_ms
+        return (now_ms // step) * step - 1
@@ -0,0 +1,232 @@
+import argparse
+import collections
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import ccxt
+
+from candle_store import timeframe_ms
+
+# ───────────────────────────────
+# 과거 캔들 병렬 다운로더
+#
+# fetch_ohlcv_range 는 199개 요청 → rateLimit 만큼 sleep → 다음 페이지를 순서대로 반복하고,
+# 네트워크 오류가 나면 5초 뒤 같은 페이지를 끝없이 다시 요청했습니다.
+# 여기서는 구간을 페이지 크기의 독립 창(window)으로 나눠 여러 스레드가 동시에 받고,
+#   • 전체 요청 속도는 업비트 시세 API 한도에 맞춘 토큰 버킷 하나로 제한하고
+#   • 실패한 페이지는 지수 백오프로 재시도하되, 페이지당 횟수와 전체 재시도 예산을 둡니다.
+# 받은 페이지는 시간순으로 이어 붙이고 중복 제거 후 빈 구간(거래 없는 구간 포함)을 보고합니다.
+#
+# 속도 상한: 병렬이어도 초당 rate 페이지를 넘을 수 없습니다. 순차 루프는 페이지당 (지연 + rateLimit 50ms) 이므로
+# 기대 배율은 약 rate × (지연 + 0.05초) 입니다 (10회/초 기준: 지연 0.15초 → 2배, 0.05초 이하 → 1배).
+# 첫 페이지의 지연이 1/rate 보다 짧으면 병렬로 받아도 빨라지지 않으므로 스레드 하나로 순서대로 받습니다.
+# burst 를 1 보다 크게 두면 1초 창 안에 burst + rate - 1 회까지 나가 한도 초과 → 백오프로 오히려 느려집니다.
+# ───────────────────────────────
+
+UPBIT_QUOTATION_RATE = 10     # 업비트 시세 조회 API: 초당 10회 (IP 단위)
+DEFAULT_RATE = UPBIT_QUOTATION_RATE
+SHARED_RATE = 8.0             # 같은 IP 의 다른 봇과 한도를 나눠 쓸 때 (--rate 8 로 선택)
+DEFAULT_BURST = 1
+PAGE_LIMIT = 199
+
+DownloadResult = collections.namedtuple(
+    'DownloadResult', 'rows covered failed gaps duplicates requests retries elapsed workers')
+
+
+class TokenBucket:
+    """초당 rate 개씩 채워지는 토큰 버킷 (최대 burst 개). 여러 스레드가 같이 씁니다."""
+
+    def __init__(self, rate=DEFAULT_RATE, burst=DEFAULT_BURST):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class RetryBudget:
+    # 다운로드 전체에서 허용하는 재시도 횟수 (서버 장애 때 재시도 폭주 방지)
+    def __init__(self, retries):
+        self.remaining = retries
+        self.used = 0
+        self._lock = threading.Lock()
+
+    def take(self):
+        with self._lock:
+            if self.remaining <= 0:
+                return False
+            self.remaining -= 1
+            self.used += 1
+            return True
+
+
+def page_windows(since_ms, until_ms, step_ms, page_limit=PAGE_LIMIT):
+    # [since_ms, until_ms] 를 요청 한 번에 받을 수 있는 [start, end] 창으로 나눔
+    span = step_ms * page_limit
+    return [(start, min(start + span - 1, until_ms)) for start in range(since_ms, until_ms + 1, span)]
+
+
+def _fetch_window(exchange, symbol, timeframe, window, page_limit, bucket, budget, max_retries, backoff):
+    start, end = window
+    for attempt in range(max_retries + 1):
+        bucket.acquire()
+        try:
+            ohlcvs = exchange.fetch_ohlcv(symbol, timeframe, since=start, limit=page_limit)
+            return [row for row in ohlcvs if start <= row[0] <= end]
+        except ccxt.NetworkError as e:
+            # DDoSProtection/RateLimitExceeded/RequestTimeout 포함 — 잠시 뒤 다시 요청
+            if attempt == max_retries or not budget.take():
+                raise
+            delay = backoff * (2 ** attempt) * (0.5 + random.random())
+            print(f"   ↳ 재시도 {attempt + 1}/{max_retries} ({delay:.1f}초 후): {type(e).__name__} {e}")
+            time.sleep(delay)
+
+
+def download_ohlcv(exchange, symbol, timeframe, since_ms, until_ms, workers=4, rate=DEFAULT_RATE,
+                   burst=DEFAULT_BURST, page_limit=PAGE_LIMIT, max_retries=5, retry_budget=50, backoff=0.5,
+                   bucket=None):
+    """[since_ms, until_ms] 캔들을 창 단위로 병렬로 받아 시간순으로 이어 붙입니다.
+
+    covered 는 실제로 받은 창들을 병합한 [start, end] 구간 목록이고, failed 는 재시도 후에도
+    받지 못한 창입니다. 실패한 창이 있어도 나머지 창의 캔들은 돌려 줍니다. workers 는 실제로 쓴 스레드 수
+    (첫 페이지 지연이 1/rate 보다 짧으면 1)입니다.
+    """
+    started = time.perf_counter()
+    step_ms = timeframe_ms(timeframe)
+    windows = page_windows(since_ms, until_ms, step_ms, page_limit)
+    bucket = bucket or TokenBucket(rate, burst)
+    budget = RetryBudget(retry_budget)
+
+    def fetch(window):
+        try:
+            return window, _fetch_window(exchange, symbol, timeframe, window, page_limit, bucket, budget,
+                                         max_retries, backoff)
+        except ccxt.BaseError as e:
+            print(f"❌ 구간 다운로드 실패 ({window[0]} ~ {window[1]}): {type(e).__name__} {e}")
+            return window, None
+
+    # 첫 페이지를 받으면서 지연을 재고, 요청 간격(1/rate)보다 짧으면 나머지도 순서대로 받음
+    pages = []
+    if windows:
+        requested = time.perf_counter()
+        pages.append(fetch(windows[0]))
+        if time.perf_counter() - requested < 1 / bucket.rate:
+            workers = 1
+    workers = max(1, min(workers, len(windows) - 1)) if len(windows) > 1 else 1
+    if workers == 1:
+        pages.extend(fetch(window) for window in windows[1:])
+    else:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            pages.extend(pool.map(fetch, windows[1:]))
+
+    rows = {}
+    duplicates = 0
+    covered = []
+    failed = []
+    for window, page in pages:
+        if page is None:
+            failed.append(window)
+            continue
+        for row in page:
+            duplicates += row[0] in rows
+            rows[row[0]] = row
+        if covered and window[0] == covered[-1][1] + 1:
+            covered[-1][1] = window[1]
+        else:
+            covered.append([window[0], window[1]])
+
+    stitched = [rows[ts] for ts in sorted(rows)]
+    gaps = [(prev[0] + step_ms, row[0] - step_ms) for prev, row in zip(stitched, stitched[1:])
+            if row[0] - prev[0] != step_ms]
+    return DownloadResult(stitched, [tuple(span) for span in covered], failed, gaps, duplicates,
+                          len(windows) + budget.used, budget.used, time.perf_counter() - started, workers)
+
+
+# ───────────────────────────────
+# 로컬 검증용 모의 거래소
+#
+# 업비트 fetch_ohlcv 처럼 since 부터 limit 개를 돌려 주되, 요청마다 지연(latency)을 두고
+# 일정 비율로 네트워크 오류를 내며, 초당 요청 수가 한도를 넘으면 DDoSProtection 을 냅니다.
+# ───────────────────────────────
+class StubExchange:
+    def __init__(self, candles, latency=0.15, failure_rate=0.05, rate_limit=UPBIT_QUOTATION_RATE,
+                 empty_rate=0.001, seed=0):
+        self.step_ms = candles[1][0] - candles[0][0]
+        rng = random.Random(seed)
+        # 업비트처럼 거래가 없는 분봉은 만들지 않음
+        self.candles = {row[0]: row for row in candles if rng.random() >= empty_rate}
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.rate_limit = rate_limit
+        self.rateLimit = 50    # ccxt upbit 와 같은 값 (fetch_ohlcv_range 의 페이지 간 sleep, ms)
+        self.requests = 0
+        self.throttled = 0
+        self._rng = rng
+        self._recent = collections.deque()
+        self._lock = threading.Lock()
+
+    def fetch_ohlcv(self, symbol, timeframe='1m', since=None, limit=200):
+        with self._lock:
+            now = time.monotonic()
+            self.requests += 1
+            while self._recent and now - self._recent[0] >= 1.0:
+                self._recent.popleft()
+            self._recent.append(now)
+            if len(self._recent) > self.rate_limit:
+                self.throttled += 1
+                raise ccxt.DDoSProtection('too many requests')
+            fail = self._rng.random() < self.failure_rate
+        time.sleep(self.latency)
+        if fail:
+            raise ccxt.RequestTimeout('stub timeout')
+        first = -(-since // self.step_ms) * self.step_ms
+        return [self.candles[ts] for ts in range(first, since + limit * self.step_ms, self.step_ms)
+                if ts in self.candles]
+
+
+if __name__ == "__main__":
+    import backtest_bot
+    from benchmarks import synthetic_ohlcv
+
+    parser = argparse.ArgumentParser(description="모의 거래소로 순차 다운로드와 병렬 다운로드 비교")
+    parser.add_argument('--bars', type=int, default=20_000, help="1분봉 개수")
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--rate', type=float, default=DEFAULT_RATE,
+                        help=f"초당 요청 수 (기본: 업비트 한도 {UPBIT_QUOTATION_RATE}, 다른 봇과 나눠 쓰면 {SHARED_RATE:g})")
+    parser.add_argument('--burst', type=int, default=DEFAULT_BURST, help="토큰 버킷 최대 연속 요청 수")
+    parser.add_argument('--latency', type=float, default=0.15)
+    parser.add_argument('--failure-rate', type=float, default=0.05)
+    args = parser.parse_args()
+
+    candles = synthetic_ohlcv(args.bars, duplicate_rate=0).tolist()
+    candles = [[int(row[0]), *row[1:]] for row in candles]
+    since_ms, until_ms = candles[0][0], candles[-1][0]
+
+    # 같은 조건(지연·오류율)에서 비교 — 순차 루프는 오류마다 5초 쉬고 같은 페이지를 다시 요청합니다
+    serial_stub = StubExchange(candles, latency=args.latency, failure_rate=args.failure_rate)
+    started = time.perf_counter()
+    expected, _ = backtest_bot.fetch_ohlcv_range(serial_stub, 'BTC/KRW', '1m', since_ms, until_ms)
+    serial_elapsed = time.perf_counter() - started
+
+    stub = StubExchange(candles, latency=args.latency, failure_rate=args.failure_rate)
+    result = download_ohlcv(stub, 'BTC/KRW', '1m', since_ms, until_ms, workers=args.workers, rate=args.rate,
+                            burst=args.burst)
+    same = result.rows == expected and not result.failed
+    print(f"순차: {serial_elapsed:.2f}초 ({serial_stub.requests}회) | 병렬(스레드 {result.workers}): {result.elapsed:.2f}초 "
+          f"({stub.requests}회, 재시도 {result.retries}, 한도 초과 {stub.throttled}) | "
+          f"{serial_elapsed / max(result.elapsed, 1e-9):.1f}배")
+    print(f"빈 구간 {len(result.gaps)}개 | 중복 {result.duplicates}개 | 결과 일치 여부: {'✅ 일치' if same else '❌ 불일치'}")
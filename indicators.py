@@ -0,0 +1,355 @@
+import math
+import time
+from collections import deque, namedtuple
+
+# ───────────────────────────────
+# 증분(O(1)/봉) 지표 엔진
+#
+# 라이브 봇들은 매 루프마다 DataFrame 을 새로 만들고 ta 지표를 전체 구간에 대해
+# 다시 계산했습니다. 여기 지표들은 Wilder 평활 상태와 이동 합계를 유지하므로
+#   • update(bar): 마감된 봉을 반영 (상태 변경)
+#   • peek(bar):   진행 중인 봉을 반영했을 때의 값만 계산 (상태 유지)
+# 모두 봉 하나당 상수 시간입니다. bar 는 ccxt OHLCV 행 [ts, open, high, low, close, volume] 입니다.
+# 값은 같은 입력에 대한 ta 라이브러리 결과와 부동소수 오차 범위에서 일치합니다.
+# snapshot()/restore() 는 내부 상태를 JSON 으로 옮길 수 있는 dict 로 주고받습니다 (재시작 복원용).
+# ───────────────────────────────
+
+TS, OPEN, HIGH, LOW, CLOSE, VOLUME = range(6)
+
+DMI = namedtuple('DMI', ['adx', 'adx_pos', 'adx_neg'])
+
+
+class SMA:
+    """단순 이동평균 (ta.trend.SMAIndicator 와 동일, 기간 미달 시 NaN)."""
+
+    def __init__(self, window):
+        self.window = window
+        self._values = deque()
+        self._sum = 0.0
+        self._updates = 0
+
+    def update(self, bar):
+        value = float(bar[CLOSE])
+        self._values.append(value)
+        self._sum += value
+        if len(self._values) > self.window:
+            self._sum -= self._values.popleft()
+        # 누적 오차가 쌓이지 않도록 window 봉마다 합계를 다시 계산 (분할 상환 O(1))
+        self._updates += 1
+        if self._updates % self.window == 0:
+            self._sum = math.fsum(self._values)
+        return self.value
+
+    def peek(self, bar):
+        count = len(self._values) + 1
+        if count < self.window:
+            return math.nan
+        total = self._sum + float(bar[CLOSE])
+        if count > self.window:
+            total -= self._values[0]
+        return total / self.window
+
+    def snapshot(self):
+        return {'values': list(self._values), 'sum': self._sum, 'updates': self._updates}
+
+    def restore(self, state):
+        self._values = deque(state['values'])
+        self._sum = state['sum']
+        self._updates = state['updates']
+
+    @property
+    def value(self):
+        if len(self._values) < self.window:
+            return math.nan
+        return self._sum / self.window
+
+
+class RSI:
+    """Wilder RSI (ta.momentum.RSIIndicator 와 동일한 ewm(adjust=False) 평활)."""
+
+    def __init__(self, window=14):
+        self.window = window
+        self._alpha = 1 / window
+        self._prev_close = None
+        self._avg_up = 0.0
+        self._avg_down = 0.0
+        self._count = 0
+
+    def _step(self, bar):
+        close = float(bar[CLOSE])
+        if self._prev_close is None:
+            # ta 는 첫 봉의 변화량(NaN)을 0 으로 채워 평활을 시작합니다.
+            up = down = 0.0
+        else:
+            diff = close - self._prev_close
+            up = diff if diff > 0 else 0.0
+            down = -diff if diff < 0 else 0.0
+        if self._count == 0:
+            avg_up, avg_down = up, down
+        else:
+            avg_up = (1 - self._alpha) * self._avg_up + self._alpha * up
+            avg_down = (1 - self._alpha) * self._avg_down + self._alpha * down
+        return close, avg_up, avg_down, self._count + 1
+
+    def _rsi(self, avg_up, avg_down, count):
+        if count < self.window:
+            return math.nan
+        if avg_down == 0:
+            return 100.0
+        return 100 - (100 / (1 + avg_up / avg_down))
+
+    def update(self, bar):
+        self._prev_close, self._avg_up, self._avg_down, self._count = self._step(bar)
+        return self.value
+
+    def peek(self, bar):
+        _, avg_up, avg_down, count = self._step(bar)
+        return self._rsi(avg_up, avg_down, count)
+
+    def snapshot(self):
+        return {'prev_close': self._prev_close, 'avg_up': self._avg_up,
+                'avg_down': self._avg_down, 'count': self._count}
+
+    def restore(self, state):
+        self._prev_close = state['prev_close']
+        self._avg_up = state['avg_up']
+        self._avg_down = state['avg_down']
+        self._count = state['count']
+
+    @property
+    def value(self):
+        return self._rsi(self._avg_up, self._avg_down, self._count)
+
+
+class ADX:
+    """ADX 와 +DI/-DI (ta.trend.ADXIndicator 의 adx/adx_pos/adx_neg 와 동일한 시점 정렬)."""
+
+    def __init__(self, window=14):
+        self.window = window
+        self._prev = None        # 직전 봉 (high, low, close)
+        self._index = -1         # 마지막으로 반영한 봉 번호 (0 부터)
+        self._tr = 0.0           # Wilder 평활 합계: TR, +DM, -DM
+        self._pos = 0.0
+        self._neg = 0.0
+        self._dx_sum = 0.0       # 첫 ADX 값(= DX 평균)을 위한 워밍업 합계
+        self._adx = 0.0
+        self._di_pos = 0.0
+        self._di_neg = 0.0
+
+    def _step(self, bar):
+        w = self.window
+        high, low, close = float(bar[HIGH]), float(bar[LOW]), float(bar[CLOSE])
+        index = self._index + 1
+        tr, pos, neg = self._tr, self._pos, self._neg
+        dx_sum, adx = self._dx_sum, self._adx
+        di_pos = di_neg = 0.0
+
+        if self._prev is not None:
+            prev_high, prev_low, prev_close = self._prev
+            true_range = max(high, prev_close) - min(low, prev_close)
+            diff_up = high - prev_high
+            diff_down = prev_low - low
+            plus_dm = diff_up if (diff_up > diff_down and diff_up > 0) else 0.0
+            minus_dm = diff_down if (diff_down > diff_up and diff_down > 0) else 0.0
+            if index <= w:
+                tr, pos, neg = tr + true_range, pos + plus_dm, neg + minus_dm
+            else:
+                tr = tr - (tr / w) + true_range
+                pos = pos - (pos / w) + plus_dm
+                neg = neg - (neg / w) + minus_dm
+
+        if index >= w:
+            plus_di = 100 * (pos / tr) if tr != 0 else 0.0
+            minus_di = 100 * (neg / tr) if tr != 0 else 0.0
+            di_total = plus_di + minus_di
+            dx = 100 * abs((plus_di - minus_di) / di_total) if di_total != 0 else 0.0
+            if index > w:
+                # ta 는 평활 시작 봉(index == w)의 DI 를 0 으로 둡니다.
+                di_pos, di_neg = plus_di, minus_di
+            if index < 2 * w - 1:
+                dx_sum += dx
+            elif index == 2 * w - 1:
+                adx = (dx_sum + dx) / w
+            else:
+                adx = ((adx * (w - 1)) + dx) / w
+
+        return (high, low, close), index, tr, pos, neg, dx_sum, adx, di_pos, di_neg
+
+    def update(self, bar):
+        (self._prev, self._index, self._tr, self._pos, self._neg,
+         self._dx_sum, self._adx, self._di_pos, self._di_neg) = self._step(bar)
+        return self.value
+
+    def peek(self, bar):
+        _, _, _, _, _, _, adx, di_pos, di_neg = self._step(bar)
+        return DMI(adx, di_pos, di_neg)
+
+    def snapshot(self):
+        return {'prev': self._prev, 'index': self._index, 'tr': self._tr, 'pos': self._pos, 'neg': self._neg,
+                'dx_sum': self._dx_sum, 'adx': self._adx, 'di_pos': self._di_pos, 'di_neg': self._di_neg}
+
+    def restore(self, state):
+        self._prev = tuple(state['prev']) if state['prev'] is not None else None
+        self._index = state['index']
+        self._tr, self._pos, self._neg = state['tr'], state['pos'], state['neg']
+        self._dx_sum, self._adx = state['dx_sum'], state['adx']
+        self._di_pos, self._di_neg = state['di_pos'], state['di_neg']
+
+    @property
+    def value(self):
+        return DMI(self._adx, self._di_pos, self._di_neg)
+
+
+# ───────────────────────────────
+# 라이브 봇용 캔들 동기화
+# ───────────────────────────────
+class IndicatorFeed:
+    """거래소 OHLCV 와 증분 지표를 동기화합니다.
+
+    처음(또는 캔들이 끊겼을 때)에는 warmup 개수만큼 받아 지표를 채우고,
+    이후에는 마지막으로 본 봉 이후의 봉만 받아 새로 마감된 봉만 update, 진행 중인 마지막 봉은 peek 합니다.
+    snapshot()/restore() 로 재시작 후에도 워밍업 없이 놓친 봉만 받아 이어 갑니다.
+    """
+
+    def __init__(self, indicators, warmup, recent_limit=3):
+        self.indicators = indicators
+        self.warmup = warmup
+        self.recent_limit = recent_limit
+        self.previous = {}
+        self.last_bar = None
+        self._last_closed_ts = None
+        self._bar_ms = None           # 봉 길이 (restore 직후 last_bar 가 없을 때 사용)
+
+    def reset(self):
+        self.indicators = {name: type(ind)(ind.window) for name, ind in self.indicators.items()}
+        self.previous = {}
+        self.last_bar = None
+        self._last_closed_ts = None
+        self._bar_ms = None
+
+    def refresh(self, fetch):
+        # fetch(limit) -> ccxt OHLCV 리스트
+        if self._last_closed_ts is None:
+            return self._sync(fetch(self.warmup))
+        ohlcv = fetch(self._catch_up_limit())
+        if not ohlcv or ohlcv[0][TS] > self._last_closed_ts:
+            # 겹치는 봉이 없으면 중간 봉이 빠졌을 수 있으므로 처음부터 다시 채웁니다.
+            self.reset()
+            return self._sync(fetch(self.warmup))
+        return self._sync(ohlcv)
+
+    def _bar_duration(self):
+        if self.last_bar is not None and self._last_closed_ts is not None:
+            return self.last_bar[TS] - self._last_closed_ts
+        return self._bar_ms
+
+    def _catch_up_limit(self):
+        # 마지막 마감 봉 이후 지나간 봉 수만큼만 받음 (재시작·장애 뒤에도 전체 워밍업 대신)
+        bar_ms = self._bar_duration()
+        if not bar_ms or bar_ms <= 0:
+            return self.recent_limit
+        missed = (int(time.time() * 1000) - self._last_closed_ts) // bar_ms
+        return int(min(self.warmup, max(self.recent_limit, missed + 1)))
+
+    def snapshot(self):
+        # 마감된 봉까지의 상태만 담음 (진행 중인 봉은 재시작 후 다시 받으므로 봉 하나에 한 번만 바뀜)
+        return {
+            'indicators': {name: {'type': type(ind).__name__, 'window': ind.window, 'state': ind.snapshot()}
+                           for name, ind in self.indicators.items()},
+            'last_closed_ts': self._last_closed_ts,
+            'bar_ms': self._bar_duration(),
+        }
+
+    def restore(self, snapshot):
+        """snapshot() 결과로 지표 상태를 되돌립니다. 지표 구성(이름·종류·기간)이 다르면 False."""
+        if not snapshot or snapshot.get('last_closed_ts') is None:
+            return False
+        saved = snapshot.get('indicators', {})
+        if saved.keys() != self.indicators.keys():
+            return False
+        for name, ind in self.indicators.items():
+            if saved[name]['type'] != type(ind).__name__ or saved[name]['window'] != ind.window:
+                return False
+        for name, ind in self.indicators.items():
+            ind.restore(saved[name]['state'])
+        self._last_closed_ts = snapshot['last_closed_ts']
+        self._bar_ms = snapshot.get('bar_ms')
+        self.last_bar = None
+        self.previous = {name: ind.value for name, ind in self.indicators.items()}
+        return True
+
+    def _sync(self, ohlcv):
+        if not ohlcv:
+            return {name: ind.value for name, ind in self.indicators.items()}
+        for bar in ohlcv[:-1]:
+            if self._last_closed_ts is not None and bar[TS] <= self._last_closed_ts:
+                continue
+            for indicator in self.indicators.values():
+                indicator.update(bar)
+            self._last_closed_ts = bar[TS]
+        self.previous = {name: ind.value for name, ind in self.indicators.items()}
+        self.last_bar = ohlcv[-1]
+        return {name: ind.peek(ohlcv[-1]) for name, ind in self.indicators.items()}
+
+    def peek_price(self, price):
+        # 진행 중인 봉의 종가를 실시간 체결가로 바꿔서 지표를 다시 peek (웹소켓 피드용)
+        ts, open_, high, low, _, volume = self.last_bar[:6]
+        bar = [ts, open_, max(high, price), min(low, price), price, volume]
+        return {name: ind.peek(bar) for name, ind in self.indicators.items()}
+
+
+# ───────────────────────────────
+# ta 라이브러리 대비 정확도·속도 비교
+# ───────────────────────────────
+def benchmark(bars=5000, window_bars=210, seed=42):
+    import numpy as np
+    import pandas as pd
+    import ta
+
+    rng = np.random.default_rng(seed)
+    close = np.round(50_000_000 * np.exp(np.cumsum(rng.normal(0, 0.01, bars))))
+    open_ = np.r_[close[0], close[:-1]]
+    high = np.round(np.maximum(open_, close) * (1 + rng.uniform(0, 0.01, bars)))
+    low = np.round(np.minimum(open_, close) * (1 - rng.uniform(0, 0.01, bars)))
+    rows = [[i * 3_600_000, o, h, l, c, 1.0] for i, (o, h, l, c) in enumerate(zip(open_, high, low, close))]
+    df = pd.DataFrame(rows, columns=['ts', 'open', 'high', 'low', 'close', 'vol'])
+
+    # 정확도: 전체 구간 ta 결과와 비교
+    sma, rsi, adx = SMA(50), RSI(14), ADX(14)
+    inc = np.array([(sma.update(r), rsi.update(r), *adx.update(r)) for r in rows])
+    ref = np.column_stack([
+        ta.trend.SMAIndicator(df['close'], window=50).sma_indicator(),
+        ta.momentum.RSIIndicator(df['close'], window=14).rsi(),
+        ta.trend.ADXIndicator(df['high'], df['low'], df['close'], window=14).adx(),
+        ta.trend.ADXIndicator(df['high'], df['low'], df['close'], window=14).adx_pos(),
+        ta.trend.ADXIndicator(df['high'], df['low'], df['close'], window=14).adx_neg(),
+    ])
+    valid = ~np.isnan(ref)
+    max_err = np.max(np.abs(inc[valid] - ref[valid]) / np.maximum(np.abs(ref[valid]), 1.0))
+    print(f"최대 상대 오차 (SMA/RSI/ADX/+DI/-DI): {max_err:.2e}")
+
+    # 속도: 봇처럼 매 봉마다 window_bars 구간을 ta 로 재계산 vs 증분 update+peek
+    sample = range(window_bars, min(bars, window_bars + 200))
+    started = time.perf_counter()
+    for i in sample:
+        window_df = df.iloc[i - window_bars:i + 1]
+        ta.momentum.RSIIndicator(window_df['close'], window=14).rsi().iloc[-1]
+        ta.trend.SMAIndicator(window_df['close'], window=50).sma_indicator().iloc[-1]
+        ta.trend.ADXIndicator(window_df['high'], window_df['low'], window_df['close'], window=14).adx().iloc[-1]
+    ta_per_bar = (time.perf_counter() - started) / len(sample)
+
+    sma, rsi, adx = SMA(50), RSI(14), ADX(14)
+    started = time.perf_counter()
+    for r in rows:
+        for indicator in (sma, rsi, adx):
+            indicator.peek(r)
+            indicator.update(r)
+    inc_per_bar = (time.perf_counter() - started) / bars
+
+    print(f"ta 재계산 ({window_bars}봉 구간): {ta_per_bar * 1e6:,.1f}µs/봉")
+    print(f"증분 update+peek: {inc_per_bar * 1e6:,.1f}µs/봉 | {ta_per_bar / inc_per_bar:,.0f}배")
+    return max_err
+
+
+if __name__ == "__main__":
+    benchmark()
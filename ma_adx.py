@@ -1,10 +1,12 @@
 import ccxt
 import os
 import time
-import requests
-import pandas as pd
-import ta
 from dotenv import load_dotenv
+from notifier import TelegramNotifier
+from indicators import IndicatorFeed, SMA, ADX, CLOSE
+from request_scheduler import schedule
+from metrics import BotMetrics
+from state_store import StateStore
 
 # 1. 환경변수 로드 및 검증
 load_dotenv()
@@ -21,15 +23,20 @@ upbit = ccxt.upbit({
     'apiKey': api_key,
     'secret': secret_key,
 })
+# 같은 계정으로 도는 다른 봇들과 업비트 요청 한도를 나눠 씀 (주문 요청 우선)
+schedule(upbit, api_key)
+# 루프 단계별 지연 시간 계측 (BOT_METRICS_PORT / BOT_METRICS_DIR 로 내보내기)
+metrics = BotMetrics.from_env('ma_adx')
+metrics.instrument(upbit)
 upbit.load_markets()
 
 # 3. 텔레그램 전송 함수
+notifier = TelegramNotifier(telegram_token, telegram_chat_id)
+
 def send_telegram(message):
-    try:
-        url = f"https://api.telegram.org/bot{telegram_token}/sendMessage"
-        requests.post(url, data={"chat_id": telegram_chat_id, "text": message})
-    except Exception as e:
-        print("❌ 텔레그램 전송 실패:", e)
+    # 큐에 넣기만 하고 바로 반환 (전송은 백그라운드 스레드)
+    with metrics.span('telegram'):
+        notifier.send(message)
 
 # 4. 전략 파라미터
 MA_SHORT = 20
@@ -43,27 +50,36 @@ TRADE_FEE_RATE = 0.0005
 symbol = 'BTC/KRW'
 timeframe = '1d'
 ohlcv_limit = 100
-last_buy_price = None
+
+# 일봉 지표 (마감된 봉은 증분 반영, 진행 중인 오늘 봉은 peek)
+feed = IndicatorFeed(
+    {'ma_short': SMA(MA_SHORT), 'ma_long': SMA(MA_LONG), 'dmi': ADX(ADX_WINDOW)},
+    warmup=ohlcv_limit,
+)
+
+# 상태 스냅샷: 매수 가격(손절 기준)과 지표 상태를 바뀔 때마다 저장하고, 재시작하면 이어서 사용
+state = StateStore.from_env('ma_adx')
+saved = state.load()
+last_buy_price = saved.get('last_buy_price')
+if feed.restore(saved.get('feed')):
+    print(f"♻️ 저장된 상태 복원: 매수 가격 {last_buy_price or 0:,.0f}원 (놓친 일봉만 받아 이어 감)")
+
+def save_state():
+    state.save(last_buy_price=last_buy_price, feed=feed.snapshot())
 
 print("🚀 자동매매 봇 시작! (일봉)")
 send_telegram("🤖 비트코인 자동매매 봇(ADX 기반, 일봉) 시작되었습니다.")
 
 # 5. 메인 루프
 while True:
+    metrics.loop_tick()
     try:
-        df = pd.DataFrame(
-            upbit.fetch_ohlcv(symbol, timeframe=timeframe, limit=ohlcv_limit),
-            columns=['ts', 'open', 'high', 'low', 'close', 'vol']
-        )
-
-        df['ma_short'] = df['close'].rolling(MA_SHORT).mean()
-        df['ma_long'] = df['close'].rolling(MA_LONG).mean()
-        adx = ta.trend.ADXIndicator(df['high'], df['low'], df['close'], window=ADX_WINDOW)
-        df['adx'] = adx.adx()
-        df.dropna(inplace=True)
-
-        prev, curr = df.iloc[-2], df.iloc[-1]
-        today_close = curr['close']
+        with metrics.span('indicators'):
+            curr = feed.refresh(lambda limit: upbit.fetch_ohlcv(symbol, timeframe=timeframe, limit=limit))
+        save_state()
+        prev = feed.previous
+        curr['adx'] = curr['dmi'].adx
+        today_close = feed.last_bar[CLOSE]
         today_str = time.strftime('%Y-%m-%d')
 
         balances = upbit.fetch_balance()
@@ -81,6 +97,7 @@ while True:
                     avg_price = order['cost'] / order['filled'] if order['filled'] > 0 else 0
                     send_telegram(f"⚠️ 손절 매도\n가격: {avg_price:.0f}원\n수량: {order['amount']} BTC")
                     last_buy_price = None
+                    save_state()
                 except ccxt.NetworkError as e:
                     print("❌ 네트워크 오류:", e)
                     send_telegram(f"❌ 손절 중 네트워크 오류 발생:\n{e}")
@@ -101,6 +118,7 @@ while True:
                 avg_price = order['cost'] / order['filled'] if order['filled'] > 0 else 0
                 send_telegram(f"💰 매수 완료\n가격: {avg_price:.0f}원\n수량: {order['amount']} BTC")
                 last_buy_price = avg_price
+                save_state()
             except ccxt.NetworkError as e:
                 print("❌ 네트워크 오류:", e)
                 send_telegram(f"❌ 매수 중 네트워크 오류 발생:\n{e}")
@@ -120,6 +138,7 @@ while True:
                 avg_price = order['cost'] / order['filled'] if order['filled'] > 0 else 0
                 send_telegram(f"📤 매도 완료\n가격: {avg_price:.0f}원\n수량: {order['amount']} BTC")
                 last_buy_price = None
+                save_state()
             except ccxt.NetworkError as e:
                 print("❌ 네트워크 오류:", e)
                 send_telegram(f"❌ 매도 중 네트워크 오류 발생:\n{e}")
@@ -131,7 +150,8 @@ while True:
                 send_telegram(f"❌ 매도 중 알 수 없는 오류 발생:\n{e}")
 
     except Exception as e:
+        metrics.loop_error(e)
         print("❌ 주요 루프 오류 발생:", e)
         send_telegram(f"❌ 루프 오류 발생:\n{str(e)}")
 
-    time.sleep(86400)  # 하루 1회 실행
+    metrics.sleep(86400)  # 하루 1회 실행
@@ -1,10 +1,12 @@
 import ccxt
 import os
 import time
-import requests
-import pandas as pd
-import ta
 from dotenv import load_dotenv
+from notifier import TelegramNotifier
+from indicators import IndicatorFeed, SMA, ADX, CLOSE
+from request_scheduler import schedule
+from metrics import BotMetrics
+from state_store import StateStore
 
 # ───────────────────────────────
 # 1. 환경변수 로드 및 검증
@@ -25,18 +27,22 @@ upbit = ccxt.upbit({
     'apiKey': api_key,
     'secret': secret_key,
 })
+# 같은 계정으로 도는 다른 봇들과 업비트 요청 한도를 나눠 씀 (주문 요청 우선)
+schedule(upbit, api_key)
+# 루프 단계별 지연 시간 계측 (BOT_METRICS_PORT / BOT_METRICS_DIR 로 내보내기)
+metrics = BotMetrics.from_env('ma_mdi')
+metrics.instrument(upbit)
 upbit.load_markets()
 
 # ───────────────────────────────
 # 3. Telegram 전송 함수
 # ───────────────────────────────
+notifier = TelegramNotifier(telegram_token, telegram_chat_id)
+
 def send_telegram(message: str):
-    try:
-        url = f"https://api.telegram.org/bot{telegram_token}/sendMessage"
-        payload = {"chat_id": telegram_chat_id, "text": message}
-        requests.post(url, data=payload)
-    except Exception as e:
-        print("❌ 텔레그램 전송 실패:", e)
+    # 큐에 넣기만 하고 바로 반환 (전송은 백그라운드 스레드)
+    with metrics.span('telegram'):
+        notifier.send(message)
 
 # ───────────────────────────────
 # 4. 전략 파라미터
@@ -54,7 +60,21 @@ symbol          = 'BTC/KRW'
 timeframe       = '1d'    # 일봉
 ohlcv_limit     = 100     # 과거 100일치 데이터 확보
 
-last_buy_price = None
+# 일봉 지표 (마감된 봉은 증분 반영, 진행 중인 오늘 봉은 peek)
+feed = IndicatorFeed(
+    {'ma_short': SMA(MA_SHORT), 'ma_long': SMA(MA_LONG), 'dmi': ADX(MDI_WINDOW)},
+    warmup=ohlcv_limit,
+)
+
+# 상태 스냅샷: 매수 가격(손절 기준)과 지표 상태를 바뀔 때마다 저장하고, 재시작하면 이어서 사용
+state = StateStore.from_env('ma_mdi')
+saved = state.load()
+last_buy_price = saved.get('last_buy_price')
+if feed.restore(saved.get('feed')):
+    print(f"♻️ 저장된 상태 복원: 매수 가격 {last_buy_price or 0:,.0f}원 (놓친 일봉만 받아 이어 감)")
+
+def save_state():
+    state.save(last_buy_price=last_buy_price, feed=feed.snapshot())
 
 print("🚀 자동매매 봇 시작! (일봉, 24시간 주기)")
 print(f"    • MA{MA_SHORT} vs MA{MA_LONG} 골든/데드 크로스")
@@ -68,23 +88,17 @@ send_telegram("🤖 비트코인 자동매매 봇(일봉, 하루 1회) 시작되
 # 5. 메인 루프 (24시간마다 실행)
 # ───────────────────────────────
 while True:
+    metrics.loop_tick()
     try:
-        # 1) 일봉 데이터 조회
-        ohlcv = upbit.fetch_ohlcv(symbol, timeframe=timeframe, limit=ohlcv_limit)
-        df = pd.DataFrame(ohlcv, columns=['ts','open','high','low','close','vol'])
-
-        # 2) 지표 계산
-        df['ma_short'] = df['close'].rolling(MA_SHORT).mean()
-        df['ma_long']  = df['close'].rolling(MA_LONG).mean()
-        adx = ta.trend.ADXIndicator(df['high'], df['low'], df['close'], window=MDI_WINDOW)
-        df['mdi'] = adx.adx_neg()
-        df.dropna(inplace=True)
-
-        prev = df.iloc[-2]
-        curr = df.iloc[-1]
+        # 1) 일봉 데이터 조회 및 지표 갱신 (새로 마감된 봉만 반영)
+        with metrics.span('indicators'):
+            curr = feed.refresh(lambda limit: upbit.fetch_ohlcv(symbol, timeframe=timeframe, limit=limit))
+        save_state()
+        prev = feed.previous
+        curr['mdi'] = curr['dmi'].adx_neg
 
         # 3) 오늘 종가 및 잔고 조회
-        today_close  = curr['close']
+        today_close  = feed.last_bar[CLOSE]
         today_str    = time.strftime('%Y-%m-%d')
         balances     = upbit.fetch_balance()
         krw_balance  = balances['total'].get('KRW', 0)
@@ -100,6 +114,7 @@ while True:
                     order = upbit.create_market_sell_order(symbol, round(btc_balance, 8))
                     send_telegram(f"⚠️ 손절 매도 완료\n가격: {order['price']:.0f}원\n수량: {order['amount']:.8f} BTC\n체결액: {order['cost']:.0f}원")
                     last_buy_price = None
+                    save_state()
                 except ccxt.NetworkError as e:
                     print(f"네트워크 오류 발생: {e}")
                     send_telegram(f"❌ 손절 매도 중 네트워크 오류 발생: {e}")
@@ -125,6 +140,7 @@ while True:
                 order = upbit.create_market_buy_order(symbol, round(buy_amt_btc, 8))
                 send_telegram(f"💰 매수 완료\n가격: {order['price']:.0f}원\n수량: {order['amount']:.8f} BTC\n체결액: {order['cost']:.0f}원")
                 last_buy_price = order['price'] # 실제 체결된 가격을 last_buy_price로 저장
+                save_state()
             except ccxt.NetworkError as e:
                 print(f"네트워크 오류 발생: {e}")
                 send_telegram(f"❌ 매수 중 네트워크 오류 발생: {e}")
@@ -147,6 +163,7 @@ while True:
                 order = upbit.create_market_sell_order(symbol, round(btc_balance, 8))
                 send_telegram(f"📤 매도 완료\n가격: {order['price']:.0f}원\n수량: {order['amount']:.8f} BTC\n체결액: {order['cost']:.0f}원")
                 last_buy_price = None
+                save_state()
             except ccxt.NetworkError as e:
                 print(f"네트워크 오류 발생: {e}")
                 send_telegram(f"❌ 매도 중 네트워크 오류 발생: {e}")
@@ -158,8 +175,9 @@ while True:
                 send_telegram(f"❌ 매도 중 알 수 없는 오류 발생: {e}")
 
     except Exception as e:
+        metrics.loop_error(e)
         print("❌ 주요 루프 오류 발생:", e)
         send_telegram(f"❌ 자동매매 주요 루프 오류:\n{str(e)}")
 
     # 24시간 대기 (86400초)
-    time.sleep(86400)
\ No newline at end of file
+    metrics.sleep(86400)
\ No newline at end of file
@@ -0,0 +1,298 @@
+import argparse
+import calendar
+import json
+import os
+import threading
+import time
+import uuid
+from collections import deque
+
+from websockets.exceptions import ConnectionClosed
+from websockets.sync.client import connect
+from websockets.sync.server import serve
+
+# ───────────────────────────────
+# 업비트 웹소켓 시세 피드
+#
+# 라이브 봇들은 1분마다 REST fetch_ticker 를 호출했기 때문에 손절이 최대 1분 늦었습니다.
+# 이 피드는 백그라운드 스레드에서 ticker/trade(/candle) 스트림을 받아
+#   • 체결마다 최신 가격을 갱신하고 등록된 콜백을 호출하며
+#   • 연결이 끊기면 지수 백오프로 재연결한 뒤, 끊긴 동안의 체결을 REST 로 보충합니다.
+# 오프라인 테스트는 ReplayServer 로 녹화한 메시지를 재생하고 UPBIT_WS_URL 로 연결합니다.
+# ───────────────────────────────
+
+UPBIT_WS_URL = os.getenv('UPBIT_WS_URL', 'wss://api.upbit.com/websocket/v1')
+
+
+def market_code(symbol):
+    # 'BTC/KRW' → 'KRW-BTC'
+    base, quote = symbol.split('/')
+    return f"{quote}-{base}"
+
+
+def normalize_trade(message):
+    # 웹소켓 trade 메시지를 ccxt fetch_trades 와 같은 형태로 변환
+    return {
+        'id': str(message['sequential_id']),
+        'timestamp': message['trade_timestamp'],
+        'price': message['trade_price'],
+        'amount': message['trade_volume'],
+        'side': 'buy' if message.get('ask_bid') == 'BID' else 'sell',
+        'source': 'ws',
+    }
+
+
+def normalize_candle(message):
+    # 웹소켓 candle 메시지를 ccxt OHLCV 행으로 변환
+    ts = calendar.timegm(time.strptime(message['candle_date_time_utc'], '%Y-%m-%dT%H:%M:%S')) * 1000
+    return [ts, message['opening_price'], message['high_price'], message['low_price'],
+            message['trade_price'], message['candle_acc_trade_volume']]
+
+
+class MarketFeed:
+    def __init__(self, symbol='BTC/KRW', rest=None, url=UPBIT_WS_URL, candle_type=None,
+                 max_backoff=30, recent_ids=5000):
+        self.symbol = symbol
+        self.code = market_code(symbol)
+        self.rest = rest                      # REST 보충용 ccxt 거래소 객체 (없으면 보충 생략)
+        self.url = url
+        self.candle_type = candle_type        # 예: 'candle.1m' (업비트 웹소켓 캔들)
+        self.max_backoff = max_backoff
+
+        self.last_price = None
+        self.last_trade = None
+        self.last_candle = None
+        self.reconnects = 0
+        self.connected = False
+
+        self._callbacks = []
+        self._seen_ids = deque(maxlen=recent_ids)
+        self._seen_set = set()
+        self._seq = 0
+        self._consumed_seq = 0
+        self._cond = threading.Condition()
+        self._stop = threading.Event()
+        self._thread = None
+
+    # ── 시작/종료 ──
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name=f"market-feed-{self.code}", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+
+    def subscribe(self, callback):
+        # callback(event, data): event 는 'trade' | 'ticker' | 'candle'
+        self._callbacks.append(callback)
+
+    # ── 봇 루프에서 사용 ──
+    def wait(self, timeout=60):
+        """새 체결이 들어올 때까지 기다린 뒤 최신 가격을 반환합니다.
+
+        그 사이 여러 체결이 쌓였으면 가장 최근 것만 봅니다. timeout 동안 체결이 없으면
+        REST 로 현재가를 확인해서 반환합니다 (REST 객체가 없으면 마지막 가격).
+        """
+        with self._cond:
+            self._cond.wait_for(lambda: self._seq > self._consumed_seq or self._stop.is_set(), timeout=timeout)
+            if self._seq > self._consumed_seq:
+                self._consumed_seq = self._seq
+                return self.last_price
+        if self.rest is not None:
+            ticker = self.rest.fetch_ticker(self.symbol)
+            self._set_price(ticker['last'])
+        return self.last_price
+
+    # ── 내부 처리 ──
+    def _set_price(self, price):
+        with self._cond:
+            self.last_price = price
+
+    def _emit(self, event, data):
+        for callback in self._callbacks:
+            try:
+                callback(event, data)
+            except Exception as e:
+                print(f"❌ 시세 콜백 오류: {e}")
+
+    def _on_trade(self, trade):
+        if trade['id'] in self._seen_set:
+            return
+        if len(self._seen_ids) == self._seen_ids.maxlen:
+            self._seen_set.discard(self._seen_ids[0])
+        self._seen_ids.append(trade['id'])
+        self._seen_set.add(trade['id'])
+
+        with self._cond:
+            self.last_trade = trade
+            self.last_price = trade['price']
+            self._seq += 1
+            self._cond.notify_all()
+        self._emit('trade', trade)
+
+    def _handle(self, raw):
+        message = json.loads(raw)
+        kind = message.get('type', '')
+        if message.get('code') != self.code:
+            return
+        if kind == 'trade':
+            self._on_trade(normalize_trade(message))
+        elif kind == 'ticker':
+            self._set_price(message['trade_price'])
+            self._emit('ticker', message)
+        elif kind.startswith('candle'):
+            self.last_candle = normalize_candle(message)
+            self._emit('candle', self.last_candle)
+
+    def _subscription(self):
+        request = [{'ticket': str(uuid.uuid4())},
+                   {'type': 'ticker', 'codes': [self.code]},
+                   {'type': 'trade', 'codes': [self.code]}]
+        if self.candle_type:
+            request.append({'type': self.candle_type, 'codes': [self.code]})
+        request.append({'format': 'DEFAULT'})
+        return json.dumps(request)
+
+    def _backfill(self):
+        # 연결이 끊긴 동안의 체결/캔들을 REST 로 보충 (이미 받은 체결은 id 로 걸러냄)
+        if self.rest is None or self.last_trade is None:
+            return
+        try:
+            trades = self.rest.fetch_trades(self.symbol, since=self.last_trade['timestamp'])
+            for trade in sorted(trades, key=lambda t: t['timestamp']):
+                self._on_trade({'id': str(trade['id']), 'timestamp': trade['timestamp'], 'price': trade['price'],
+                                'amount': trade['amount'], 'side': trade['side'], 'source': 'rest'})
+            if self.candle_type and self.last_candle is not None:
+                timeframe = self.candle_type.split('.')[1]
+                for candle in self.rest.fetch_ohlcv(self.symbol, timeframe, since=self.last_candle[0]):
+                    self.last_candle = candle
+                    self._emit('candle', candle)
+        except Exception as e:
+            print(f"❌ REST 보충 실패: {e}")
+
+    def _run(self):
+        backoff = 1
+        while not self._stop.is_set():
+            try:
+                with connect(self.url, open_timeout=10, ping_interval=30) as ws:
+                    ws.send(self._subscription())
+                    self.connected = True
+                    backoff = 1
+                    self._backfill()
+                    while not self._stop.is_set():
+                        try:
+                            raw = ws.recv(timeout=1)
+                        except TimeoutError:
+                            continue
+                        self._handle(raw)
+            except Exception as e:
+                if self._stop.is_set():
+                    break
+                print(f"❌ 웹소켓 연결 끊김: {e}. {backoff}초 후 재연결합니다.")
+            finally:
+                self.connected = False
+            if self._stop.wait(backoff):
+                break
+            self.reconnects += 1
+            backoff = min(backoff * 2, self.max_backoff)
+
+
+# ───────────────────────────────
+# 녹화 / 재생 (오프라인 테스트용 로컬 웹소켓 서버)
+# ───────────────────────────────
+def record(path, symbol='BTC/KRW', seconds=60, candle_type=None):
+    feed = MarketFeed(symbol, candle_type=candle_type)
+    with connect(feed.url) as ws, open(path, 'w', encoding='utf-8') as f:
+        ws.send(feed._subscription())
+        deadline = time.time() + seconds
+        while time.time() < deadline:
+            try:
+                raw = ws.recv(timeout=1)
+            except TimeoutError:
+                continue
+            f.write((raw.decode('utf-8') if isinstance(raw, bytes) else raw) + '\n')
+
+
+class ReplayServer:
+    """녹화한 메시지(JSON lines)를 업비트 웹소켓처럼 재생하는 로컬 서버.
+
+    클라이언트가 구독 메시지를 보내면 녹화 파일을 interval 간격으로 bytes 로 전송합니다.
+    drop_after 를 주면 첫 연결은 그만큼 보낸 뒤 끊고, 재연결 시에는 gap 개를 건너뛰고
+    이어서 보냅니다. 건너뛴 메시지는 REST 보충으로 채워져야 하는 구간입니다.
+    """
+
+    def __init__(self, messages, host='127.0.0.1', port=0, interval=0.0, drop_after=None, gap=0):
+        self.messages = messages
+        self.interval = interval
+        self.drop_after = drop_after
+        self.gap = gap
+        self.connections = 0
+        self._server = serve(self._handler, host, port)
+        self._thread = None
+
+    @classmethod
+    def from_file(cls, path, **kwargs):
+        with open(path, encoding='utf-8') as f:
+            return cls([line.strip() for line in f if line.strip()], **kwargs)
+
+    @property
+    def url(self):
+        host, port = self._server.socket.getsockname()[:2]
+        return f"ws://{host}:{port}"
+
+    def _handler(self, ws):
+        self.connections += 1
+        ws.recv()  # 구독 요청
+        messages = self.messages
+        if self.drop_after is not None:
+            if self.connections == 1:
+                messages = messages[:self.drop_after]
+            else:
+                messages = messages[self.drop_after + self.gap:]
+        for message in messages:
+            ws.send(message.encode('utf-8'))
+            if self.interval:
+                time.sleep(self.interval)
+        if self.drop_after is not None and self.connections == 1:
+            return  # 연결 끊기
+        try:
+            ws.recv()  # 클라이언트가 닫을 때까지 유지
+        except ConnectionClosed:
+            pass
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="업비트 웹소켓 메시지 녹화/재생")
+    sub = parser.add_subparsers(dest='command', required=True)
+    rec = sub.add_parser('record', help="실시간 메시지를 파일로 녹화")
+    rec.add_argument('--out', required=True)
+    rec.add_argument('--symbol', default='BTC/KRW')
+    rec.add_argument('--seconds', type=int, default=60)
+    rec.add_argument('--candle', default=None, help="예: candle.1m")
+    rep = sub.add_parser('replay', help="녹화 파일을 로컬 웹소켓 서버로 재생")
+    rep.add_argument('--file', required=True)
+    rep.add_argument('--port', type=int, default=8765)
+    rep.add_argument('--interval', type=float, default=0.05)
+    args = parser.parse_args()
+
+    if args.command == 'record':
+        record(args.out, args.symbol, args.seconds, args.candle)
+    else:
+        server = ReplayServer.from_file(args.file, port=args.port, interval=args.interval).start()
+        print(f"▶️ 재생 서버: {server.url} (봇 실행 시 UPBIT_WS_URL={server.url})")
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            server.stop()
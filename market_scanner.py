@@ -0,0 +1,372 @@
+import argparse
+import os
+import time
+
+import ccxt
+import numpy as np
+import pandas as pd
+from dotenv import load_dotenv
+
+from indicators import TS, OPEN, HIGH, LOW, CLOSE, VOLUME
+from notifier import TelegramNotifier
+from request_scheduler import schedule
+from resampler import bucket_start
+
+# ───────────────────────────────
+# KRW 전체 마켓 스캐너 (티커 일괄 조회 + 심볼 × 봉 행렬 지표)
+#
+# 전략들은 모두 BTC/KRW 하나만 보고, 100개가 넘는 KRW 마켓을 같은 방식(심볼마다 fetch_ticker/fetch_ohlcv)으로
+# 보면 시세 조회 한도(초당 10회)를 바로 넘깁니다. 스캐너는
+#   • 시작할 때만 심볼별 캔들(워밍업)을 받아 (심볼 × 봉) NumPy 행렬을 만들고
+#   • 이후에는 틱마다 fetch_tickers 한 번(업비트 ticker/all, KRW 전체)으로 진행 중인 봉을 갱신하며
+#   • RSI/SMA/ADX 를 모든 마켓에 대해 한 번에(심볼 축 벡터 연산) 계산해
+#   • rsi_final 매수 조건(RSI ≤ 35, MA50 > MA200)을 만족하는 마켓을 신호 강도순으로 보여 줍니다.
+# 마감된 봉까지의 지표 상태는 봉이 바뀔 때만 다시 계산하고, 틱마다는 진행 중인 봉 한 칸만 peek 합니다
+# (indicators.IndicatorFeed 와 같은 update/peek 구조). 지표 값은 indicators.py 의 RSI/SMA/ADX 와 같습니다.
+#
+# 티커로 만든 진행 중인 봉의 고가/저가는 조회 시점의 체결가로만 갱신되므로(틱 사이 체결은 빠짐) 일봉이 아니면
+# 근사입니다. RESYNC_PER_STEP 개 심볼씩 돌아가며 최근 봉 2개를 다시 받아 바로잡습니다.
+# 업비트는 거래가 없는 구간의 캔들을 만들지 않으므로, 행렬에서는 그런 봉을 직전 종가의 보합 봉으로 채웁니다.
+# ───────────────────────────────
+
+QUOTE = 'KRW'
+TIMEFRAME = '1h'
+
+# rsi_final.py 매수 조건
+RSI_PERIOD = 14
+RSI_BUY_THRESHOLD = 35
+MA_SHORT_PERIOD = 50
+MA_LONG_PERIOD = 200
+ADX_WINDOW = 14
+
+MIN_QUOTE_VOLUME = 1_000_000_000     # 24시간 거래대금 10억원 미만 마켓은 제외 (슬리피지)
+RESYNC_PER_STEP = 1
+SCAN_INTERVAL_SECONDS = 60
+ERROR_COOLDOWN_SECONDS = 10
+
+
+# ───────────────────────────────
+# 1. 심볼 축 벡터 지표 (상태 → 봉 한 칸씩 step)
+#
+# indicators.py 의 RSI/ADX _step 을 심볼 벡터로 옮긴 것입니다. 값이 NaN 인 칸(상장 전 봉)은 건너뛰므로
+# 심볼마다 자기 첫 봉부터 계산한 것과 같습니다.
+# ───────────────────────────────
+class MatrixRSI:
+    def __init__(self, window=RSI_PERIOD):
+        self.window = window
+        self._alpha = 1 / window
+
+    def initial(self, n):
+        return {'prev': np.full(n, np.nan), 'up': np.zeros(n), 'down': np.zeros(n), 'count': np.zeros(n, dtype=int)}
+
+    def step(self, state, high, low, close):
+        valid = ~np.isnan(close)
+        has_prev = valid & ~np.isnan(state['prev'])
+        diff = np.where(has_prev, close - state['prev'], 0.0)
+        up, down = np.maximum(diff, 0.0), np.maximum(-diff, 0.0)
+        first = state['count'] == 0
+        avg_up = np.where(first, up, (1 - self._alpha) * state['up'] + self._alpha * up)
+        avg_down = np.where(first, down, (1 - self._alpha) * state['down'] + self._alpha * down)
+        return {
+            'prev': np.where(valid, close, state['prev']),
+            'up': np.where(valid, avg_up, state['up']),
+            'down': np.where(valid, avg_down, state['down']),
+            'count': state['count'] + valid,
+        }
+
+    def value(self, state):
+        with np.errstate(divide='ignore', invalid='ignore'):
+            rsi = np.where(state['down'] == 0, 100.0, 100 - 100 / (1 + state['up'] / state['down']))
+        return np.where(state['count'] < self.window, np.nan, rsi)
+
+
+class MatrixADX:
+    def __init__(self, window=ADX_WINDOW):
+        self.window = window
+
+    def initial(self, n):
+        state = {key: np.zeros(n) for key in ('tr', 'pos', 'neg', 'dx_sum', 'adx', 'di_pos', 'di_neg')}
+        state.update(prev_high=np.full(n, np.nan), prev_low=np.full(n, np.nan), prev_close=np.full(n, np.nan),
+                     index=np.full(n, -1))
+        return state
+
+    def step(self, state, high, low, close):
+        w = self.window
+        valid = ~np.isnan(close)
+        index = state['index'] + 1
+        has_prev = valid & ~np.isnan(state['prev_close'])
+
+        true_range = np.maximum(high, state['prev_close']) - np.minimum(low, state['prev_close'])
+        diff_up = high - state['prev_high']
+        diff_down = state['prev_low'] - low
+        plus_dm = np.where((diff_up > diff_down) & (diff_up > 0), diff_up, 0.0)
+        minus_dm = np.where((diff_down > diff_up) & (diff_down > 0), diff_down, 0.0)
+        summing = index <= w
+        tr, pos, neg = state['tr'], state['pos'], state['neg']
+        tr = np.where(has_prev, np.where(summing, tr + true_range, tr - tr / w + true_range), tr)
+        pos = np.where(has_prev, np.where(summing, pos + plus_dm, pos - pos / w + plus_dm), pos)
+        neg = np.where(has_prev, np.where(summing, neg + minus_dm, neg - neg / w + minus_dm), neg)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            plus_di = np.where(tr != 0, 100 * pos / tr, 0.0)
+            minus_di = np.where(tr != 0, 100 * neg / tr, 0.0)
+            di_total = plus_di + minus_di
+            dx = np.where(di_total != 0, 100 * np.abs((plus_di - minus_di) / di_total), 0.0)
+        ready = index >= w
+        dx_sum = np.where(ready & (index < 2 * w - 1), state['dx_sum'] + dx, state['dx_sum'])
+        adx = np.where(ready & (index == 2 * w - 1), (state['dx_sum'] + dx) / w, state['adx'])
+        adx = np.where(ready & (index > 2 * w - 1), (state['adx'] * (w - 1) + dx) / w, adx)
+        # ta 는 평활 시작 봉(index == w)의 DI 를 0 으로 둡니다.
+        di_pos = np.where(index > w, plus_di, 0.0)
+        di_neg = np.where(index > w, minus_di, 0.0)
+
+        keep = lambda new, old: np.where(valid, new, old)
+        return {
+            'prev_high': keep(high, state['prev_high']), 'prev_low': keep(low, state['prev_low']),
+            'prev_close': keep(close, state['prev_close']), 'index': keep(index, state['index']),
+            'tr': keep(tr, state['tr']), 'pos': keep(pos, state['pos']), 'neg': keep(neg, state['neg']),
+            'dx_sum': keep(dx_sum, state['dx_sum']), 'adx': keep(adx, state['adx']),
+            'di_pos': keep(di_pos, state['di_pos']), 'di_neg': keep(di_neg, state['di_neg']),
+        }
+
+    def value(self, state):
+        return state['adx']
+
+
+def rolling_last(close, current, window):
+    # 마감된 종가 행렬의 마지막 window-1 칸 + 진행 중인 봉 종가의 평균 (칸이 모자라거나 NaN 이 있으면 NaN)
+    if close.shape[1] < window - 1:
+        return np.full(len(current), np.nan)
+    recent = close[:, close.shape[1] - (window - 1):]
+    return (recent.sum(axis=1) + current) / window
+
+
+# ───────────────────────────────
+# 2. 캔들 행렬 (심볼 × 봉)
+# ───────────────────────────────
+def align_ohlcv(ohlcv_by_symbol, symbols, bars):
+    """심볼별 ccxt OHLCV → (봉 시작 시각, (심볼 × 봉 × 6) 배열). 마지막 칸은 진행 중인 봉입니다.
+
+    상장 전 봉은 NaN, 중간에 거래가 없던 봉은 직전 종가의 보합 봉(거래량 0)으로 채웁니다.
+    """
+    stamps = sorted({int(bar[TS]) for ohlcv in ohlcv_by_symbol.values() for bar in ohlcv})[-bars:]
+    column = {ts: i for i, ts in enumerate(stamps)}
+    matrix = np.full((len(symbols), len(stamps), 6), np.nan)
+    for row, symbol in enumerate(symbols):
+        for bar in ohlcv_by_symbol.get(symbol, []):
+            col = column.get(int(bar[TS]))
+            if col is not None:
+                matrix[row, col] = bar[:6]
+        closes = pd.DataFrame(matrix[row, :, CLOSE]).ffill().to_numpy()[:, 0]
+        gaps = np.isnan(matrix[row, :, CLOSE]) & ~np.isnan(closes)
+        matrix[row, gaps, OPEN:CLOSE + 1] = closes[gaps, None]
+        matrix[row, gaps, VOLUME] = 0.0
+    matrix[:, :, TS] = np.array(stamps, dtype=float)
+    return np.array(stamps, dtype=np.int64), matrix
+
+
+class MarketScanner:
+    def __init__(self, exchange, symbols=None, timeframe=TIMEFRAME, rsi_period=RSI_PERIOD,
+                 buy_threshold=RSI_BUY_THRESHOLD, ma_short=MA_SHORT_PERIOD, ma_long=MA_LONG_PERIOD,
+                 adx_window=ADX_WINDOW, min_quote_volume=MIN_QUOTE_VOLUME, resync_per_step=RESYNC_PER_STEP):
+        self.exchange = exchange
+        self.symbols = symbols
+        self.timeframe = timeframe
+        self.buy_threshold = buy_threshold
+        self.ma_short = ma_short
+        self.ma_long = ma_long
+        self.min_quote_volume = min_quote_volume
+        self.resync_per_step = resync_per_step
+        self.warmup = max(rsi_period * 2, ma_long + 10, adx_window * 2 + 10)
+        self.rsi = MatrixRSI(rsi_period)
+        self.adx = MatrixADX(adx_window)
+
+        self.stamps = None            # 마감된 봉 시작 시각 (봉,)
+        self.closed = None            # 마감된 봉 (심볼 × 봉 × 6)
+        self.current = None           # 진행 중인 봉 (심볼 × 6)
+        self._opened = None           # 진행 중인 봉에 티커 체결가가 들어온 심볼
+        self.quote_volume = None
+        self._state = None            # 마감된 봉까지의 (rsi, adx) 상태, 봉이 바뀌면 None
+        self._resync_at = 0
+        self.requests = 0
+
+    # ── 워밍업 (시작할 때 한 번만 심볼별 조회) ──
+    def krw_symbols(self):
+        self.exchange.load_markets()
+        return sorted(symbol for symbol, market in self.exchange.markets.items()
+                      if market.get('quote') == QUOTE and market.get('active', True) is not False)
+
+    def load(self):
+        if self.symbols is None:
+            self.symbols = self.krw_symbols()
+        ohlcv_by_symbol = {}
+        for i, symbol in enumerate(self.symbols, 1):
+            self.requests += 1
+            ohlcv_by_symbol[symbol] = self.exchange.fetch_ohlcv(symbol, self.timeframe, limit=self.warmup)
+            print(f"\r⏳ 워밍업 캔들 {i}/{len(self.symbols)}", end='', flush=True)
+        print()
+        stamps, matrix = align_ohlcv(ohlcv_by_symbol, self.symbols, self.warmup)
+        self.stamps, self.closed, self.current = stamps[:-1], matrix[:, :-1], matrix[:, -1].copy()
+        self.quote_volume = np.zeros(len(self.symbols))
+        self._opened = ~np.isnan(self.current[:, CLOSE])
+        self._state = None
+        return self
+
+    # ── 틱 (티커 일괄 조회 1회) ──
+    def fetch_tickers(self):
+        self.requests += 1
+        return self.exchange.fetch_tickers(None, {'quote_currencies': QUOTE})
+
+    def apply_tickers(self, tickers):
+        """티커 dict 로 진행 중인 봉을 갱신합니다. 봉이 바뀌었으면 True."""
+        rows = [(i, tickers[symbol]) for i, symbol in enumerate(self.symbols) if symbol in tickers]
+        if not rows:
+            return False
+        index = np.array([i for i, _ in rows])
+        last = np.array([ticker['last'] for _, ticker in rows], dtype=float)
+        stamp = max(ticker['timestamp'] or 0 for _, ticker in rows)
+        self.quote_volume[index] = [ticker.get('quoteVolume') or 0 for _, ticker in rows]
+
+        rolled = False
+        start = bucket_start(stamp, self.timeframe)
+        if start > self.current[0, TS]:
+            self._roll(start)
+            rolled = True
+        current = self.current
+        if self.timeframe == '1d':
+            # 업비트 티커의 시가/고가/저가는 UTC 00:00(KST 09:00) 부터의 값 = 진행 중인 일봉
+            for column, key in ((OPEN, 'open'), (HIGH, 'high'), (LOW, 'low')):
+                current[index, column] = [ticker.get(key) or price for (_, ticker), price in zip(rows, last)]
+        else:
+            fresh = index[~self._opened[index]]
+            current[fresh, OPEN] = current[fresh, HIGH] = current[fresh, LOW] = last[~self._opened[index]]
+            current[index, HIGH] = np.fmax(current[index, HIGH], last)
+            current[index, LOW] = np.fmin(current[index, LOW], last)
+        current[index, CLOSE] = last
+        self._opened[index] = True
+        return rolled
+
+    def _roll(self, start):
+        # 진행 중인 봉을 마감 행렬 끝에 붙이고 가장 오래된 봉을 버린 뒤, 새 봉은 직전 종가의 보합 봉으로 시작
+        self.closed = np.concatenate([self.closed[:, 1:], self.current[:, None]], axis=1)
+        self.stamps = np.r_[self.stamps[1:], int(self.current[0, TS])]
+        previous_close = self.current[:, CLOSE]
+        self.current = np.empty_like(self.current)
+        self.current[:, TS] = start
+        self.current[:, OPEN:CLOSE + 1] = previous_close[:, None]
+        self.current[:, VOLUME] = 0.0
+        self._opened = np.zeros(len(self.symbols), dtype=bool)     # 첫 티커 체결가가 시가
+        self._state = None
+
+    def resync(self, count=None):
+        # 심볼 몇 개씩 돌아가며 최근 2개 봉을 거래소 캔들로 바로잡음 (티커 표본 고가/저가 보정)
+        count = self.resync_per_step if count is None else count
+        for _ in range(min(count, len(self.symbols))):
+            row = self._resync_at % len(self.symbols)
+            self._resync_at += 1
+            self.requests += 1
+            for bar in self.exchange.fetch_ohlcv(self.symbols[row], self.timeframe, limit=2):
+                if bar[TS] == self.current[row, TS]:
+                    self.current[row, OPEN:VOLUME + 1] = bar[OPEN:VOLUME + 1]
+                    self._opened[row] = True
+                elif len(self.stamps) and bar[TS] == self.stamps[-1]:
+                    self.closed[row, -1, OPEN:VOLUME + 1] = bar[OPEN:VOLUME + 1]
+                    self._state = None
+
+    # ── 지표 / 스캔 ──
+    def _closed_state(self):
+        if self._state is None:
+            n = len(self.symbols)
+            rsi, adx = self.rsi.initial(n), self.adx.initial(n)
+            for col in range(self.closed.shape[1]):
+                bar = self.closed[:, col]
+                rsi = self.rsi.step(rsi, bar[:, HIGH], bar[:, LOW], bar[:, CLOSE])
+                adx = self.adx.step(adx, bar[:, HIGH], bar[:, LOW], bar[:, CLOSE])
+            self._state = (rsi, adx)
+        return self._state
+
+    def values(self):
+        """진행 중인 봉까지 반영한 심볼별 지표 배열 (마감된 봉 상태는 유지)."""
+        rsi_state, adx_state = self._closed_state()
+        high, low, close = self.current[:, HIGH], self.current[:, LOW], self.current[:, CLOSE]
+        closes = self.closed[:, :, CLOSE]
+        return {
+            'price': close,
+            'rsi': self.rsi.value(self.rsi.step(rsi_state, high, low, close)),
+            'ma_short': rolling_last(closes, close, self.ma_short),
+            'ma_long': rolling_last(closes, close, self.ma_long),
+            'adx': self.adx.value(self.adx.step(adx_state, high, low, close)),
+            'quote_volume': self.quote_volume,
+        }
+
+    def scan(self):
+        """rsi_final 매수 조건을 만족하는 마켓을 신호 강도순으로 정렬한 DataFrame."""
+        table = pd.DataFrame(self.values(), index=pd.Index(self.symbols, name='symbol'))
+        table['ma_spread'] = table['ma_short'] / table['ma_long'] - 1
+        signal = ((table['rsi'] <= self.buy_threshold) & (table['ma_spread'] > 0)
+                  & (table['quote_volume'] >= self.min_quote_volume))
+        candidates = table[signal].copy()
+        # 신호 강도: 과매도 깊이(임계값 대비 RSI 가 낮을수록) + 추세 여유(MA 간격), ADX 는 참고용
+        candidates['strength'] = (self.buy_threshold - candidates['rsi']) / self.buy_threshold + candidates['ma_spread']
+        return candidates.sort_values('strength', ascending=False)
+
+    def step(self):
+        rolled = self.apply_tickers(self.fetch_tickers())
+        if self.resync_per_step:
+            self.resync()
+        return self.scan(), rolled
+
+
+def format_candidates(candidates, top):
+    lines = []
+    for symbol, row in candidates.head(top).iterrows():
+        lines.append(f"{symbol:<12} {row['price']:>14,.2f}원 | RSI {row['rsi']:5.1f} | MA 간격 {row['ma_spread'] * 100:5.2f}% "
+                     f"| ADX {row['adx']:5.1f} | 거래대금 {row['quote_volume'] / 1e8:,.0f}억 | 강도 {row['strength']:.3f}")
+    return lines
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="KRW 전체 마켓에서 rsi_final 매수 조건 스캔")
+    parser.add_argument('--timeframe', default=TIMEFRAME)
+    parser.add_argument('--top', type=int, default=10, help="출력할 상위 마켓 수")
+    parser.add_argument('--interval', type=float, default=SCAN_INTERVAL_SECONDS, help="티커 조회 간격 (초)")
+    parser.add_argument('--min-volume', type=float, default=MIN_QUOTE_VOLUME, help="최소 24시간 거래대금 (원)")
+    parser.add_argument('--symbols', default=None, help="쉼표로 구분한 심볼 (기본: KRW 전체)")
+    parser.add_argument('--once', action='store_true', help="한 번만 스캔하고 종료")
+    parser.add_argument('--notify', action='store_true', help="새로 조건을 만족한 마켓을 텔레그램으로 알림")
+    args = parser.parse_args()
+
+    load_dotenv()
+    upbit = ccxt.upbit()
+    schedule(upbit)
+    notifier = TelegramNotifier(os.getenv('TELEGRAM_TOKEN'), os.getenv('TELEGRAM_CHAT_ID')) if args.notify else None
+    symbols = [symbol.strip() for symbol in args.symbols.split(',')] if args.symbols else None
+    scanner = MarketScanner(upbit, symbols=symbols, timeframe=args.timeframe, min_quote_volume=args.min_volume).load()
+    print(f"🔎 {len(scanner.symbols)}개 마켓 스캔 시작 ({args.timeframe}, 워밍업 {scanner.warmup}봉)\n")
+
+    notified = set()
+    while True:
+        try:
+            started = time.perf_counter()
+            candidates, rolled = scanner.step()
+            elapsed = time.perf_counter() - started
+            print(f"[{time.strftime('%Y-%m-%d %H:%M:%S')}] 조건 만족 {len(candidates)}개 "
+                  f"({elapsed:.2f}초, 누적 요청 {scanner.requests}회{', 새 봉' if rolled else ''})")
+            for line in format_candidates(candidates, args.top):
+                print("  " + line)
+            if notifier is not None:
+                new = [symbol for symbol in candidates.index[:args.top] if symbol not in notified]
+                if new:
+                    notifier.send("🔎 매수 조건 만족 마켓\n" + "\n".join(format_candidates(candidates.loc[new], args.top)))
+                notified = set(candidates.index)
+        except ccxt.NetworkError as e:
+            print(f"❌ 네트워크 오류 발생: {e}")
+            time.sleep(ERROR_COOLDOWN_SECONDS)
+            continue
+        except ccxt.ExchangeError as e:
+            print(f"❌ 거래소 오류 발생: {e}")
+            time.sleep(ERROR_COOLDOWN_SECONDS)
+            continue
+        if args.once:
+            break
+        time.sleep(args.interval)
@@ -0,0 +1,218 @@
+import bisect
+import contextlib
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# ───────────────────────────────
+# 라이브 봇 지연 시간 계측 (Prometheus 텍스트 형식)
+#
+# 루프 한 번의 시간이 어디에 쓰이는지 단계별로 재서 히스토그램으로 모읍니다.
+#   • API 호출: instrument(exchange) 로 fetch_ticker / fetch_balance / fetch_ohlcv / create_market_*_order 등을
+#     감싸 호출 시간과 오류 수를 자동으로 기록
+#   • 봇 코드 구간: with metrics.span('indicators'): ...
+#   • 루프: loop_tick() 간격(loop_interval), sleep() 의 예정 대비 초과 시간(sleep_overshoot)
+# 내보내기 (환경변수, 둘 다 없으면 메모리에만 모음)
+#   • BOT_METRICS_PORT: 127.0.0.1:<port>/metrics 에 텍스트 엔드포인트
+#   • BOT_METRICS_DIR:  <dir>/<bot>.prom 파일을 BOT_METRICS_INTERVAL(기본 15초)마다 원자적으로 갱신
+#                       (node_exporter textfile collector 로 수집 가능)
+# ───────────────────────────────
+
+NAMESPACE = 'upbit_bot'
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+INSTRUMENTED_METHODS = ('load_markets', 'fetch_ticker', 'fetch_balance', 'fetch_ohlcv', 'fetch_order',
+                        'create_market_buy_order', 'create_market_sell_order', 'create_order', 'cancel_order')
+
+
+class Histogram:
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)   # 마지막 칸은 +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self):
+        total = 0
+        for bound, count in zip(self.buckets + (float('inf'),), self.counts):
+            total += count
+            yield bound, total
+
+
+def _labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{key}="{value}"' for key, value in labels) + '}'
+
+
+def _bound(bound):
+    return '+Inf' if bound == float('inf') else repr(bound)
+
+
+class BotMetrics:
+    def __init__(self, bot, buckets=DEFAULT_BUCKETS):
+        self.bot = bot
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._histograms = {}     # (이름, 라벨 튜플) → Histogram
+        self._counters = {}       # (이름, 라벨 튜플) → 값
+        self._help = {}
+        self._last_tick = None
+        self._server = None
+        self._writer = None
+
+    @classmethod
+    def from_env(cls, bot):
+        metrics = cls(bot)
+        port = os.getenv('BOT_METRICS_PORT')
+        directory = os.getenv('BOT_METRICS_DIR')
+        if port:
+            metrics.serve(int(port))
+        if directory:
+            metrics.write_periodically(os.path.join(directory, f"{bot}.prom"),
+                                       float(os.getenv('BOT_METRICS_INTERVAL', 15)))
+        return metrics
+
+    # ── 기록 ──
+    def observe(self, name, value, help_text='', **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram(self.buckets)
+                self._help.setdefault(name, help_text)
+            histogram.observe(value)
+
+    def inc(self, name, amount=1, help_text='', **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+            self._help.setdefault(name, help_text)
+
+    @contextlib.contextmanager
+    def span(self, stage):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe('stage_seconds', time.perf_counter() - started, "루프 단계별 소요 시간", stage=stage)
+
+    def loop_tick(self):
+        # 루프 맨 앞에서 호출: 직전 반복과의 간격
+        now = time.perf_counter()
+        if self._last_tick is not None:
+            self.observe('loop_interval_seconds', now - self._last_tick, "루프 반복 간격")
+        self._last_tick = now
+        self.inc('loop_iterations_total', help_text="루프 반복 횟수")
+
+    def sleep(self, seconds):
+        # time.sleep 대신 사용: 예정보다 늦게 깨어난 시간(스케줄 밀림)을 기록
+        started = time.time()
+        time.sleep(seconds)
+        self.observe('sleep_overshoot_seconds', max(time.time() - started - seconds, 0.0),
+                     "sleep 예정 시간 대비 초과 시간")
+
+    def loop_error(self, error):
+        self.inc('loop_errors_total', help_text="루프에서 잡힌 예외 수", error=type(error).__name__)
+
+    def instrument(self, exchange, methods=INSTRUMENTED_METHODS):
+        """거래소 객체의 API 메서드를 감싸 호출 시간(api_seconds)과 요청/오류 수를 기록합니다."""
+        for method in methods:
+            original = getattr(exchange, method, None)
+            if original is None:
+                continue
+            setattr(exchange, method, self._timed(method, original))
+        return exchange
+
+    def _timed(self, method, original):
+        def call(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return original(*args, **kwargs)
+            except Exception as e:
+                self.inc('api_errors_total', help_text="API 오류 수", method=method, error=type(e).__name__)
+                raise
+            finally:
+                self.observe('api_seconds', time.perf_counter() - started, "API 호출 소요 시간", method=method)
+                self.inc('api_requests_total', help_text="API 호출 수", method=method)
+        return call
+
+    # ── 내보내기 ──
+    def render(self):
+        """Prometheus 텍스트 노출 형식 (bot 라벨 포함)."""
+        lines = []
+        bot = (('bot', self.bot),)
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = sorted(self._histograms.items(), key=lambda item: item[0])
+            help_texts = dict(self._help)
+            snapshots = [(key, list(histogram.cumulative()), histogram.sum, histogram.count)
+                         for key, histogram in histograms]
+
+        declared = set()
+        for (name, labels), value in counters:
+            full = f"{NAMESPACE}_{name}"
+            if full not in declared:
+                lines += [f"# HELP {full} {help_texts.get(name, '')}", f"# TYPE {full} counter"]
+                declared.add(full)
+            lines.append(f"{full}{_labels(bot + labels)} {value}")
+        for (name, labels), buckets, total, count in snapshots:
+            full = f"{NAMESPACE}_{name}"
+            if full not in declared:
+                lines += [f"# HELP {full} {help_texts.get(name, '')}", f"# TYPE {full} histogram"]
+                declared.add(full)
+            for bound, cumulative in buckets:
+                lines.append(f"{full}_bucket{_labels(bot + labels + (('le', _bound(bound)),))} {cumulative}")
+            lines.append(f"{full}_sum{_labels(bot + labels)} {total}")
+            lines.append(f"{full}_count{_labels(bot + labels)} {count}")
+        return '\n'.join(lines) + '\n'
+
+    def write(self, path):
+        # 읽는 쪽이 반쯤 쓴 파일을 보지 않도록 임시 파일에 쓴 뒤 교체
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(self.render())
+        os.replace(tmp_path, path)
+
+    def write_periodically(self, path, interval=15.0):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+
+        def run():
+            while True:
+                time.sleep(interval)
+                try:
+                    self.write(path)
+                except OSError as e:
+                    print(f"⚠️ 메트릭 파일 저장 실패: {e}")
+
+        self._writer = threading.Thread(target=run, name='metrics-writer', daemon=True)
+        self._writer.start()
+        return self._writer
+
+    def serve(self, port, host='127.0.0.1'):
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path not in ('/', '/metrics'):
+                    self.send_error(404)
+                    return
+                body = metrics.render().encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=self._server.serve_forever, name='metrics-server', daemon=True).start()
+        print(f"📈 메트릭: http://{host}:{self._server.server_address[1]}/metrics")
+        return self._server
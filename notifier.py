@@ -0,0 +1,182 @@
+import atexit
+import os
+import queue
+import threading
+import time
+
+import requests
+
+# ───────────────────────────────
+# 비동기 텔레그램 알림
+#
+# send_telegram 이 매매 루프 안에서 requests.post 를 직접 호출하면 텔레그램 API 가 느릴 때
+# 다음 주문까지 늦어지고, 오류가 반복되면 채팅방이 같은 메시지로 도배됩니다.
+# TelegramNotifier 는
+#   • send() 에서 큐에 넣기만 하고 바로 반환 (지연 시간 측정)
+#   • 백그라운드 스레드가 keep-alive 세션 + 타임아웃으로 전송
+#   • 쌓인 메시지는 한 번에 묶어 보내고, 초당 전송 횟수와 429 retry_after 를 지킴
+#   • 같은 종류의 오류(❌) 메시지는 coalesce_window 동안 한 번만 보내고 나머지는 개수로 요약
+# ───────────────────────────────
+
+TELEGRAM_API_URL = os.getenv('TELEGRAM_API_URL', 'https://api.telegram.org')
+TELEGRAM_MAX_LENGTH = 4096
+
+
+def error_key(message):
+    # 오류 메시지는 첫 줄의 ':' 앞부분(오류 종류)으로 묶습니다. 그 외 메시지는 묶지 않음.
+    if not message.startswith('❌'):
+        return None
+    return message.split('\n', 1)[0].split(':', 1)[0].strip()
+
+
+class TelegramNotifier:
+    def __init__(self, token, chat_id, api_url=TELEGRAM_API_URL, queue_size=100, timeout=5,
+                 min_interval=1.0, coalesce_window=60, max_retries=3):
+        self.url = f"{api_url}/bot{token}/sendMessage"
+        self.chat_id = chat_id
+        self.timeout = timeout
+        self.min_interval = min_interval
+        self.coalesce_window = coalesce_window
+        self.max_retries = max_retries
+
+        self.session = requests.Session()
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._lock = threading.Lock()
+        self._recent_errors = {}      # key → (처음 보낸 시각, 생략된 개수)
+        self._next_send_at = 0.0
+        self._pending = None          # 길이 초과로 다음 묶음에 보낼 메시지
+        self._stop = threading.Event()
+
+        # 통계
+        self.sent = 0
+        self.dropped = 0
+        self.coalesced = 0
+        self.failed = 0
+        self._enqueue_count = 0
+        self._enqueue_total = 0.0
+        self._enqueue_max = 0.0
+
+        self._thread = threading.Thread(target=self._run, name='telegram-notifier', daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    # ── 매매 루프에서 호출 ──
+    def send(self, message):
+        started = time.perf_counter()
+        message = str(message)
+        if not self._coalesce(message):
+            try:
+                self._queue.put_nowait(message)
+            except queue.Full:
+                # 큐가 가득 차면 가장 오래된 메시지를 버림 (매매 루프를 막지 않음)
+                try:
+                    self._queue.get_nowait()
+                except queue.Empty:
+                    pass
+                self.dropped += 1
+                self._queue.put_nowait(message)
+        elapsed = time.perf_counter() - started
+        self._enqueue_count += 1
+        self._enqueue_total += elapsed
+        self._enqueue_max = max(self._enqueue_max, elapsed)
+
+    def stats(self):
+        return {
+            'sent': self.sent,
+            'dropped': self.dropped,
+            'coalesced': self.coalesced,
+            'failed': self.failed,
+            'queued': self._queue.qsize(),
+            'enqueue_avg_us': self._enqueue_total / self._enqueue_count * 1e6 if self._enqueue_count else 0.0,
+            'enqueue_max_us': self._enqueue_max * 1e6,
+        }
+
+    def close(self, timeout=5):
+        # 남은 메시지를 최대 timeout 초 동안 보내고 종료
+        self._flush_coalesced(force=True)
+        deadline = time.time() + timeout
+        while not self._queue.empty() and time.time() < deadline:
+            time.sleep(0.05)
+        self._stop.set()
+        self._thread.join(timeout=max(0.0, deadline - time.time()) + self.timeout)
+
+    # ── 오류 메시지 합치기 ──
+    def _coalesce(self, message):
+        key = error_key(message)
+        if key is None:
+            return False
+        now = time.time()
+        with self._lock:
+            first_at, skipped = self._recent_errors.get(key, (None, 0))
+            if first_at is not None and now - first_at < self.coalesce_window:
+                self._recent_errors[key] = (first_at, skipped + 1)
+                self.coalesced += 1
+                return True
+            self._recent_errors[key] = (now, 0)
+        return False
+
+    def _flush_coalesced(self, force=False):
+        now = time.time()
+        summaries = []
+        with self._lock:
+            for key, (first_at, skipped) in list(self._recent_errors.items()):
+                if force or now - first_at >= self.coalesce_window:
+                    if skipped:
+                        summaries.append(f"{key}: 최근 {self.coalesce_window}초 동안 같은 오류 {skipped}건 더 발생")
+                    del self._recent_errors[key]
+        for summary in summaries:
+            try:
+                self._queue.put_nowait(summary)
+            except queue.Full:
+                self.dropped += 1
+
+    # ── 백그라운드 전송 ──
+    def _drain_batch(self, first):
+        # 큐에 쌓인 메시지를 텔레그램 최대 길이 안에서 하나로 묶음
+        parts = [first]
+        length = len(first)
+        while True:
+            try:
+                message = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if length + len(message) + 2 > TELEGRAM_MAX_LENGTH:
+                self._pending = message
+                break
+            parts.append(message)
+            length += len(message) + 2
+        return '\n\n'.join(parts)[:TELEGRAM_MAX_LENGTH]
+
+    def _post(self, text):
+        for attempt in range(self.max_retries):
+            wait = self._next_send_at - time.time()
+            if wait > 0:
+                time.sleep(wait)
+            try:
+                response = self.session.post(self.url, data={'chat_id': self.chat_id, 'text': text},
+                                             timeout=self.timeout)
+                self._next_send_at = time.time() + self.min_interval
+                if response.status_code == 429:
+                    retry_after = response.json().get('parameters', {}).get('retry_after', 1)
+                    self._next_send_at = time.time() + retry_after
+                    continue
+                response.raise_for_status()
+                self.sent += 1
+                return True
+            except Exception as e:
+                print(f"❌ 텔레그램 전송 실패 ({attempt + 1}/{self.max_retries}): {e}")
+                self._next_send_at = time.time() + min(2 ** attempt, 30)
+        self.failed += 1
+        return False
+
+    def _run(self):
+        while not (self._stop.is_set() and self._queue.empty() and self._pending is None):
+            self._flush_coalesced()
+            if self._pending is not None:
+                first, self._pending = self._pending, None
+            else:
+                try:
+                    first = self._queue.get(timeout=0.5)
+                except queue.Empty:
+                    continue
+            self._post(self._drain_batch(first))
@@ -0,0 +1,360 @@
+import argparse
+import bisect
+import math
+import os
+import runpy
+import shutil
+import tempfile
+import time
+from contextlib import contextmanager
+
+import ccxt
+
+from candle_store import timeframe_ms
+from indicators import TS, OPEN, HIGH, LOW, CLOSE, VOLUME
+
+# ───────────────────────────────
+# 모의 거래소 (ccxt 호환) + 가상 시계 재생
+#
+# 라이브 봇 스크립트(ma_adx.py, ma_mdi.py, rsi_risk_2.py 등)를 실제 계좌·실제 시간 없이 돌려 보기 위한 것입니다.
+#   • PaperExchange: 저장된 캔들 위에서 fetch_ticker / fetch_ohlcv / fetch_balance /
+#     create_market_buy_order / create_market_sell_order 를 흉내 냅니다.
+#     현재가는 가상 시각 직전에 마감된 기준 캔들의 종가이고, 상위 timeframe 캔들은 기준 캔들을
+#     합쳐서 만듭니다 (진행 중인 봉은 지금까지 마감된 기준 캔들만 반영).
+#     수수료(TRADE_FEE_RATE)와 최소 주문 금액(MIN_ORDER_KRW)을 적용합니다.
+#   • VirtualClock: time.time / time.sleep / time.strftime 을 대신해서 sleep(86400) 이 즉시 끝납니다.
+#   • replay_script(): 스크립트의 ccxt.upbit, MarketFeed, TelegramNotifier 를 모의 객체로 바꿔 실행합니다.
+#     캔들이 끝나면 ReplayFinished 로 봇 루프를 빠져나옵니다.
+# ───────────────────────────────
+
+TRADE_FEE_RATE = 0.0005
+MIN_ORDER_KRW = 5000
+
+_strftime, _localtime = time.strftime, time.localtime
+
+
+class ReplayFinished(BaseException):
+    # 봇의 `except Exception` 에 잡히지 않도록 BaseException 을 상속
+    pass
+
+
+class VirtualClock:
+    def __init__(self, start_ms, end_ms=None):
+        self.now_ms = start_ms
+        self.end_ms = end_ms
+
+    def time(self):
+        return self.now_ms / 1000
+
+    def sleep(self, seconds):
+        self.advance_to(self.now_ms + int(seconds * 1000))
+
+    def advance_to(self, ms):
+        self.now_ms = max(self.now_ms, ms)
+        if self.end_ms is not None and self.now_ms > self.end_ms:
+            raise ReplayFinished()
+
+    def strftime(self, fmt, t=None):
+        return _strftime(fmt, _localtime(self.time()) if t is None else t)
+
+
+class PaperExchange:
+    def __init__(self, candles, timeframe='1h', symbol='BTC/KRW', initial_krw=1_000_000, initial_btc=0.0,
+                 fee_rate=TRADE_FEE_RATE, min_order_krw=MIN_ORDER_KRW, clock=None):
+        self.candles = sorted(candles, key=lambda row: row[TS])
+        self.timeframe = timeframe
+        self.step = timeframe_ms(timeframe)
+        self.symbol = symbol
+        self.base, self.quote = symbol.split('/')
+        self.fee_rate = fee_rate
+        self.min_order_krw = min_order_krw
+        self._ts = [row[TS] for row in self.candles]
+        if clock is None:
+            clock = VirtualClock(self._ts[0] + self.step, self._ts[-1] + self.step)
+        self.clock = clock
+
+        self.balances = {self.quote: float(initial_krw), self.base: float(initial_btc)}
+        self.orders = []
+        self.fees_paid = 0.0
+        self.calls = {}
+        self._aggregated = {}
+
+    # ── 내부: 가상 시각 기준 데이터 ──
+    def _count(self, name):
+        self.calls[name] = self.calls.get(name, 0) + 1
+
+    def _closed_index(self):
+        # 가상 시각 직전까지 마감된 기준 캔들 개수
+        return bisect.bisect_right(self._ts, self.clock.now_ms - self.step)
+
+    def current_candle(self):
+        index = self._closed_index()
+        if index == 0:
+            raise ccxt.ExchangeError("모의 거래소: 현재 시각 이전의 캔들이 없습니다.")
+        return self.candles[index - 1]
+
+    def price(self):
+        return self.current_candle()[CLOSE]
+
+    def _bars(self, timeframe):
+        # 기준 캔들을 timeframe 단위로 합친 (봉 시작 시각, 기준 캔들 시작 index) 목록 (한 번만 계산)
+        if timeframe not in self._aggregated:
+            step = timeframe_ms(timeframe)
+            starts, offsets = [], []
+            for i, ts in enumerate(self._ts):
+                bucket = ts - ts % step
+                if not starts or starts[-1] != bucket:
+                    starts.append(bucket)
+                    offsets.append(i)
+            self._aggregated[timeframe] = (starts, offsets)
+        return self._aggregated[timeframe]
+
+    def _merge(self, rows):
+        return [rows[0][TS], rows[0][OPEN], max(r[HIGH] for r in rows), min(r[LOW] for r in rows),
+                rows[-1][CLOSE], sum(r[VOLUME] for r in rows)]
+
+    # ── ccxt 호환 API ──
+    def load_markets(self, reload=False):
+        self._count('load_markets')
+        return {self.symbol: {'symbol': self.symbol, 'base': self.base, 'quote': self.quote}}
+
+    def fetch_ticker(self, symbol):
+        self._count('fetch_ticker')
+        candle = self.current_candle()
+        return {'symbol': symbol, 'timestamp': self.clock.now_ms, 'last': candle[CLOSE], 'close': candle[CLOSE]}
+
+    def fetch_ohlcv(self, symbol, timeframe='1m', since=None, limit=None, params={}):
+        self._count('fetch_ohlcv')
+        closed = self._closed_index()
+        if timeframe == self.timeframe:
+            first = 0 if since is None else bisect.bisect_left(self._ts, since)
+            if limit:
+                first = max(first, closed - limit)
+            rows = [list(row[:6]) for row in self.candles[first:closed]]
+        else:
+            if timeframe_ms(timeframe) < self.step:
+                raise ccxt.BadRequest(f"모의 거래소: 기준 timeframe({self.timeframe})보다 짧은 {timeframe} 은 만들 수 없습니다.")
+            starts, offsets = self._bars(timeframe)
+            count = bisect.bisect_right(offsets, closed - 1) if closed else 0
+            first = 0 if limit is None else max(count - limit, 0)
+            rows = []
+            for k in range(first, count):
+                end = offsets[k + 1] if k + 1 < len(offsets) else len(self.candles)
+                rows.append(self._merge(self.candles[offsets[k]:min(end, closed)]))
+        if since is not None:
+            rows = [row for row in rows if row[TS] >= since]
+        return rows[-limit:] if limit else rows
+
+    def fetch_balance(self, params={}):
+        self._count('fetch_balance')
+        total = dict(self.balances)
+        return {'total': total, 'free': dict(total), 'used': {currency: 0.0 for currency in total}}
+
+    def _fill(self, side, amount, price, cost=None):
+        if cost is None:
+            amount = math.floor(amount * 1e8 + 1e-6) / 1e8      # 업비트 BTC 수량 단위 (소수 8자리)
+            cost = amount * price
+        else:
+            # 금액 지정 시장가 매수: 요청 금액 그대로 최소 주문 금액을 확인하고 수량은 금액에서 구함
+            amount = cost / price
+        if cost < self.min_order_krw:
+            raise ccxt.InvalidOrder(f"모의 거래소: 최소 주문 금액({self.min_order_krw}원) 미만입니다. ({cost:,.0f}원)")
+        if side == 'buy':
+            fee = cost * self.fee_rate
+            if cost + fee > self.balances[self.quote]:
+                if cost > self.balances[self.quote] + price * 1e-8:   # 수량 반올림(1 satoshi)까지는 허용
+                    raise ccxt.InsufficientFunds(f"모의 거래소: KRW 잔고 부족 ({self.balances[self.quote]:,.0f}원)")
+                # KRW 전액 주문이면 수수료만큼 수량을 줄여서 체결 (업비트 앱의 "최대" 주문과 같음)
+                amount = math.floor(self.balances[self.quote] / (1 + self.fee_rate) / price * 1e8) / 1e8
+                cost = amount * price
+                fee = cost * self.fee_rate
+            self.balances[self.quote] -= cost + fee
+            self.balances[self.base] += amount
+        else:
+            if amount > self.balances[self.base] + 1e-12:
+                raise ccxt.InsufficientFunds(f"모의 거래소: {self.base} 잔고 부족 ({self.balances[self.base]:.8f})")
+            fee = cost * self.fee_rate
+            self.balances[self.base] = max(self.balances[self.base] - amount, 0.0)
+            self.balances[self.quote] += cost - fee
+        self.fees_paid += fee
+        order = {
+            'id': str(len(self.orders) + 1),
+            'timestamp': self.clock.now_ms,
+            'datetime': ccxt.Exchange.iso8601(self.clock.now_ms),
+            'symbol': self.symbol,
+            'type': 'market',
+            'side': side,
+            'price': price,
+            'average': price,
+            'amount': amount,
+            'filled': amount,
+            'remaining': 0.0,
+            'cost': cost,
+            'fee': {'cost': fee, 'currency': self.quote},
+            'status': 'closed',
+        }
+        self.orders.append(order)
+        return order
+
+    def create_market_buy_order(self, symbol, amount, params={}):
+        self._count('create_market_buy_order')
+        price = self.price()
+        if params.get('cost'):
+            return self._fill('buy', None, price, cost=float(params['cost']))
+        return self._fill('buy', amount, price)
+
+    def create_market_sell_order(self, symbol, amount, params={}):
+        self._count('create_market_sell_order')
+        return self._fill('sell', amount, self.price())
+
+    def total_value(self):
+        return self.balances[self.quote] + self.balances[self.base] * self.price()
+
+
+# ───────────────────────────────
+# 라이브 스크립트 재생
+# ───────────────────────────────
+class PaperMarketFeed:
+    """MarketFeed 대체: wait() 마다 다음 기준 캔들까지 가상 시계를 옮기고 그 종가를 체결가로 돌려줍니다."""
+
+    def __init__(self, exchange):
+        self.exchange = exchange
+        self.last_price = None
+
+    def start(self):
+        return self
+
+    def stop(self):
+        pass
+
+    def subscribe(self, callback):
+        pass
+
+    def wait(self, timeout=60):
+        clock, step = self.exchange.clock, self.exchange.step
+        clock.advance_to((clock.now_ms // step + 1) * step)
+        self.last_price = self.exchange.price()
+        return self.last_price
+
+
+class PaperNotifier:
+    def __init__(self, *args, quiet=False, **kwargs):
+        self.messages = []
+        self.quiet = quiet
+
+    def send(self, message):
+        self.messages.append(message)
+        if not self.quiet:
+            print(f"📨 {message}")
+
+    def close(self, timeout=0):
+        pass
+
+
+@contextmanager
+def patched_runtime(exchange, quiet=False):
+    # 스크립트가 import 하는 거래소·시세·알림·시간 함수를 모의 객체로 교체.
+    # 상태 스냅샷(state_store)은 재생마다 새 임시 디렉터리에 쓰므로 라이브 봇의 bot_state/ 를 읽거나 덮어쓰지 않고,
+    # 이전 재생의 상태가 다음 재생으로 이어지지도 않습니다.
+    import market_feed
+    import notifier
+
+    clock = exchange.clock
+    notifiers = []
+
+    def make_notifier(*args, **kwargs):
+        instance = PaperNotifier(quiet=quiet)
+        notifiers.append(instance)
+        return instance
+
+    saved = (ccxt.upbit, market_feed.MarketFeed, notifier.TelegramNotifier, time.time, time.sleep, time.strftime)
+    ccxt.upbit = lambda *args, **kwargs: exchange
+    market_feed.MarketFeed = lambda *args, **kwargs: PaperMarketFeed(exchange)
+    notifier.TelegramNotifier = make_notifier
+    time.time, time.sleep, time.strftime = clock.time, clock.sleep, clock.strftime
+    for key in ('UPBIT_API_KEY', 'UPBIT_SECRET_KEY', 'TELEGRAM_TOKEN', 'TELEGRAM_CHAT_ID'):
+        os.environ.setdefault(key, 'paper')
+    saved_state_dir = os.environ.get('BOT_STATE_DIR')
+    state_dir = tempfile.mkdtemp(prefix='paper_state_')
+    os.environ['BOT_STATE_DIR'] = state_dir
+    try:
+        yield notifiers
+    finally:
+        (ccxt.upbit, market_feed.MarketFeed, notifier.TelegramNotifier,
+         time.time, time.sleep, time.strftime) = saved
+        if saved_state_dir is None:
+            os.environ.pop('BOT_STATE_DIR', None)
+        else:
+            os.environ['BOT_STATE_DIR'] = saved_state_dir
+        shutil.rmtree(state_dir, ignore_errors=True)
+
+
+def replay_script(path, exchange, quiet=False):
+    started = time.perf_counter()
+    with patched_runtime(exchange, quiet=quiet) as notifiers:
+        try:
+            runpy.run_path(path, run_name='__main__')
+        except ReplayFinished:
+            pass
+    return {
+        'elapsed': time.perf_counter() - started,
+        'orders': exchange.orders,
+        'fees': exchange.fees_paid,
+        'balances': dict(exchange.balances),
+        'messages': [message for instance in notifiers for message in instance.messages],
+        'calls': dict(exchange.calls),
+    }
+
+
+if __name__ == "__main__":
+    import pandas as pd
+
+    import backtest_bot
+    from candle_store import CandleStore
+
+    parser = argparse.ArgumentParser(description="라이브 봇 스크립트를 모의 거래소·가상 시계로 재생")
+    parser.add_argument('script', help="예: ma_adx.py")
+    parser.add_argument('--start', default='2024-01-01')
+    parser.add_argument('--end', default='2024-12-31 23:59:59')
+    parser.add_argument('--timeframe', default='1h', help="기준 캔들 (봇이 쓰는 timeframe 이하)")
+    parser.add_argument('--warmup-days', type=int, default=120, help="지표 계산용으로 시작 전에 미리 둘 기간")
+    parser.add_argument('--initial-krw', type=float, default=1_000_000)
+    parser.add_argument('--quiet', action='store_true', help="봇 출력 숨기기")
+    parser.add_argument('--synthetic-bars', type=int, default=0,
+                        help="거래소 대신 시드 고정 합성 캔들 N개로 재생 (--start 부터, 오프라인 점검용)")
+    parser.add_argument('--min-fills', type=int, default=0,
+                        help="체결이 이보다 적으면 실패 코드로 종료 (재생 점검용, 예: auto_trade_bot.py --min-fills 1)")
+    args = parser.parse_args()
+
+    step = timeframe_ms(args.timeframe)
+    data_start = pd.Timestamp(args.start) - pd.Timedelta(days=args.warmup_days)
+    if args.synthetic_bars:
+        from benchmarks import synthetic_ohlcv
+        rows = synthetic_ohlcv(args.synthetic_bars + args.warmup_days * 86_400_000 // step, start=str(data_start),
+                               step_ms=step, duplicate_rate=0)
+        candles = [[int(row[TS]), *row[1:]] for row in rows.tolist()]
+    else:
+        df = backtest_bot.fetch_historical_ohlcv(backtest_bot.upbit, 'BTC/KRW', args.timeframe,
+                                                 str(data_start), args.end, store=CandleStore())
+        if df.empty:
+            raise SystemExit("❌ 재생할 캔들이 없습니다.")
+        candles = [[int(ts.value // 1_000_000), *row]
+                   for ts, row in zip(df.index, df.to_numpy(dtype=float).tolist())]
+    clock = VirtualClock(int(pd.Timestamp(args.start).value // 1_000_000), candles[-1][TS] + step)
+    exchange = PaperExchange(candles, args.timeframe, initial_krw=args.initial_krw, clock=clock)
+
+    if args.quiet:
+        import contextlib
+        import io
+        with contextlib.redirect_stdout(io.StringIO()):
+            result = replay_script(args.script, exchange, quiet=True)
+    else:
+        result = replay_script(args.script, exchange)
+
+    final_value = exchange.total_value()
+    print(f"\n✅ {args.script} 재생 완료 ({args.start} ~ {args.end}, {result['elapsed']:.1f}초)")
+    print(f"   주문 {len(result['orders'])}회 | 수수료 {result['fees']:,.0f}원 | 알림 {len(result['messages'])}건")
+    print(f"   최종 평가액 {final_value:,.0f}원 ({final_value / args.initial_krw - 1:+.2%})")
+    print(f"   API 호출: {result['calls']}")
+    if len(result['orders']) < args.min_fills:
+        raise SystemExit(f"❌ 체결 {len(result['orders'])}회 < 최소 {args.min_fills}회: {args.script} 가 재생에서 거래하지 못했습니다.")
@@ -0,0 +1,242 @@
+import argparse
+import itertools
+import json
+import os
+import sys
+import time
+from multiprocessing import Pool, shared_memory
+
+import numpy as np
+import pandas as pd
+
+import backtest_cache
+import backtest_engine
+from backtest_cache import BacktestCache, data_digest
+
+# ───────────────────────────────
+# MA/ADX · MA/MDI 전략 파라미터 스윕 (프로세스 풀)
+#
+# OHLCV 배열은 공유 메모리에 한 번만 올리고, 각 워커는 이를 그대로 참조합니다.
+# 조합은 지표 파라미터(ma_short, ma_long, window)별로 묶어서 워커에 보내고,
+# 워커는 지표를 한 번 계산한 뒤 임계값·손절 조합 전체를 (봉 × 조합) 행렬로
+# 한 번에 시뮬레이션합니다 (backtest_engine.simulate_threshold_grid).
+# 캐시(backtest_cache)를 켜면 지표 열과 조합별 결과를 디스크에 두고, 같은 데이터로 다시 돌리거나
+# 범위가 겹치는 스윕에서는 이미 계산한 조합은 읽어 오고 새 조합만 시뮬레이션합니다.
+# 손절은 backtest_bot 기본값(STOP_MODE)과 같은 봉 저가 기준으로 판정하고, --stop close 로 종가 기준도 고를 수 있습니다.
+# ───────────────────────────────
+
+# 전략별 지표 기간 / 임계값 파라미터 이름
+STRATEGIES = {
+    'ma_adx': {'window': 'adx_window', 'buy': 'adx_buy_thresh', 'sell': 'adx_sell_thresh',
+               'indicators': backtest_engine.compute_ma_adx_indicators},
+    'ma_mdi': {'window': 'mdi_window', 'buy': 'mdi_buy_thresh', 'sell': 'mdi_sell_thresh',
+               'indicators': backtest_engine.compute_ma_mdi_indicators},
+}
+
+# 손절 판정 기본값: backtest_bot.STOP_MODE 와 같은 봉 저가 기준 (backtest_engine.GRID_STOP_MODES)
+STOP_MODE = 'low'
+
+# ma_mdi.py 의 전략 파라미터
+MA_MDI_PARAMS = {'mdi_window': 14, 'mdi_buy_thresh': 15, 'mdi_sell_thresh': 27}
+
+# 기본 탐색 범위 (--grid 로 덮어쓸 수 있음)
+DEFAULT_GRIDS = {
+    'ma_adx': {
+        'ma_short': [10, 15, 20, 25],
+        'ma_long': [40, 50, 60],
+        'adx_window': [14, 20, 30],
+        'adx_buy_thresh': [20, 23, 25],
+        'adx_sell_thresh': [18, 20, 22],
+        'stop_loss_pct': [0.04, 0.06, 0.08],
+    },
+    'ma_mdi': {
+        'ma_short': [10, 15, 20, 25],
+        'ma_long': [40, 50, 60],
+        'mdi_window': [10, 14, 20],
+        'mdi_buy_thresh': [10, 15, 20],
+        'mdi_sell_thresh': [22, 27, 32],
+        'stop_loss_pct': [0.04, 0.06, 0.08],
+    },
+}
+
+_worker_data = None
+_worker_shm = None
+_worker_cache = None
+_worker_digest = None
+
+
+# ───────────────────────────────
+# 공유 메모리
+# ───────────────────────────────
+def share_ohlcv(ohlcv_data):
+    # (n, 6) float64 배열: 타임스탬프(ms, float64 로 정확히 표현 가능) + OHLCV
+    values = np.column_stack([
+        ohlcv_data.index.asi8 // 1_000_000,
+        ohlcv_data[backtest_engine.OHLCV_COLUMNS].to_numpy(dtype=float),
+    ]).astype(float)
+    shm = shared_memory.SharedMemory(create=True, size=max(values.nbytes, 1))
+    shared = np.ndarray(values.shape, dtype=float, buffer=shm.buf)
+    shared[:] = values
+    return shm, values.shape
+
+
+def attach_ohlcv(name, shape):
+    shm = shared_memory.SharedMemory(name=name)
+    values = np.ndarray(shape, dtype=float, buffer=shm.buf)
+    index = pd.DatetimeIndex(pd.to_datetime(values[:, 0].astype(np.int64), unit='ms'), name='timestamp')
+    ohlcv_data = pd.DataFrame(values[:, 1:], index=index, columns=backtest_engine.OHLCV_COLUMNS, copy=False)
+    return shm, ohlcv_data
+
+
+def _init_worker(name, shape, cache_args=None, digest=None):
+    global _worker_shm, _worker_data, _worker_cache, _worker_digest
+    _worker_shm, _worker_data = attach_ohlcv(name, shape)
+    if cache_args is not None:
+        _worker_cache = BacktestCache(*cache_args)
+        _worker_digest = digest
+
+
+def evaluate_group(ohlcv_data, strategy, combos, cache=None, digest=None, stop_mode=STOP_MODE):
+    # 지표 파라미터가 같은 조합 묶음을 한 번의 브로드캐스트 시뮬레이션으로 평가
+    if cache is None:
+        return _evaluate_group(ohlcv_data, strategy, combos, stop_mode=stop_mode)
+
+    # 조합별로 캐시를 찾고, 없는 조합만 모아 한 번에 시뮬레이션 (겹치는 스윕은 새 조합만 계산)
+    digest = digest or data_digest(ohlcv_data)
+    # 조합별 결과는 이 모듈의 warmup_bars / simulate_group 에도 달려 있으므로 이 모듈 소스도 키에 넣음
+    keys = [cache.key('sweep', digest, modules=(sys.modules[__name__],), strategy=strategy, combo=combo,
+                      stop_mode=stop_mode)
+            for combo in combos]
+    rows = [cache.get(key) for key in keys]
+    missing = [j for j, row in enumerate(rows) if row is None]
+    if missing:
+        computed = _evaluate_group(ohlcv_data, strategy, [combos[j] for j in missing], cache, digest, stop_mode)
+        for j, row in zip(missing, computed):
+            rows[j] = cache.put(keys[j], row)
+    return rows
+
+
+def _evaluate_group(ohlcv_data, strategy, combos, cache=None, digest=None, stop_mode=STOP_MODE):
+    config = STRATEGIES[strategy]
+    first = combos[0]
+    if cache is not None:
+        indicators = backtest_cache.indicators(cache, ohlcv_data, strategy, first['ma_short'], first['ma_long'],
+                                               first[config['window']], digest=digest)
+    else:
+        indicators = config['indicators'](ohlcv_data, first['ma_short'], first['ma_long'], first[config['window']])
+    rows = backtest_engine.decision_rows(ohlcv_data, indicators, warmup_bars(strategy, first))
+    return simulate_group(ohlcv_data, strategy, combos, indicators, rows, stop_mode)[0]
+
+
+def warmup_bars(strategy, params):
+    # 지표가 모두 유효해지기 전까지 판단을 시작하지 않는 봉 수 (simulate_ma_adx 와 같은 기준)
+    return max(params['ma_long'], params[STRATEGIES[strategy]['window']] * 2)
+
+
+def simulate_group(ohlcv_data, strategy, combos, indicators, rows, stop_mode=STOP_MODE):
+    # 지표와 판단 행이 정해진 조합 묶음을 한 번에 시뮬레이션: (조합별 결과 dict 목록, 그리드 결과)
+    config = STRATEGIES[strategy]
+    first = combos[0]
+    buy_signal, sell_signal = backtest_engine.threshold_signals(
+        strategy, indicators,
+        [combo[config['buy']] for combo in combos],
+        [combo[config['sell']] for combo in combos],
+    )
+    grid_result = backtest_engine.simulate_threshold_grid(
+        ohlcv_data, indicators, rows, buy_signal, sell_signal,
+        stop_loss_pct=[combo['stop_loss_pct'] for combo in combos],
+        min_krw_trade=first['min_krw_trade'],
+        trade_fee_rate=first['trade_fee_rate'],
+        initial_krw=first['initial_krw'],
+        stop_mode=stop_mode,
+    )
+    summary = backtest_engine.summarize_grid(grid_result, ohlcv_data, rows, first['initial_krw'])
+    table = [{**combo, **{key: values[j] for key, values in summary.items()}} for j, combo in enumerate(combos)]
+    return table, grid_result
+
+
+def _run_group(task):
+    strategy, combos, stop_mode = task
+    return evaluate_group(_worker_data, strategy, combos, cache=_worker_cache, digest=_worker_digest,
+                          stop_mode=stop_mode)
+
+
+# ───────────────────────────────
+# 스윕 실행
+# ───────────────────────────────
+def expand_grid(grid, base_params, strategy='ma_adx'):
+    # 조합을 지표 파라미터별 묶음으로 나눠서 반환: [[조합, ...], ...]
+    window_key = STRATEGIES[strategy]['window']
+    keys = list(grid)
+    groups = {}
+    for values in itertools.product(*(grid[key] for key in keys)):
+        params = {**base_params, **dict(zip(keys, values))}
+        if params['ma_short'] >= params['ma_long']:
+            continue
+        groups.setdefault((params['ma_short'], params['ma_long'], params[window_key]), []).append(params)
+    return list(groups.values())
+
+
+def run_sweep(ohlcv_data, grid, base_params, strategy='ma_adx', workers=None, cache=None, stop_mode=STOP_MODE):
+    tasks = [(strategy, combos, stop_mode) for combos in expand_grid(grid, base_params, strategy)]
+    workers = workers or os.cpu_count()
+    cache_args = (cache.directory, cache.max_bytes) if cache is not None else None
+    digest = data_digest(ohlcv_data) if cache is not None else None
+
+    shm, shape = share_ohlcv(ohlcv_data)
+    try:
+        with Pool(workers, initializer=_init_worker, initargs=(shm.name, shape, cache_args, digest)) as pool:
+            rows = [row for group in pool.imap_unordered(_run_group, tasks) for row in group]
+    finally:
+        shm.close()
+        shm.unlink()
+
+    table = pd.DataFrame(rows)
+    if table.empty:
+        return table
+    table.sort_values(['total_return', 'max_drawdown'], ascending=[False, False], inplace=True)
+    table.reset_index(drop=True, inplace=True)
+    table.index += 1
+    return table
+
+
+def print_table(table, strategy='ma_adx', top=20):
+    columns = [key for key in DEFAULT_GRIDS[strategy] if key in table.columns]
+    shown = table.head(top)[columns + ['total_return', 'monthly_avg_return', 'max_drawdown', 'trades']].copy()
+    for column in ['total_return', 'monthly_avg_return', 'max_drawdown']:
+        shown[column] = (shown[column] * 100).map(lambda v: f"{v:.2f}%")
+    print(shown.to_string())
+
+
+if __name__ == "__main__":
+    import backtest_bot
+
+    parser = argparse.ArgumentParser(description="MA/ADX · MA/MDI 전략 파라미터 스윕")
+    parser.add_argument('--strategy', choices=list(STRATEGIES), default='ma_adx', help="스윕할 전략")
+    parser.add_argument('--grid', type=str, default=None,
+                        help='JSON 파라미터 범위, 예: \'{"ma_short": [10, 20], "adx_buy_thresh": [20, 25]}\'')
+    parser.add_argument('--workers', type=int, default=None, help="워커 프로세스 수 (기본: CPU 코어 수)")
+    parser.add_argument('--top', type=int, default=20, help="출력할 상위 조합 수")
+    parser.add_argument('--output', type=str, default=None, help="전체 결과 CSV 저장 경로")
+    parser.add_argument('--no-cache', action='store_true', help="지표·결과 디스크 캐시를 쓰지 않기")
+    parser.add_argument('--stop', choices=backtest_engine.GRID_STOP_MODES, default=backtest_bot.STOP_MODE,
+                        help="손절 판정: low(봉 저가, backtest_bot 기본) / close(종가)")
+    args = parser.parse_args()
+
+    grid = {**DEFAULT_GRIDS[args.strategy], **(json.loads(args.grid) if args.grid else {})}
+    base_params = backtest_bot.strategy_params()
+    if args.strategy == 'ma_mdi':
+        base_params = {key: value for key, value in base_params.items() if not key.startswith('adx_')}
+        base_params.update(MA_MDI_PARAMS)
+    ohlcv_data = backtest_bot.load_backtest_data()
+    if ohlcv_data.empty:
+        raise SystemExit("❌ 지정된 기간의 데이터를 가져오지 못했습니다.")
+
+    started = time.perf_counter()
+    table = run_sweep(ohlcv_data, grid, base_params, strategy=args.strategy, workers=args.workers,
+                      cache=None if args.no_cache else BacktestCache.from_env(), stop_mode=args.stop)
+    print(f"✅ {len(table)}개 조합 완료 ({time.perf_counter() - started:.1f}초, 손절 판정: {args.stop})\n")
+    print_table(table, strategy=args.strategy, top=args.top)
+    if args.output:
+        table.to_csv(args.output, index_label='rank')
+        print(f"\n💾 결과 저장: {args.output}")
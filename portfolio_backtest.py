@@ -0,0 +1,336 @@
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+import backtest_cache
+import backtest_engine
+from backtest_cache import BacktestCache
+
+# ───────────────────────────────
+# 다중 자산 포트폴리오 백테스트 (시간 × 심볼 가격 패널, 벡터화)
+#
+# backtest_bot.run_backtest 는 BTC/KRW 한 종목을 전액 매수/전량 매도로만 시뮬레이션합니다.
+# 여기서는 여러 KRW 마켓의 일봉을 같은 날짜 축의 (시간 × 심볼) 패널로 맞춘 뒤
+#   • 지표는 심볼마다 자기 상장 구간에 대해 한 번만 계산하고 (backtest_engine 과 같은 값, 캐시 사용 가능)
+#   • 시간 루프 한 번에 모든 심볼의 손절·매수·매도를 (심볼,) 배열 연산으로 처리합니다.
+# 현금은 모든 종목이 같이 쓰며, 매수 금액은 자금 배분 규칙(SPLIT_RULES)으로 정합니다.
+#   • cash:   그날 매수 신호가 난 종목들이 남은 KRW 를 똑같이 나눠 씀 (종목이 하나면 backtest_bot 과 같은 결과)
+#   • equal:  총자산 / max_positions 를 종목당 한도로, 빈 자리만큼 신호가 강한 순으로 매수
+#   • weight: 종목별 목표 비중 × 총자산 (남은 KRW 가 모자라면 비율대로 줄임)
+# 손절은 종목별 손절 비율(스칼라 또는 심볼별)로, 'close'(종가) 또는 'low'(저가가 닿으면 손절가·갭 하락이면 시가)로
+# 판정하고, 매수·매도·손절 모두 수수료를 뺍니다. 한 봉 안의 순서는 backtest_engine.run_ma_adx_rows 와 같습니다
+# (손절한 종목은 그날 매수/매도를 건너뜀 → 매수 → 매도).
+# ───────────────────────────────
+
+SPLIT_RULES = ('cash', 'equal', 'weight')
+PORTFOLIO_STOP_MODES = ('close', 'low')
+DEFAULT_MAX_POSITIONS = 10
+
+# 전략별 지표 · 신호 (param_sweep.STRATEGIES 와 같은 파라미터 이름)
+STRATEGIES = {
+    'ma_adx': {'window': 'adx_window', 'buy': 'adx_buy_thresh', 'sell': 'adx_sell_thresh', 'column': 'adx'},
+    'ma_mdi': {'window': 'mdi_window', 'buy': 'mdi_buy_thresh', 'sell': 'mdi_sell_thresh', 'column': 'mdi'},
+}
+
+
+# ───────────────────────────────
+# 1. 가격 패널
+# ───────────────────────────────
+def build_panel(frames):
+    """{심볼: backtest_bot.ohlcv_frame 형식 DataFrame} → 같은 날짜 축의 (시간 × 심볼) 배열 dict.
+
+    상장 전(첫 봉 이전) 칸은 NaN 이고, 상장 후 거래가 없던 날은 직전 종가로 채운 보합 봉입니다.
+    """
+    symbols = [symbol for symbol, frame in frames.items() if not frame.empty]
+    index = pd.DatetimeIndex(sorted(set().union(*(frames[symbol].index for symbol in symbols))), name='timestamp')
+    panel = {'index': index, 'symbols': symbols}
+    aligned = {symbol: frames[symbol][~frames[symbol].index.duplicated()].reindex(index) for symbol in symbols}
+    close = pd.DataFrame({symbol: aligned[symbol]['close'] for symbol in symbols}, index=index).ffill()
+    panel['close'] = close.to_numpy(dtype=float)
+    for column in ('open', 'high', 'low'):
+        values = pd.DataFrame({symbol: aligned[symbol][column] for symbol in symbols}, index=index)
+        panel[column] = values.fillna(close).to_numpy(dtype=float)
+    panel['listed'] = np.array([index.get_loc(frames[symbol].index[0]) for symbol in symbols], dtype=np.int64)
+    return panel
+
+
+def symbol_frame(panel, j):
+    # 패널에서 심볼 j 의 상장 이후 구간을 backtest_engine 이 받는 DataFrame 으로
+    start = panel['listed'][j]
+    data = {column: panel[column][start:, j] for column in ('open', 'high', 'low', 'close')}
+    data['vol'] = np.zeros(len(panel['index']) - start)
+    return pd.DataFrame(data, index=panel['index'][start:], columns=backtest_engine.OHLCV_COLUMNS)
+
+
+# ───────────────────────────────
+# 2. 지표 · 신호 (심볼별 1회 계산 → 패널)
+# ───────────────────────────────
+def panel_indicators(panel, strategy, ma_short, ma_long, window, cache=None):
+    """(시간 × 심볼) 지표 행렬 dict: ma_short, ma_long, adx|mdi, 그리고 판단 가능 여부 active."""
+    n, count = panel['close'].shape
+    column = STRATEGIES[strategy]['column']
+    values = {key: np.full((n, count), np.nan) for key in ('ma_short', 'ma_long', column)}
+    active = np.zeros((n, count), dtype=bool)
+    compute = (backtest_engine.compute_ma_adx_indicators if strategy == 'ma_adx'
+               else backtest_engine.compute_ma_mdi_indicators)
+    for j in range(count):
+        frame = symbol_frame(panel, j)
+        start = panel['listed'][j]
+        if cache is not None:
+            indicators = backtest_cache.indicators(cache, frame, strategy, ma_short, ma_long, window)
+        else:
+            indicators = compute(frame, ma_short, ma_long, window)
+        for key in values:
+            values[key][start:, j] = indicators[key]
+        # backtest_engine.decision_rows 와 같은 시작 봉, 지표가 모두 유효한 봉만
+        rows = np.arange(len(frame))
+        active[start:, j] = (rows >= max(ma_long, window * 2)) & backtest_engine.valid_rows(frame, indicators)
+    values['active'] = active
+    return values
+
+
+def panel_signals(strategy, indicators, buy_thresh, sell_thresh):
+    # (시간 × 심볼) 매수/매도 신호와 매수 우선순위(클수록 먼저)
+    golden = indicators['ma_short'] > indicators['ma_long']
+    death = indicators['ma_short'] < indicators['ma_long']
+    active = indicators['active']
+    if strategy == 'ma_adx':
+        adx = indicators['adx']
+        return active & golden & (adx > buy_thresh), active & (death | (adx < sell_thresh)), adx
+    mdi = indicators['mdi']
+    return active & golden & (mdi <= buy_thresh), active & (death | (mdi >= sell_thresh)), -mdi
+
+
+# ───────────────────────────────
+# 3. 포트폴리오 시뮬레이션 (시간 루프 1회, 심볼 축 벡터 연산)
+# ───────────────────────────────
+def buy_amounts(rule, candidates, strength, krw, equity, holding, min_krw_trade, max_positions, weights):
+    """이번 봉 매수 금액 (심볼,) 배열. candidates 는 매수 후보 인덱스 배열입니다."""
+    amounts = np.zeros(len(holding))
+    if len(candidates) == 0 or krw < min_krw_trade:
+        return amounts
+    order = candidates[np.argsort(-strength[candidates], kind='stable')]
+    if rule == 'cash':
+        # 남은 KRW 를 똑같이 나눴을 때 최소 주문 금액 이상이 되는 만큼만 (강한 순)
+        order = order[:max(1, min(len(order), int(krw // min_krw_trade)))]
+        amounts[order] = krw / len(order)
+    elif rule == 'equal':
+        order = order[:max(0, max_positions - int(holding.sum()))]
+        if len(order):
+            amounts[order] = min(equity / max_positions, krw / len(order))
+    else:
+        targets = equity * weights[order]
+        total = targets.sum()
+        amounts[order] = targets * min(1.0, krw / total) if total > 0 else 0.0
+    amounts[amounts < min_krw_trade] = 0.0
+    return amounts
+
+
+def simulate_portfolio(panel, active, buy_signal, sell_signal, strength, stop_loss_pct, min_krw_trade, trade_fee_rate,
+                       initial_krw, rule='cash', max_positions=DEFAULT_MAX_POSITIONS, weights=None,
+                       stop_mode='close'):
+    """패널 전체 봉을 한 번 진행하며 모든 심볼을 함께 시뮬레이션합니다.
+
+    반환값: values (판단 봉별 총자산), trades (거래 DataFrame), 종목별 최종 수량·거래 수·손익 등.
+    """
+    if rule not in SPLIT_RULES:
+        raise ValueError(f"알 수 없는 자금 배분 규칙: {rule} ({', '.join(SPLIT_RULES)})")
+    if stop_mode not in PORTFOLIO_STOP_MODES:
+        raise ValueError(f"알 수 없는 손절 판정 방식: {stop_mode} ({', '.join(PORTFOLIO_STOP_MODES)})")
+    symbols = panel['symbols']
+    count = len(symbols)
+    opens, lows, closes = panel['open'], panel['low'], panel['close']
+    stop_mult = 1 - np.broadcast_to(np.asarray(stop_loss_pct, dtype=float), (count,))
+    fee_mult = 1 - trade_fee_rate
+    if rule == 'weight':
+        weights = np.broadcast_to(np.asarray(weights if weights is not None else 1 / count, dtype=float), (count,))
+
+    krw = float(initial_krw)
+    units = np.zeros(count)
+    last_buy = np.full(count, np.nan)
+    invested = np.zeros(count)        # 종목별 누적 매수 금액 / 매도 금액 (손익 기여도)
+    returned = np.zeros(count)
+    trade_counts = np.zeros(count, dtype=np.int64)
+    fees = 0.0
+    events = []                        # (행, 심볼, 종류, 가격, 수량, 금액)
+
+    # 어느 한 심볼이라도 판단을 시작할 수 있는 봉부터 (backtest_engine.decision_rows 의 시작 봉)
+    started = np.flatnonzero(active.any(axis=1))
+    rows = np.arange(started[0] if len(started) else len(closes), len(closes))
+    values = np.empty(len(rows))
+
+    for step, cur in enumerate(rows.tolist()):
+        close = closes[cur]
+        held = units > 0
+        equity = krw + (units[held] * close[held]).sum()
+        values[step] = equity
+
+        # 손절 (손절한 종목은 이번 봉 매수/매도 판단을 건너뜀)
+        stop_price = last_buy * stop_mult
+        if stop_mode == 'close':
+            stop = held & (close <= stop_price)
+            fill = close
+        else:
+            stop = held & (lows[cur] <= stop_price)
+            fill = np.minimum(opens[cur], stop_price)
+        if stop.any():
+            idx = np.flatnonzero(stop)
+            gained = units[idx] * fill[idx] * fee_mult
+            krw += gained.sum()
+            fees += (units[idx] * fill[idx]).sum() * trade_fee_rate
+            returned[idx] += gained
+            events.extend(zip([cur] * len(idx), idx, ['SELL (Stop Loss)'] * len(idx), fill[idx], units[idx], gained))
+            units[idx] = 0.0
+            last_buy[idx] = np.nan
+
+        # 매수
+        candidates = np.flatnonzero(~stop & buy_signal[cur] & (units == 0))
+        amounts = buy_amounts(rule, candidates, strength[cur], krw, equity, units > 0, min_krw_trade,
+                              max_positions, weights)
+        bought = np.flatnonzero(amounts > 0)
+        if len(bought):
+            spent = amounts[bought]
+            units[bought] = (spent * fee_mult) / close[bought]
+            last_buy[bought] = close[bought]
+            # cash 규칙은 남은 KRW 를 전부 나눠 쓰므로 나눗셈 잔여 오차 없이 0 으로
+            krw = 0.0 if rule == 'cash' else krw - spent.sum()
+            fees += spent.sum() * trade_fee_rate
+            invested[bought] += spent
+            events.extend(zip([cur] * len(bought), bought, ['BUY'] * len(bought), close[bought], units[bought], spent))
+
+        # 매도
+        sell = ~stop & sell_signal[cur] & (units > 0)
+        if sell.any():
+            idx = np.flatnonzero(sell)
+            gained = units[idx] * close[idx] * fee_mult
+            krw += gained.sum()
+            fees += (units[idx] * close[idx]).sum() * trade_fee_rate
+            returned[idx] += gained
+            events.extend(zip([cur] * len(idx), idx, ['SELL'] * len(idx), close[idx], units[idx], gained))
+            units[idx] = 0.0
+            last_buy[idx] = np.nan
+
+        trade_counts += stop + sell
+        trade_counts[bought] += 1
+
+    trades = pd.DataFrame(events, columns=['row', 'symbol', 'type', 'price', 'units', 'krw'])
+    trades.insert(0, 'date', panel['index'][trades['row'].to_numpy(dtype=np.int64)])
+    trades['symbol'] = [symbols[j] for j in trades['symbol']]
+    last_close = closes[-1] if len(closes) else np.zeros(count)
+    holdings_value = np.where(units > 0, units * last_close, 0.0)
+    return {
+        'rows': rows,
+        'values': values,
+        'trades': trades.drop(columns='row'),
+        'krw_balance': krw,
+        'units': units,
+        'final_value': krw + holdings_value.sum(),
+        'symbol_pnl': returned + holdings_value - invested,
+        'symbol_trades': trade_counts,
+        'fees': fees,
+    }
+
+
+
+def run_portfolio(panel, strategy, params, rule='cash', max_positions=DEFAULT_MAX_POSITIONS, weights=None,
+                  stop_mode='close', cache=None):
+    # params: backtest_bot.strategy_params() 형식 (ma_mdi 는 param_sweep.MA_MDI_PARAMS 이름). stop_loss_pct 는 심볼별 배열도 가능
+    config = STRATEGIES[strategy]
+    indicators = panel_indicators(panel, strategy, params['ma_short'], params['ma_long'], params[config['window']],
+                                  cache=cache)
+    buy_signal, sell_signal, strength = panel_signals(strategy, indicators, params[config['buy']],
+                                                      params[config['sell']])
+    return simulate_portfolio(panel, indicators['active'], buy_signal, sell_signal, strength,
+                              params['stop_loss_pct'], params['min_krw_trade'], params['trade_fee_rate'],
+                              params['initial_krw'], rule=rule, max_positions=max_positions, weights=weights,
+                              stop_mode=stop_mode)
+
+
+# ───────────────────────────────
+# 4. 성과 요약
+# ───────────────────────────────
+def portfolio_values(result, panel):
+    # backtest_engine.monthly_returns / max_drawdown 이 받는 [{'date', 'value'}] 형식
+    dates = panel['index'][result['rows']].date
+    return [{'date': date, 'value': value} for date, value in zip(dates, result['values'].tolist())]
+
+
+def summarize_portfolio(result, panel, initial_krw):
+    values = portfolio_values(result, panel)
+    _, returns = backtest_engine.monthly_returns(values, initial_krw)
+    valid_returns = returns.dropna() if returns is not None else pd.Series(dtype=float)
+    return {
+        'total_return': result['final_value'] / initial_krw - 1,
+        'monthly_avg_return': valid_returns.mean() if not valid_returns.empty else np.nan,
+        'max_drawdown': backtest_engine.max_drawdown(values),
+        'trades': len(result['trades']),
+        'fees': result['fees'],
+        'final_value': result['final_value'],
+    }
+
+
+def symbol_table(result, panel):
+    table = pd.DataFrame({'pnl': result['symbol_pnl'], 'trades': result['symbol_trades'],
+                          'holding': result['units'] > 0}, index=pd.Index(panel['symbols'], name='symbol'))
+    return table.sort_values('pnl', ascending=False)
+
+
+if __name__ == "__main__":
+    import ccxt
+
+    import backtest_bot
+    import param_sweep
+    from candle_store import CandleStore
+
+    parser = argparse.ArgumentParser(description="여러 KRW 마켓에 MA/ADX · MA/MDI 전략을 함께 돌리는 포트폴리오 백테스트")
+    parser.add_argument('--strategy', choices=list(STRATEGIES), default='ma_adx')
+    parser.add_argument('--symbols', default=None, help="쉼표로 구분한 심볼 (기본: 24시간 거래대금 상위 --top 개)")
+    parser.add_argument('--top', type=int, default=50, help="--symbols 가 없을 때 거래대금 상위 마켓 수")
+    parser.add_argument('--start', default=backtest_bot.START_DATE)
+    parser.add_argument('--end', default=backtest_bot.END_DATE)
+    parser.add_argument('--rule', choices=SPLIT_RULES, default='equal', help="자금 배분 규칙")
+    parser.add_argument('--max-positions', type=int, default=DEFAULT_MAX_POSITIONS, help="equal 규칙의 동시 보유 종목 수")
+    parser.add_argument('--stop', choices=PORTFOLIO_STOP_MODES, default='low', help="손절 판정: close(종가) / low(저가)")
+    parser.add_argument('--no-cache', action='store_true', help="지표 디스크 캐시(backtest_cache)를 쓰지 않기")
+    args = parser.parse_args()
+
+    if args.symbols:
+        symbols = [symbol.strip() for symbol in args.symbols.split(',') if symbol.strip()]
+    else:
+        # 티커 일괄 조회 한 번으로 KRW 마켓 거래대금 순위
+        tickers = backtest_bot.upbit.fetch_tickers(None, {'quote_currencies': 'KRW'})
+        ranked = sorted(tickers.values(), key=lambda ticker: ticker.get('quoteVolume') or 0, reverse=True)
+        symbols = [ticker['symbol'] for ticker in ranked[:args.top]]
+
+    store = CandleStore()
+    frames = {}
+    for symbol in symbols:
+        try:
+            frames[symbol] = backtest_bot.fetch_historical_ohlcv(backtest_bot.upbit, symbol, backtest_bot.timeframe,
+                                                                 args.start, args.end, store=store)
+        except ccxt.BaseError as e:
+            print(f"⚠️ {symbol} 캔들을 받지 못해 제외합니다: {e}")
+    panel = build_panel(frames)
+    if not panel['symbols']:
+        raise SystemExit("❌ 지정된 기간의 데이터를 가져오지 못했습니다.")
+
+    params = backtest_bot.strategy_params()
+    if args.strategy == 'ma_mdi':
+        params = {key: value for key, value in params.items() if not key.startswith('adx_')}
+        params.update(param_sweep.MA_MDI_PARAMS)
+
+    started = time.perf_counter()
+    result = run_portfolio(panel, args.strategy, params, rule=args.rule, max_positions=args.max_positions,
+                           stop_mode=args.stop, cache=None if args.no_cache else BacktestCache.from_env())
+    elapsed = time.perf_counter() - started
+    summary = summarize_portfolio(result, panel, params['initial_krw'])
+
+    print(f"\n✅ {len(panel['symbols'])}개 종목 × {len(panel['index'])}봉 포트폴리오 백테스트 ({elapsed:.2f}초, "
+          f"규칙 {args.rule}, 손절 {args.stop})")
+    print(f"최종 자산: {summary['final_value']:,.0f}원 | 총 수익률: {summary['total_return'] * 100:.2f}% | "
+          f"월평균 수익률: {summary['monthly_avg_return'] * 100:.2f}% | 최대 낙폭: {summary['max_drawdown'] * 100:.2f}%")
+    print(f"거래 {summary['trades']}회 | 수수료 {summary['fees']:,.0f}원\n")
+    table = symbol_table(result, panel)
+    print(table.head(10).to_string(formatters={'pnl': '{:,.0f}원'.format}))
@@ -0,0 +1,199 @@
+import argparse
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:   # Windows: 프로세스 간 잠금 없이 프로세스 안에서만 제한
+    fcntl = None
+
+# ───────────────────────────────
+# 계정 단위 API 요청 스케줄러
+#
+# 같은 계정으로 여러 봇을 동시에 돌리면 ccxt 클라이언트마다 따로 속도를 제한하므로(auto_trade_bot 은
+# 제한 없음) 합쳐서 업비트 한도를 넘기 쉽고, 하필 주문 순간에 429 를 맞을 수 있습니다.
+# RequestScheduler 는 업비트 요청 그룹별 토큰 버킷을 파일(잠금: fcntl.flock)에 두고 모든 프로세스가 같이 씁니다.
+#   • order:     주문 생성/취소           초당 8회  (계정)
+#   • exchange:  그 외 비공개 API(잔고 등)  초당 30회 (계정)
+#   • quotation: 시세 조회(현재가, 캔들)    초당 10회 (IP — 계정과 무관하게 공유)
+# 우선순위: HIGH 요청이 기다리는 동안에는 LOW 요청이 토큰을 가져가지 않고, LOW 는 reserve 개를 남겨 둡니다.
+# 주문 생성/취소와 주문 조회는 HIGH, 나머지 조회는 LOW 입니다.
+# 그룹별 대기 시간 통계(횟수, 평균/최대 대기)는 같은 파일에 누적되며 python request_scheduler.py 로 봅니다.
+# ───────────────────────────────
+
+DEFAULT_SCHEDULER_DIR = os.path.join(tempfile.gettempdir(), 'upbit_scheduler')
+GROUP_LIMITS = {               # 그룹 → (초당 요청 수, 최대 누적 토큰)
+    'order': (8, 8),
+    'exchange': (30, 30),
+    'quotation': (10, 10),
+}
+ACCOUNT_GROUPS = ('order', 'exchange')
+HIGH, LOW = 'high', 'low'
+LOW_RESERVE = 1.0              # LOW 요청이 남겨 두는 토큰
+HIGH_HOLD_SECONDS = 0.2        # HIGH 대기 표시의 유효 시간 (프로세스가 죽어도 저절로 풀림)
+
+
+def account_id(api_key):
+    # 파일 이름에 쓸 계정 식별자 (API 키 원문은 남기지 않음)
+    return hashlib.sha256(api_key.encode()).hexdigest()[:12] if api_key else 'public'
+
+
+def classify(api, method, path):
+    # ccxt fetch2 인자 → (그룹, 우선순위)
+    api = api[0] if isinstance(api, (list, tuple)) else api
+    if api != 'private':
+        return 'quotation', LOW
+    method = method.upper()
+    if path.startswith('order') and method in ('POST', 'DELETE'):
+        return 'order', HIGH
+    if path == 'order' or path.startswith('orders/'):
+        return 'exchange', HIGH
+    return 'exchange', LOW
+
+
+class RequestScheduler:
+    def __init__(self, account='public', directory=DEFAULT_SCHEDULER_DIR, limits=None, reserve=LOW_RESERVE):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.limits = dict(GROUP_LIMITS, **(limits or {}))
+        self.reserve = reserve
+        self.paths = {group: os.path.join(directory, f"{account if group in ACCOUNT_GROUPS else 'ip'}-{group}.json")
+                      for group in self.limits}
+        self._local_locks = {group: threading.Lock() for group in self.limits}
+        self._stats_lock = threading.Lock()
+        self.local_stats = {}    # (group, priority) → [횟수, 대기 합, 최대 대기]
+
+    @classmethod
+    def for_key(cls, api_key, **kwargs):
+        return cls(account_id(api_key), **kwargs)
+
+    # ── 토큰 버킷 (파일 공유) ──
+    def _update(self, group, change):
+        # 잠금을 잡은 채로 상태를 읽고 change(state) 결과를 돌려 주며 바뀐 상태를 저장
+        with self._local_locks[group], open(self.paths[group], 'a+') as f:
+            if fcntl:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            f.seek(0)
+            text = f.read()
+            state = json.loads(text) if text else {}
+            result = change(state)
+            f.seek(0)
+            f.truncate()
+            f.write(json.dumps(state))
+            f.flush()
+            return result
+
+    def _take(self, group, priority, cost, started, now):
+        # 토큰을 얻었으면 0 (대기 시간 통계도 같은 잠금 안에서 누적), 아니면 더 기다릴 시간
+        rate, burst = self.limits[group]
+
+        def taken(state, tokens):
+            state['tokens'] = tokens - cost
+            stat = state.setdefault('stats', {}).setdefault(priority, [0, 0.0, 0.0])
+            stat[0] += 1
+            stat[1] += now - started
+            stat[2] = max(stat[2], now - started)
+            return 0.0
+
+        def change(state):
+            tokens = state.get('tokens', float(burst))
+            updated = state.get('updated', now)
+            tokens = min(float(burst), tokens + max(now - updated, 0.0) * rate)
+            state['tokens'], state['updated'] = tokens, now
+            if priority == HIGH:
+                if tokens >= cost:
+                    return taken(state, tokens)
+                wait = (cost - tokens) / rate
+                state['high_until'] = max(state.get('high_until', 0.0), now + wait + HIGH_HOLD_SECONDS)
+                return wait
+            need = cost + min(self.reserve, burst - cost)
+            if now < state.get('high_until', 0.0):
+                return max(state['high_until'] - now, 1.0 / rate)
+            if tokens >= need:
+                return taken(state, tokens)
+            return (need - tokens) / rate
+
+        return self._update(group, change)
+
+    def acquire(self, group, priority=LOW, cost=1.0):
+        """토큰을 얻을 때까지 기다리고 대기 시간(초)을 돌려 줍니다."""
+        started = now = time.time()
+        while True:
+            wait = self._take(group, priority, cost, started, now)
+            if wait <= 0:
+                break
+            time.sleep(min(wait, 0.5))
+            now = time.time()
+        waited = now - started
+        with self._stats_lock:
+            stat = self.local_stats.setdefault((group, priority), [0, 0.0, 0.0])
+            stat[0] += 1
+            stat[1] += waited
+            stat[2] = max(stat[2], waited)
+        return waited
+
+    # ── 대기 시간 통계 ──
+    def stats(self, shared=False):
+        # {(그룹, 우선순위): {'count', 'avg_wait', 'max_wait'}} — shared=True 면 모든 프로세스 누적
+        if shared:
+            raw = {}
+            for group in self.limits:
+                state = self._update(group, lambda state: dict(state))
+                for priority, stat in state.get('stats', {}).items():
+                    raw[(group, priority)] = stat
+        else:
+            with self._stats_lock:
+                raw = {key: list(stat) for key, stat in self.local_stats.items()}
+        return {key: {'count': count, 'avg_wait': total / count if count else 0.0, 'max_wait': peak}
+                for key, (count, total, peak) in sorted(raw.items())}
+
+    def reset_stats(self):
+        for group in self.limits:
+            self._update(group, lambda state: state.pop('stats', None))
+
+    # ── ccxt 연결 ──
+    def attach(self, exchange):
+        """ccxt 거래소 객체의 모든 HTTP 요청(fetch2)이 스케줄러를 거치게 합니다.
+
+        ccxt 자체 속도 제한은 끄고 스케줄러가 대신합니다. fetch2 가 없는 객체(모의 거래소)는 그대로 둡니다.
+        """
+        original = getattr(exchange, 'fetch2', None)
+        if original is None:
+            return exchange
+
+        def fetch2(path, api='public', method='GET', params={}, headers=None, body=None, config={}):
+            group, priority = classify(api, method, path)
+            self.acquire(group, priority)
+            return original(path, api, method, params, headers, body, config)
+
+        exchange.fetch2 = fetch2
+        exchange.enableRateLimit = False
+        exchange.request_scheduler = self
+        return exchange
+
+
+def schedule(exchange, api_key=None, **kwargs):
+    # 봇에서 쓰는 단축 함수: upbit = schedule(ccxt.upbit({...}), api_key)
+    return RequestScheduler.for_key(api_key, **kwargs).attach(exchange)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="계정 단위 요청 스케줄러 대기 시간 통계")
+    parser.add_argument('--api-key', default=os.getenv('UPBIT_API_KEY'), help="계정 API 키 (기본: UPBIT_API_KEY)")
+    parser.add_argument('--dir', default=DEFAULT_SCHEDULER_DIR)
+    parser.add_argument('--reset', action='store_true', help="누적 통계 초기화")
+    args = parser.parse_args()
+
+    scheduler = RequestScheduler.for_key(args.api_key, directory=args.dir)
+    if args.reset:
+        scheduler.reset_stats()
+        print("🧹 대기 시간 통계 초기화")
+    else:
+        print(f"📊 요청 대기 시간 ({args.dir})")
+        for (group, priority), stat in scheduler.stats(shared=True).items():
+            print(f"  {group:<10} {priority:<5} {stat['count']:>8,}회 | 평균 {stat['avg_wait'] * 1000:8.1f}ms | "
+                  f"최대 {stat['max_wait'] * 1000:8.1f}ms")
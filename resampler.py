@@ -0,0 +1,253 @@
+import argparse
+import time
+from collections import deque
+
+import numpy as np
+
+from candle_store import CandleStore, timeframe_ms
+
+# ───────────────────────────────
+# 1분봉 하나로 여러 timeframe 만들기 (로컬 리샘플링)
+#
+# RSI 봇은 1h, ma_adx/ma_mdi 는 1d, backtest_bot 도 1d 를 따로 받아서 timeframe 마다 API 호출과 저장 공간이
+# 따로 들었습니다. 여기서는 1분봉 한 줄기에서 상위 봉을 만듭니다.
+#   • resample_ohlcv: 저장된 1분봉 배열 → 상위 봉 (reduceat 벡터 연산, 청크 경계는 resample_chunks 가 이어 붙임)
+#   • Resampler:      1분이 마감될 때마다 update(bar) 로 상위 봉을 증분 갱신하고,
+#                     ohlcv(timeframe, limit) 로 ccxt fetch_ohlcv 와 같은 모양(마지막 봉은 진행 중)을 돌려줌
+#   • MinuteStream:   거래소에서 마감된 1분봉만 이어 받아 Resampler 에 넣음 (심볼당 시세 조회 한 줄기)
+#
+# 봉 경계는 업비트와 같습니다. 업비트 일봉은 KST 09:00(= UTC 00:00)에 시작하므로 기본값 daily_open='utc',
+# KST 자정 기준 일봉이 필요하면 daily_open='kst' 입니다. 분/시간봉은 UTC 기준 배수(240분봉: KST 01·05·09·13·17·21시),
+# 주봉은 월요일, 월봉은 매월 1일 (모두 일봉 시작 시각 기준) 에 시작합니다.
+# 업비트처럼 거래가 없던 구간(1분봉이 없는 구간)에는 상위 봉도 만들지 않습니다.
+# ───────────────────────────────
+
+TS, OPEN, HIGH, LOW, CLOSE, VOLUME = range(6)
+
+BASE_TIMEFRAME = '1m'
+DAY_MS = 86_400_000
+DAILY_OPEN_OFFSETS = {
+    'utc': 0,                      # 업비트 일봉 (KST 09:00)
+    'kst': 15 * 3_600_000,         # KST 자정 (= UTC 15:00)
+}
+MONDAY_MS = 4 * DAY_MS              # 1970-01-01 은 목요일 → 첫 월요일은 01-05
+
+
+# ───────────────────────────────
+# 1. 봉 경계
+# ───────────────────────────────
+def bucket_starts(ts, timeframe, daily_open='utc'):
+    """각 타임스탬프(ms)가 속한 timeframe 봉의 시작 시각 (배열이면 배열, 정수면 정수)."""
+    unit, count = timeframe[-1], int(timeframe[:-1])
+    offset = DAILY_OPEN_OFFSETS[daily_open]
+    if unit in ('m', 'h'):
+        step = timeframe_ms(timeframe)
+        # 일봉 경계보다 긴 분/시간 봉(예: 12h)도 일봉 시작 시각에 맞춰 정렬
+        shift = offset if step > 3_600_000 else 0
+        return ts - (ts - shift) % step
+    if unit == 'd':
+        return ts - (ts - offset) % (count * DAY_MS)
+    if unit == 'w':
+        return ts - (ts - offset - MONDAY_MS) % (count * 7 * DAY_MS)
+    if unit == 'M':
+        ts = np.asarray(ts, dtype=np.int64)
+        months = (ts - offset).astype('datetime64[ms]').astype('datetime64[M]').astype(np.int64)
+        months -= months % count
+        return months.astype('datetime64[M]').astype('datetime64[ms]').astype(np.int64) + offset
+    raise ValueError(f"지원하지 않는 timeframe: {timeframe}")
+
+
+def bucket_start(ts, timeframe, daily_open='utc'):
+    # 1분봉마다 부르는 증분 경로라 배열을 만들지 않고 정수로 계산 (월봉만 datetime64)
+    if timeframe[-1] == 'M':
+        return int(bucket_starts(np.array([ts], dtype=np.int64), timeframe, daily_open)[0])
+    return int(bucket_starts(int(ts), timeframe, daily_open))
+
+
+# ───────────────────────────────
+# 2. 배열 리샘플링 (저장된 1분봉)
+# ───────────────────────────────
+def resample_ohlcv(ohlcv, timeframe, daily_open='utc'):
+    """시간순 (n, 6) OHLCV → timeframe 봉 (m, 6) float 배열. 시가=첫 시가, 고가=최고, 저가=최저, 종가=마지막, 거래량=합."""
+    bars = np.asarray(ohlcv, dtype=float).reshape(-1, 6)
+    if len(bars) == 0:
+        return np.zeros((0, 6))
+    starts = bucket_starts(bars[:, TS].astype(np.int64), timeframe, daily_open)
+    first = np.flatnonzero(np.r_[True, starts[1:] != starts[:-1]])
+    last = np.r_[first[1:] - 1, len(bars) - 1]
+    out = np.empty((len(first), 6))
+    out[:, TS] = starts[first]
+    out[:, OPEN] = bars[first, OPEN]
+    out[:, HIGH] = np.maximum.reduceat(bars[:, HIGH], first)
+    out[:, LOW] = np.minimum.reduceat(bars[:, LOW], first)
+    out[:, CLOSE] = bars[last, CLOSE]
+    out[:, VOLUME] = np.add.reduceat(bars[:, VOLUME], first)
+    return out
+
+
+def merge_bar(bar, other):
+    # 같은 봉 구간의 두 부분(bar 가 먼저)을 합침
+    return [bar[TS], bar[OPEN], max(bar[HIGH], other[HIGH]), min(bar[LOW], other[LOW]), other[CLOSE],
+            bar[VOLUME] + other[VOLUME]]
+
+
+def resample_chunks(chunks, timeframe, daily_open='utc'):
+    """(n, 6) 청크 이터레이터 → 상위 봉 청크. 청크 경계에 걸친 봉은 다음 청크와 합친 뒤 내보냅니다."""
+    pending = None
+    for chunk in chunks:
+        bars = resample_ohlcv(chunk, timeframe, daily_open)
+        if len(bars) == 0:
+            continue
+        if pending is not None:
+            if bars[0, TS] == pending[TS]:
+                bars[0] = merge_bar(pending, bars[0])
+            else:
+                bars = np.vstack([pending, bars])
+        pending = bars[-1].copy()
+        if len(bars) > 1:
+            yield bars[:-1]
+    if pending is not None:
+        yield pending.reshape(1, 6)
+
+
+def resample_store(store, symbol, timeframe, start_ms, end_ms, daily_open='utc', chunk_size=100_000):
+    # 캔들 저장소의 1분봉 [start_ms, end_ms] → timeframe 봉 (m, 6) 배열 (1분봉은 청크 단위로 읽음)
+    chunks = (np.array(rows, dtype=float)
+              for rows in store.iter_chunks(symbol, BASE_TIMEFRAME, start_ms, end_ms, chunk_size))
+    parts = list(resample_chunks(chunks, timeframe, daily_open))
+    return np.vstack(parts) if parts else np.zeros((0, 6))
+
+
+# ───────────────────────────────
+# 3. 증분 리샘플러 (마감된 1분봉마다 갱신)
+# ───────────────────────────────
+class Resampler:
+    """마감된 1분봉을 update() 로 넣으면 timeframe 별 상위 봉을 증분 갱신합니다."""
+
+    def __init__(self, timeframes, daily_open='utc', history=1000):
+        self.timeframes = list(timeframes)
+        self.daily_open = daily_open
+        self.history = history
+        self.last_ts = None                                                  # 마지막으로 반영한 1분봉 시각
+        self._closed = {tf: deque(maxlen=history) for tf in self.timeframes}  # 마감된 봉
+        self._current = {tf: None for tf in self.timeframes}                 # 진행 중인 봉
+        self._seeded = set()
+
+    def update(self, bar):
+        """1분봉 하나 반영. {timeframe: 이번에 마감된 봉} 을 돌려줍니다 (이미 반영한 시각이면 무시)."""
+        if self.last_ts is not None and bar[TS] <= self.last_ts:
+            return {}
+        minute = [int(bar[TS]), float(bar[OPEN]), float(bar[HIGH]), float(bar[LOW]), float(bar[CLOSE]),
+                  float(bar[VOLUME])]
+        closed = {}
+        for tf in self.timeframes:
+            start = bucket_start(minute[TS], tf, self.daily_open)
+            current = self._current[tf]
+            if current is not None and current[TS] == start:
+                self._current[tf] = merge_bar(current, minute)
+                continue
+            if current is not None:
+                self._closed[tf].append(current)
+                closed[tf] = current
+            self._current[tf] = [start] + minute[1:]
+        self.last_ts = minute[TS]
+        return closed
+
+    def extend(self, bars):
+        for bar in bars:
+            self.update(bar)
+
+    def seed(self, timeframe, ohlcv):
+        """워밍업용 과거 봉(거래소에서 직접 받은 것)을 앞쪽에 채웁니다. 1분봉으로 만든 구간보다 앞선 봉만 씁니다."""
+        closed = self._closed[timeframe]
+        current = self._current[timeframe]
+        first = closed[0][TS] if closed else (current[TS] if current is not None else None)
+        older = [list(bar[:6]) for bar in ohlcv if first is None or bar[TS] < first]
+        if first is None and older:
+            older = older[:-1]      # 아직 1분봉이 없으면 마지막(진행 중) 봉은 빼고 마감된 봉만
+        keep = list(closed)
+        closed.clear()
+        closed.extend(older[-(self.history - len(keep)):] if len(keep) < self.history else [])
+        closed.extend(keep)
+        self._seeded.add(timeframe)
+
+    def seeded(self, timeframe):
+        return timeframe in self._seeded
+
+    def available(self, timeframe):
+        return len(self._closed[timeframe]) + (self._current[timeframe] is not None)
+
+    def ohlcv(self, timeframe, limit=None):
+        # ccxt fetch_ohlcv 와 같은 모양: 마감된 봉 + 마지막에 진행 중인 봉
+        bars = list(self._closed[timeframe])
+        if self._current[timeframe] is not None:
+            bars.append(list(self._current[timeframe]))
+        return bars[-limit:] if limit else bars
+
+    def fetcher(self, timeframe):
+        # IndicatorFeed.refresh 에 넘길 fetch(limit)
+        return lambda limit: self.ohlcv(timeframe, limit)
+
+
+class MinuteStream:
+    """거래소 1분봉을 마지막으로 받은 시각 이후부터 이어 받아 Resampler 에 넣습니다 (마감된 분만)."""
+
+    def __init__(self, exchange, symbol, resampler, page_limit=200, store=None):
+        self.exchange = exchange
+        self.symbol = symbol
+        self.resampler = resampler
+        self.page_limit = page_limit
+        self.store = store
+        self.requests = 0
+
+    def start_ms(self, now_ms=None):
+        # 처음에는 가장 긴 timeframe 의 진행 중인 봉 시작부터 받아야 그 봉을 1분봉으로 완성할 수 있음
+        now_ms = int(time.time() * 1000) if now_ms is None else now_ms
+        return min(bucket_start(now_ms, tf, self.resampler.daily_open) for tf in self.resampler.timeframes)
+
+    def sync(self, now_ms=None):
+        now_ms = int(time.time() * 1000) if now_ms is None else now_ms
+        closed_until = now_ms - now_ms % 60_000 - 60_000          # 마지막으로 마감된 1분봉 시작 시각
+        last_ts = self.resampler.last_ts
+        since = self.start_ms(now_ms) if last_ts is None else last_ts + 60_000
+        added = []
+        while since <= closed_until:
+            self.requests += 1
+            page = self.exchange.fetch_ohlcv(self.symbol, BASE_TIMEFRAME, since=since, limit=self.page_limit)
+            page = [bar for bar in page if since <= bar[TS] <= closed_until]
+            if not page:
+                break
+            self.resampler.extend(page)
+            added.extend(page)
+            since = page[-1][TS] + 60_000
+        if self.store is not None and added:
+            self.store.save(self.symbol, BASE_TIMEFRAME, added)
+        return len(added)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="캔들 저장소의 1분봉으로 상위 봉을 만들어 저장된 상위 봉과 비교")
+    parser.add_argument('--symbol', default='BTC/KRW')
+    parser.add_argument('--timeframe', default='1d', help="만들 timeframe (예: 1h, 4h, 1d)")
+    parser.add_argument('--start', default='2024-01-01')
+    parser.add_argument('--end', default='2024-01-31 23:59:59')
+    parser.add_argument('--daily-open', choices=list(DAILY_OPEN_OFFSETS), default='utc',
+                        help="일봉 시작: utc(업비트, KST 09:00) / kst(KST 자정)")
+    args = parser.parse_args()
+
+    import pandas as pd
+
+    store = CandleStore()
+    start_ms = int(pd.Timestamp(args.start).value // 1_000_000)
+    end_ms = int(pd.Timestamp(args.end).value // 1_000_000)
+    started = time.perf_counter()
+    derived = resample_store(store, args.symbol, args.timeframe, start_ms, end_ms, args.daily_open)
+    print(f"1분봉 → {args.timeframe} {len(derived):,}개 ({time.perf_counter() - started:.2f}초)")
+
+    stored = np.array(store.load(args.symbol, args.timeframe, start_ms, end_ms), dtype=float).reshape(-1, 6)
+    if len(stored) == 0:
+        print(f"저장된 {args.timeframe} 봉이 없어 비교를 건너뜁니다.")
+    else:
+        common, derived_idx, stored_idx = np.intersect1d(derived[:, TS], stored[:, TS], return_indices=True)
+        same = np.isclose(derived[derived_idx, 1:5], stored[stored_idx, 1:5]).all(axis=1)
+        print(f"저장된 {args.timeframe} 봉 {len(stored):,}개 중 시각 일치 {len(common):,}개, OHLC 일치 {same.sum():,}개")
@@ -0,0 +1,219 @@
+import argparse
+import os
+import time
+from multiprocessing import Pool
+
+import numpy as np
+import pandas as pd
+
+import backtest_engine
+
+# ───────────────────────────────
+# 백테스트 결과 강건성 분석 (부트스트랩 / 몬테카를로, 프로세스 풀)
+#
+# 백테스트 한 번의 수익률·낙폭은 실제로 일어난 한 가지 순서일 뿐입니다. 여기서는
+#   • trades: 거래별 수익률을 복원 추출해 거래 순서를 수천~수십만 번 다시 만들고
+#   • daily:  일별 수익률을 블록 단위(기본 20일)로 복원 추출해 (자기상관을 유지한 채) 가격 경로를 다시 만든 뒤
+# 총 수익률, 최대 낙폭, 월평균 수익률의 분포와 신뢰구간을 구합니다.
+# 재표본은 (배치 × 기간) NumPy 행렬로 한 번에 계산하고, 배치는 프로세스 풀에 나눠 보냅니다.
+# 배치마다 SeedSequence 의 자식 시드를 쓰므로 결과는 워커 수와 무관하게 같은 seed 면 같습니다.
+# ───────────────────────────────
+
+METHODS = ('trades', 'daily')
+METRICS = ('total_return', 'max_drawdown', 'monthly_avg_return')
+DEFAULT_SAMPLES = 100_000
+DEFAULT_BATCH = 1_000
+DEFAULT_BLOCK_DAYS = 20
+DEFAULT_LEVELS = (0.05, 0.95)
+
+_worker_inputs = None
+
+
+# ───────────────────────────────
+# 1. 백테스트 결과 → 수익률 표본
+# ───────────────────────────────
+def trade_returns(trade_logs):
+    # 매수 → (매도 | 손절) 한 쌍의 수수료 포함 수익률. 끝까지 들고 있는 포지션은 제외
+    returns = []
+    used = None
+    for log in trade_logs:
+        if log['type'] == 'BUY':
+            used = log['amount_krw_used']
+        elif used:
+            returns.append(log['amount_krw_gained'] / used - 1)
+            used = None
+    return np.array(returns, dtype=float)
+
+
+def daily_returns(portfolio_values, initial_krw):
+    # 일별 포트폴리오 가치의 수익률 (첫날은 초기 자산 대비)
+    values = np.array([row['value'] for row in portfolio_values], dtype=float)
+    if len(values) == 0:
+        return values
+    return np.diff(np.r_[initial_krw, values]) / np.r_[initial_krw, values[:-1]]
+
+
+def month_ends(portfolio_values):
+    # 각 달의 마지막 날 위치 (backtest_engine.monthly_returns 와 같은 달 구분)
+    dates = pd.to_datetime(pd.Series([row['date'] for row in portfolio_values]))
+    if dates.empty:
+        return np.zeros(0, dtype=np.int64)
+    months = dates.dt.to_period('M').to_numpy()
+    return np.flatnonzero(np.r_[months[1:] != months[:-1], True])
+
+
+# ───────────────────────────────
+# 2. 배치 재표본 (행렬 연산)
+# ───────────────────────────────
+def path_metrics(growth, ends=None, months=None):
+    """growth: (배치, 기간) 기간별 (1 + 수익률). 경로별 총 수익률·최대 낙폭·월평균 수익률을 반환합니다.
+
+    ends 가 있으면 그 위치의 가치로 월 수익률 평균을, 없으면 months 개월에 걸친 기하 평균 월 수익률을 씁니다.
+    """
+    equity = np.cumprod(growth, axis=1)
+    total = equity[:, -1] - 1
+    peak = np.maximum(np.maximum.accumulate(equity, axis=1), 1.0)
+    drawdown = np.minimum((equity / peak - 1).min(axis=1), 0.0)
+    if ends is not None and len(ends):
+        monthly = equity[:, ends]
+        previous = np.concatenate([np.ones((len(growth), 1)), monthly[:, :-1]], axis=1)
+        monthly_avg = (monthly / previous - 1).mean(axis=1)
+    elif months:
+        monthly_avg = (1 + total) ** (1 / months) - 1
+    else:
+        monthly_avg = np.full(len(growth), np.nan)
+    return {'total_return': total, 'max_drawdown': drawdown, 'monthly_avg_return': monthly_avg}
+
+
+def resample_trades(returns, count, rng, months=None):
+    # 거래 수익률을 같은 거래 수만큼 복원 추출 (count 개 경로)
+    picks = rng.integers(0, len(returns), size=(count, len(returns)))
+    return path_metrics(1 + returns[picks], months=months)
+
+
+def resample_blocks(returns, count, rng, block, ends=None):
+    # 순환 블록 부트스트랩: 길이 block 의 연속 구간을 이어 붙여 원래 기간 길이의 경로를 만듦
+    n = len(returns)
+    block = max(1, min(block, n))
+    blocks = -(-n // block)
+    starts = rng.integers(0, n, size=(count, blocks, 1))
+    picks = ((starts + np.arange(block)) % n).reshape(count, blocks * block)[:, :n]
+    return path_metrics(1 + returns[picks], ends=ends)
+
+
+def run_batch(method, inputs, count, seed):
+    rng = np.random.default_rng(seed)
+    if method == 'trades':
+        return resample_trades(inputs['trades'], count, rng, months=inputs['months'])
+    return resample_blocks(inputs['daily'], count, rng, inputs['block'], ends=inputs['ends'])
+
+
+def _init_worker(inputs):
+    global _worker_inputs
+    _worker_inputs = inputs
+
+
+def _run_batch(task):
+    method, count, seed = task
+    return run_batch(method, _worker_inputs, count, seed)
+
+
+# ───────────────────────────────
+# 3. 실행 / 신뢰구간
+# ───────────────────────────────
+def prepare_inputs(result, initial_krw, block=DEFAULT_BLOCK_DAYS):
+    ends = month_ends(result['portfolio_values'])
+    return {
+        'trades': trade_returns(result['trade_logs']),
+        'daily': daily_returns(result['portfolio_values'], initial_krw),
+        'ends': ends,
+        'months': len(ends),
+        'block': block,
+    }
+
+
+def bootstrap(inputs, method='daily', samples=DEFAULT_SAMPLES, batch=DEFAULT_BATCH, workers=None, seed=42):
+    """samples 개 재표본 경로의 지표 배열 dict. 표본이 부족하면 None."""
+    if method not in METHODS:
+        raise ValueError(f"알 수 없는 재표본 방식: {method} ({', '.join(METHODS)})")
+    if len(inputs[method]) < 2:
+        return None
+    counts = [min(batch, samples - start) for start in range(0, samples, batch)]
+    seeds = np.random.SeedSequence(seed).spawn(len(counts))
+    tasks = [(method, count, child) for count, child in zip(counts, seeds)]
+
+    workers = workers or os.cpu_count()
+    if workers == 1 or len(tasks) == 1:
+        parts = [run_batch(method, inputs, count, child) for _, count, child in tasks]
+    else:
+        with Pool(min(workers, len(tasks)), initializer=_init_worker, initargs=(inputs,)) as pool:
+            parts = pool.map(_run_batch, tasks)
+    return {metric: np.concatenate([part[metric] for part in parts]) for metric in METRICS}
+
+
+def confidence_intervals(samples, levels=DEFAULT_LEVELS):
+    # 지표별 (하한, 중앙값, 상한, 평균)
+    table = {}
+    for metric, values in samples.items():
+        values = values[~np.isnan(values)]
+        if len(values) == 0:
+            table[metric] = dict.fromkeys(('low', 'median', 'high', 'mean'), np.nan)
+            continue
+        low, median, high = np.quantile(values, [levels[0], 0.5, levels[1]])
+        table[metric] = {'low': low, 'median': median, 'high': high, 'mean': values.mean()}
+    return pd.DataFrame(table).T
+
+
+def observed(result, ohlcv_data, initial_krw):
+    summary = backtest_engine.summarize(result, ohlcv_data, initial_krw)
+    return {metric: summary[metric] for metric in METRICS}
+
+
+def print_intervals(title, intervals, actual, levels=DEFAULT_LEVELS, loss_probability=None):
+    labels = {'total_return': '총 수익률', 'max_drawdown': '최대 낙폭', 'monthly_avg_return': '월평균 수익률'}
+    print(f"\n--- {title} ---")
+    print(f"{'지표':<10} {'실제':>9} {f'{levels[0]:.0%}':>9} {'중앙값':>9} {f'{levels[1]:.0%}':>9}")
+    for metric, row in intervals.iterrows():
+        print(f"{labels[metric]:<10} {actual[metric] * 100:>8.2f}% {row['low'] * 100:>8.2f}% "
+              f"{row['median'] * 100:>8.2f}% {row['high'] * 100:>8.2f}%")
+    if loss_probability is not None:
+        print(f"손실로 끝날 확률: {loss_probability * 100:.1f}%")
+
+
+if __name__ == "__main__":
+    import backtest_bot
+
+    parser = argparse.ArgumentParser(description="백테스트 거래/일별 수익률 부트스트랩 강건성 분석")
+    parser.add_argument('--method', choices=METHODS + ('both',), default='both',
+                        help="trades: 거래 순서 재표본, daily: 일별 수익률 블록 부트스트랩")
+    parser.add_argument('--samples', type=int, default=DEFAULT_SAMPLES, help="재표본 경로 수")
+    parser.add_argument('--batch', type=int, default=DEFAULT_BATCH, help="워커 한 번에 계산하는 경로 수")
+    parser.add_argument('--block', type=int, default=DEFAULT_BLOCK_DAYS, help="daily 블록 길이 (일)")
+    parser.add_argument('--workers', type=int, default=None, help="워커 프로세스 수 (기본: CPU 코어 수)")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--stop', choices=backtest_engine.STOP_MODES, default=backtest_bot.STOP_MODE,
+                        help="백테스트 손절 판정 방식")
+    args = parser.parse_args()
+
+    ohlcv_data = backtest_bot.load_backtest_data()
+    if ohlcv_data.empty:
+        raise SystemExit("❌ 지정된 기간의 데이터를 가져오지 못했습니다.")
+    initial_krw = backtest_bot.INITIAL_KRW_BALANCE
+    result = backtest_bot.run_backtest_vectorized(ohlcv_data, backtest_engine.IntrabarStops(ohlcv_data, args.stop))
+    inputs = prepare_inputs(result, initial_krw, block=args.block)
+    actual = observed(result, ohlcv_data, initial_krw)
+    print(f"✅ 백테스트 완료: 완결 거래 {len(inputs['trades'])}건, 일별 수익률 {len(inputs['daily'])}개, "
+          f"{inputs['months']}개월")
+
+    for method in (METHODS if args.method == 'both' else (args.method,)):
+        started = time.perf_counter()
+        samples = bootstrap(inputs, method, samples=args.samples, batch=args.batch, workers=args.workers,
+                            seed=args.seed)
+        if samples is None:
+            print(f"\n⚠️ {method}: 재표본할 데이터가 부족합니다.")
+            continue
+        elapsed = time.perf_counter() - started
+        title = (f"거래 순서 부트스트랩 ({args.samples:,}회, {elapsed:.1f}초, 월평균은 기하 평균)" if method == 'trades'
+                 else f"일별 수익률 {args.block}일 블록 부트스트랩 ({args.samples:,}회, {elapsed:.1f}초)")
+        print_intervals(title, confidence_intervals(samples), actual,
+                        loss_probability=float((samples['total_return'] < 0).mean()))
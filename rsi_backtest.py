@@ -0,0 +1,266 @@
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+import backtest_engine
+
+try:
+    from numba import njit
+except ImportError:   # numba 가 없으면 같은 상태 루프를 파이썬으로 실행 (수년치 1시간봉도 1초 미만)
+    njit = None
+
+# ───────────────────────────────
+# RSI 전략 백테스트 (rsi_final / rsi_risk_1 / rsi_risk_2, 60분봉)
+#
+# 백테스트는 MA/ADX 전략만 있었고 RSI 봇들(분할 매수·매도, 쿨다운 포함)은 과거 데이터로 평가할 수 없었습니다.
+# 여기서는 RSI·이동평균을 전체 구간에 대해 배열로 한 번 계산하고 (ta 라이브러리와 같은 Wilder 평활),
+# 포지션 상태 머신은 스칼라와 배열 인덱싱만 쓰는 루프 하나로 돌립니다. numba 가 설치되어 있으면 이 루프를
+# 그대로 컴파일하고, 없으면 입력을 리스트로 바꿔 파이썬으로 실행합니다.
+#
+# 판단 시점은 각 봉 마감(가격 = 종가, RSI = 마감된 봉의 RSI)이고, 라이브 스크립트의 분기 순서를 그대로 따릅니다.
+#   • rsi_final / rsi_risk_1: 손절(5%) → 보유 없음 + RSI ≤ 35 (+ MA50 > MA200) 이면 전액 매수 → RSI ≥ 55 전량 매도
+#   • rsi_risk_2: RSI 30/35 에서 KRW 100%/50% 매수, RSI 60/55 에서 100%/50% 매도 (분할 포지션).
+#     라이브 스크립트와 마찬가지로 매수 가격을 아는 동안에는 손절만 검사하고, RSI 매도 분기는 매수 가격이 없을 때만 탑니다.
+# 매매 후 TRADE_COOLDOWN_SECONDS 동안은 판단하지 않고, 최소 주문 금액(5,000원) 미만 주문은 거래소처럼 거절합니다.
+# 손절은 backtest_engine.IntrabarStops 와 같은 'close'(종가) / 'low'(저가가 닿으면 손절가, 갭 하락이면 시가) 판정입니다.
+# 결과는 backtest_engine.simulate_ma_adx 와 같은 trade_logs / portfolio_values 형식입니다.
+# ───────────────────────────────
+
+MIN_ORDER_KRW = 5000
+TRADE_FEE_RATE = 0.0005
+TRADE_COOLDOWN_SECONDS = 300
+INITIAL_KRW_BALANCE = 1_000_000
+RSI_STOP_MODES = ('close', 'low')
+
+# 라이브 스크립트의 파라미터 (단일 기준 전략은 partial == full 로 두면 분할 분기를 타지 않음)
+STRATEGIES = {
+    'rsi_final': {'rsi_period': 14, 'buy_full': 35, 'buy_partial': 35, 'sell_full': 55, 'sell_partial': 55,
+                  'ma_short': 50, 'ma_long': 200, 'stop_loss_pct': 0.05, 'exclusive_stop': False},
+    'rsi_risk_1': {'rsi_period': 14, 'buy_full': 35, 'buy_partial': 35, 'sell_full': 55, 'sell_partial': 55,
+                   'ma_short': None, 'ma_long': None, 'stop_loss_pct': 0.05, 'exclusive_stop': False},
+    'rsi_risk_2': {'rsi_period': 14, 'buy_full': 30, 'buy_partial': 35, 'sell_full': 60, 'sell_partial': 55,
+                   'ma_short': None, 'ma_long': None, 'stop_loss_pct': 0.05, 'exclusive_stop': True},
+}
+PARTIAL_FRACTION = 0.5
+EVENT_TYPES = ('BUY', 'SELL', 'SELL (Stop Loss)')
+
+
+# ───────────────────────────────
+# 1. 지표 (전체 구간 1회)
+# ───────────────────────────────
+def rsi_array(close, window):
+    """ta.momentum.RSIIndicator 와 같은 계산 (첫 변화량 0, ewm(alpha=1/window, adjust=False), 기간 미달 NaN)."""
+    diff = pd.Series(np.asarray(close, dtype=float)).diff(1)
+    up = diff.where(diff > 0, 0.0)
+    down = -diff.where(diff < 0, 0.0)
+    avg_up = up.ewm(alpha=1 / window, min_periods=window, adjust=False).mean().to_numpy()
+    avg_down = down.ewm(alpha=1 / window, min_periods=window, adjust=False).mean().to_numpy()
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rsi = np.where(avg_down == 0, 100.0, 100 - 100 / (1 + avg_up / avg_down))
+    return np.where(np.isnan(avg_up), np.nan, rsi)
+
+
+# ───────────────────────────────
+# 2. 상태 루프 (스칼라 + 배열 인덱싱만, numba 호환)
+# ───────────────────────────────
+def run_rsi_rows(start, closes, opens, lows, decide_ms, rsi, trend, buy_full, buy_partial, sell_full, sell_partial,
+                 fraction, stop_mult, stop_low, exclusive_stop, cooldown_ms, min_order, fee_rate, initial_krw):
+    """start 번째 봉부터 봉 마감마다 판단합니다. (총자산 배열, 이벤트 개수, 이벤트 배열들, KRW, BTC) 반환.
+
+    이벤트 종류: 0 매수, 1 매도, 2 손절. 봉 하나에 이벤트는 최대 하나입니다.
+    """
+    n = len(closes)
+    values = np.empty(n - start)
+    ev_row = np.empty(n - start, dtype=np.int64)
+    ev_kind = np.empty(n - start, dtype=np.int64)
+    ev_price = np.empty(n - start)
+    ev_units = np.empty(n - start)
+    ev_krw = np.empty(n - start)
+    events = 0
+
+    fee_mult = 1.0 - fee_rate
+    krw = initial_krw
+    btc = 0.0
+    entry = 0.0                       # 매수 가격 (0 이면 모름)
+    blocked_until = -1
+
+    for cur in range(start, n):
+        close = closes[cur]
+        values[cur - start] = krw + btc * close
+        if decide_ms[cur] < blocked_until:
+            continue
+        current_rsi = rsi[cur]
+        if current_rsi != current_rsi:          # NaN (워밍업)
+            continue
+
+        kind = -1
+        price = close
+        units = 0.0
+        amount = 0.0
+
+        # 손절
+        if btc > 0 and entry > 0:
+            stop_price = entry * stop_mult
+            if stop_low:
+                if lows[cur] <= stop_price:
+                    price = min(opens[cur], stop_price)
+                    kind = 2
+            elif close <= stop_price:
+                kind = 2
+            if kind == 2:
+                if btc * price >= min_order:
+                    units = btc
+                    amount = btc * price * fee_mult
+                    krw += amount
+                    btc = 0.0
+                    entry = 0.0
+                else:
+                    kind = -1
+            if kind == -1 and exclusive_stop:
+                continue
+
+        # 매수
+        if kind == -1 and btc == 0 and krw >= min_order and trend[cur]:
+            if current_rsi <= buy_full:
+                amount = krw
+            elif current_rsi <= buy_partial:
+                amount = krw * fraction
+            if amount >= min_order:
+                units = (amount * fee_mult) / close
+                btc += units
+                krw -= amount
+                entry = close
+                kind = 0
+
+        # 매도
+        elif kind == -1 and btc > 0:
+            if current_rsi >= sell_full:
+                units = btc
+            elif current_rsi >= sell_partial:
+                units = btc * fraction
+            if units > 0 and units * close >= min_order:
+                amount = units * close * fee_mult
+                krw += amount
+                if units == btc:
+                    entry = 0.0
+                btc -= units
+                kind = 1
+
+        if kind >= 0:
+            ev_row[events] = cur
+            ev_kind[events] = kind
+            ev_price[events] = price
+            ev_units[events] = units
+            ev_krw[events] = amount
+            events += 1
+            blocked_until = decide_ms[cur] + cooldown_ms
+
+    return values, events, ev_row, ev_kind, ev_price, ev_units, ev_krw, krw, btc
+
+
+_compiled = None
+
+
+def state_loop():
+    # numba 가 있으면 처음 부를 때 한 번 컴파일 (cache=True: 다음 실행부터는 디스크 캐시)
+    global _compiled
+    if njit is None:
+        return None
+    if _compiled is None:
+        _compiled = njit(cache=True)(run_rsi_rows)
+    return _compiled
+
+
+# ───────────────────────────────
+# 3. 시뮬레이션
+# ───────────────────────────────
+def strategy_params(strategy):
+    return {**STRATEGIES[strategy], 'cooldown_seconds': TRADE_COOLDOWN_SECONDS, 'min_order_krw': MIN_ORDER_KRW,
+            'trade_fee_rate': TRADE_FEE_RATE, 'initial_krw': INITIAL_KRW_BALANCE}
+
+
+def simulate_rsi(ohlcv_data, rsi_period, buy_full, buy_partial, sell_full, sell_partial, ma_short, ma_long,
+                 stop_loss_pct, exclusive_stop, cooldown_seconds, min_order_krw, trade_fee_rate, initial_krw,
+                 stop_mode='close', fraction=PARTIAL_FRACTION, bar_ms=None):
+    if stop_mode not in RSI_STOP_MODES:
+        raise ValueError(f"알 수 없는 손절 판정 방식: {stop_mode} ({', '.join(RSI_STOP_MODES)})")
+    n = len(ohlcv_data)
+    closes = ohlcv_data['close'].to_numpy(dtype=float)
+    ts = ohlcv_data.index.asi8 // 1_000_000
+    if bar_ms is None:
+        bar_ms = int(np.median(np.diff(ts))) if n > 1 else 3_600_000
+    rsi = rsi_array(closes, rsi_period)
+    if ma_short and ma_long:
+        trend = backtest_engine.rolling_mean(closes, ma_short) > backtest_engine.rolling_mean(closes, ma_long)
+        start = ma_long - 1
+    else:
+        trend = np.ones(n, dtype=bool)
+        start = rsi_period - 1
+    start = min(start, n)
+
+    inputs = (closes, ohlcv_data['open'].to_numpy(dtype=float), ohlcv_data['low'].to_numpy(dtype=float),
+              ts + bar_ms, rsi, trend)
+    loop = state_loop()
+    if loop is None:
+        loop = run_rsi_rows
+        inputs = tuple(values.tolist() for values in inputs)
+    values, events, ev_row, ev_kind, ev_price, ev_units, ev_krw, krw, btc = loop(
+        start, *inputs, float(buy_full), float(buy_partial), float(sell_full), float(sell_partial), float(fraction),
+        1.0 - stop_loss_pct, stop_mode == 'low', exclusive_stop, int(cooldown_seconds * 1000), float(min_order_krw),
+        float(trade_fee_rate), float(initial_krw))
+
+    dates = ohlcv_data.index[start:].to_pydatetime()
+    portfolio_values = [{'date': date, 'value': value} for date, value in zip(dates, values.tolist())]
+    trade_logs = []
+    for row, kind, price, units, amount in zip(ev_row[:events].tolist(), ev_kind[:events].tolist(),
+                                               ev_price[:events].tolist(), ev_units[:events].tolist(),
+                                               ev_krw[:events].tolist()):
+        log = {'date': ohlcv_data.index[row].to_pydatetime(), 'type': EVENT_TYPES[kind], 'price': price,
+               'amount_btc': units}
+        log['amount_krw_used' if kind == 0 else 'amount_krw_gained'] = amount
+        trade_logs.append(log)
+    return {'trade_logs': trade_logs, 'portfolio_values': portfolio_values, 'krw_balance': krw, 'btc_balance': btc}
+
+
+if __name__ == "__main__":
+    import backtest_bot
+    from candle_file import CandleFile
+    from candle_store import CandleStore
+
+    parser = argparse.ArgumentParser(description="RSI 전략(rsi_final / rsi_risk_1 / rsi_risk_2) 60분봉 백테스트")
+    parser.add_argument('--strategy', choices=list(STRATEGIES) + ['all'], default='all')
+    parser.add_argument('--timeframe', default='1h')
+    parser.add_argument('--start', default=backtest_bot.START_DATE)
+    parser.add_argument('--end', default=backtest_bot.END_DATE)
+    parser.add_argument('--stop', choices=RSI_STOP_MODES, default='close',
+                        help="손절 판정: close(종가, 봉 마감 판단) / low(봉 저가)")
+    parser.add_argument('--cooldown', type=float, default=TRADE_COOLDOWN_SECONDS, help="매매 후 쉬는 시간 (초)")
+    parser.add_argument('--candle-file', default=None, help="캔들 저장소 대신 읽을 컬럼형 캔들 파일 (.upc)")
+    parser.add_argument('--report', action='store_true', help="월별 수익률 보고서 출력")
+    args = parser.parse_args()
+
+    if args.candle_file:
+        ohlcv_data = CandleFile(args.candle_file).frame(backtest_bot._date_ms(args.start),
+                                                        backtest_bot._date_ms(args.end))
+    else:
+        ohlcv_data = backtest_bot.fetch_historical_ohlcv(backtest_bot.upbit, backtest_bot.symbol, args.timeframe,
+                                                         args.start, args.end, store=CandleStore())
+    if ohlcv_data.empty:
+        raise SystemExit("❌ 지정된 기간의 데이터를 가져오지 못했습니다.")
+    print(f"✅ 데이터 로딩 완료. 총 {len(ohlcv_data):,}개의 {args.timeframe} 봉 "
+          f"({'numba' if njit is not None else 'python'} 상태 루프)")
+
+    for strategy in (STRATEGIES if args.strategy == 'all' else [args.strategy]):
+        params = {**strategy_params(strategy), 'cooldown_seconds': args.cooldown}
+        started = time.perf_counter()
+        result = simulate_rsi(ohlcv_data, stop_mode=args.stop, **params)
+        elapsed = time.perf_counter() - started
+        summary = backtest_engine.summarize(result, ohlcv_data, params['initial_krw'])
+        stops = sum(log['type'] == 'SELL (Stop Loss)' for log in result['trade_logs'])
+        print(f"\n[{strategy}] {elapsed:.3f}초 | 최종 {summary['final_value']:,.0f}원 | "
+              f"총 수익률 {summary['total_return'] * 100:.2f}% | 월평균 {summary['monthly_avg_return'] * 100:.2f}% | "
+              f"최대 낙폭 {summary['max_drawdown'] * 100:.2f}% | 거래 {summary['trades']}회 (손절 {stops}회)")
+        if args.report:
+            backtest_bot.print_report(result, summary['final_value'])
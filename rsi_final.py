@@ -1,10 +1,14 @@
 import ccxt 
 import os 
 import time 
-import requests 
 from dotenv import load_dotenv 
-import pandas as pd 
-import ta 
+from notifier import TelegramNotifier 
+from account_cache import AccountCache 
+from indicators import IndicatorFeed, RSI, SMA 
+from market_feed import MarketFeed 
+from request_scheduler import schedule
+from metrics import BotMetrics
+from state_store import StateStore
 
 # ─────────────────────────────── 
 # 1. 환경변수 로드 
@@ -26,16 +30,25 @@ upbit = ccxt.upbit({
     }, 
 }) 
 
+# 같은 계정으로 도는 다른 봇들과 업비트 요청 한도를 나눠 씀 (주문 요청 우선)
+schedule(upbit, api_key)
+
+# 루프 단계별 지연 시간 계측 (BOT_METRICS_PORT / BOT_METRICS_DIR 로 내보내기)
+metrics = BotMetrics.from_env('rsi_final')
+metrics.instrument(upbit)
+
+# 잔고 캐시: 주문 체결로 바로 갱신하고, 5분마다 또는 주문 직후에만 거래소 잔고와 대조 
+account = AccountCache(upbit) 
+
 # ─────────────────────────────── 
 # 3. 텔레그램 전송 함수 
 # ─────────────────────────────── 
+notifier = TelegramNotifier(telegram_token, telegram_chat_id) 
+
 def send_telegram(message): 
-    try: 
-        url = f"https://api.telegram.org/bot{telegram_token}/sendMessage" 
-        payload = {"chat_id": telegram_chat_id, "text": message} 
-        requests.post(url, data=payload) 
-    except Exception as e: 
-        print("❌ 텔레그램 전송 실패:", e) 
+    # 큐에 넣기만 하고 바로 반환 (전송은 백그라운드 스레드) 
+    with metrics.span('telegram'): 
+        notifier.send(message) 
 
 # ─────────────────────────────── 
 # 4. 설정 값 
@@ -51,56 +64,88 @@ MA_LONG_PERIOD = 200
 
 TRADE_COOLDOWN_SECONDS = 300 
 STOP_LOSS_PERCENT = 0.05 
-bought_price = 0 
 
-print("🚀 자동 매수·매도 봇 시작! 1분마다 시세 및 RSI, 이동평균선 확인 중...\n") 
-send_telegram("🤖 자동매매 봇 시작됨 (1분마다 시세 및 RSI, 이동평균선 감시 중)") 
+# 60분봉 지표 (마감된 봉은 증분 반영, 진행 중인 봉은 peek) 
+feed = IndicatorFeed( 
+    {'rsi': RSI(RSI_PERIOD), 'ma_short': SMA(MA_SHORT_PERIOD), 'ma_long': SMA(MA_LONG_PERIOD)}, 
+    warmup=max(RSI_PERIOD * 2, MA_LONG_PERIOD + 10), 
+) 
+
+# 상태 스냅샷: 매수 가격·쿨다운·지표 상태를 바뀔 때마다 저장하고, 재시작하면 이어서 사용
+# (MA200 워밍업 210봉을 다시 받지 않고 놓친 봉만 받음)
+state = StateStore.from_env('rsi_final')
+saved = state.load()
+bought_price = saved.get('bought_price', 0)
+cooldown_until = saved.get('cooldown_until', 0)
+if feed.restore(saved.get('feed')):
+    print(f"♻️ 저장된 상태 복원: 매수 가격 {bought_price:,.0f}원 (놓친 60분봉만 받아 이어 감)")
+
+def save_state():
+    state.save(bought_price=bought_price, cooldown_until=cooldown_until, feed=feed.snapshot())
+
+# 실시간 체결 피드: 체결마다 손절/매매 조건 확인, 잔고·캔들은 REST_REFRESH_SECONDS 마다 갱신 
+REST_REFRESH_SECONDS = 60 
+market = MarketFeed('BTC/KRW', rest=upbit).start() 
+refreshed_at = 0 
+
+print("🚀 자동 매수·매도 봇 시작! 체결마다 시세 및 RSI, 이동평균선 확인 중...\n") 
+send_telegram("🤖 자동매매 봇 시작됨 (실시간 체결마다 시세 및 RSI, 이동평균선 감시 중)") 
+
+# 재시작 전에 걸린 매매 쿨다운이 남아 있으면 남은 시간만 대기
+if cooldown_until > time.time():
+    metrics.sleep(cooldown_until - time.time())
 
 # ─────────────────────────────── 
 # 5. 반복 감시 
 # ─────────────────────────────── 
 while True: 
+    metrics.loop_tick()
     try: 
-        ticker = upbit.fetch_ticker('BTC/KRW') 
-        current_price = ticker['last'] 
-        now = time.strftime('%Y-%m-%d %H:%M:%S') 
-        print(f"[{now}] 현재 BTC 가격: {current_price:,.0f}원") 
+        with metrics.span('market_wait'):
+            current_price = market.wait(timeout=60) 
 
-        balances = upbit.fetch_balance() 
-        krw_balance = balances['total'].get('KRW', 0) 
-        btc_balance = balances['total'].get('BTC', 0) 
-        btc_value_in_krw = btc_balance * current_price 
+        refreshed = time.time() - refreshed_at >= REST_REFRESH_SECONDS 
+        if refreshed: 
+            now = time.strftime('%Y-%m-%d %H:%M:%S') 
+            print(f"[{now}] 현재 BTC 가격: {current_price:,.0f}원") 
 
-        print(f"현재 KRW 잔고: {krw_balance:,.0f}원") 
-        print(f"현재 BTC 잔고: {btc_balance:.8f} BTC ({btc_value_in_krw:,.0f}원)\n") 
+            account.refresh() 
 
-        ohlcv = upbit.fetch_ohlcv('BTC/KRW', '1h', limit=max(RSI_PERIOD * 2, MA_LONG_PERIOD + 10)) 
-        df = pd.DataFrame(ohlcv, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume']) 
-        df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms') 
-        df['close'] = pd.to_numeric(df['close']) 
+            krw_balance, btc_balance = account.krw, account.btc 
+            btc_value_in_krw = btc_balance * current_price 
 
-        df['rsi'] = ta.momentum.RSIIndicator(df['close'], window=RSI_PERIOD).rsi() 
-        current_rsi = df['rsi'].iloc[-1] 
-        print(f"현재 60분봉 RSI: {current_rsi:.2f}\n") 
+            print(f"현재 KRW 잔고: {krw_balance:,.0f}원") 
+            print(f"현재 BTC 잔고: {btc_balance:.8f} BTC ({btc_value_in_krw:,.0f}원)\n") 
 
-        df['ma_short'] = ta.trend.SMAIndicator(df['close'], window=MA_SHORT_PERIOD).sma_indicator()
-        df['ma_long'] = ta.trend.SMAIndicator(df['close'], window=MA_LONG_PERIOD).sma_indicator()
+            feed.refresh(lambda limit: upbit.fetch_ohlcv('BTC/KRW', '1h', limit=limit)) 
+            refreshed_at = time.time() 
+            save_state()
 
-        current_ma_short = df['ma_short'].iloc[-1] 
-        current_ma_long = df['ma_long'].iloc[-1] 
+        # 진행 중인 60분봉의 종가를 실시간 체결가로 두고 지표 계산 
+        with metrics.span('indicators'):
+            values = feed.peek_price(current_price) 
+        current_rsi = values['rsi'] 
+        current_ma_short = values['ma_short'] 
+        current_ma_long = values['ma_long'] 
 
-        print(f"현재 50분 이동평균선: {current_ma_short:,.0f}원") 
-        print(f"현재 200분 이동평균선: {current_ma_long:,.0f}원\n") 
+        if refreshed: 
+            print(f"현재 60분봉 RSI: {current_rsi:.2f}\n") 
+            print(f"현재 50분 이동평균선: {current_ma_short:,.0f}원") 
+            print(f"현재 200분 이동평균선: {current_ma_long:,.0f}원\n") 
 
         if btc_balance > 0 and bought_price > 0: 
             loss_percent = (bought_price - current_price) / bought_price 
             if loss_percent >= STOP_LOSS_PERCENT: 
                 print(f"🚨 손절 조건 만족 (손실률: {loss_percent:.2%})! 비트코인 전량 매도 실행") 
                 order = upbit.create_market_sell_order('BTC/KRW', round(btc_balance, 8)) 
+                account.apply_order(order, 'sell') 
                 print("✅ 손절 매도 완료:", order) 
                 send_telegram(f"🚨 손절 매도 완료! (손실률: {loss_percent:.2%})\n매수 가격: {bought_price:,.0f}원\n현재 가격: {current_price:,.0f}원\n수량: {round(btc_balance, 8)} BTC") 
                 bought_price = 0 
-                time.sleep(TRADE_COOLDOWN_SECONDS) 
+                refreshed_at = 0 
+                cooldown_until = time.time() + TRADE_COOLDOWN_SECONDS
+                save_state()
+                metrics.sleep(TRADE_COOLDOWN_SECONDS) 
                 continue 
 
         if (btc_balance == 0 and 
@@ -115,33 +160,42 @@ while True:
                 amount_btc = amount_to_buy_krw / current_price 
                 print("💡 매수 조건 만족 (RSI 35 이하 AND 골든 크로스)! 비트코인 KRW 전액 매수 실행") 
                 order = upbit.create_market_buy_order('BTC/KRW', round(amount_btc, 8)) 
+                account.apply_order(order, 'buy') 
                 print("✅ 매수 완료:", order) 
                 send_telegram(f"💰 KRW 전액 매수 완료 (RSI: {current_rsi:.2f}, 골든 크로스)\n가격: {current_price:,.0f}원\n수량: {round(amount_btc, 8)} BTC\n매수 금액: {amount_to_buy_krw:,.0f}원") 
                 bought_price = current_price 
-                time.sleep(TRADE_COOLDOWN_SECONDS) 
+                refreshed_at = 0 
+                cooldown_until = time.time() + TRADE_COOLDOWN_SECONDS
+                save_state()
+                metrics.sleep(TRADE_COOLDOWN_SECONDS) 
 
         elif btc_balance > 0 and current_rsi >= RSI_SELL_THRESHOLD: 
             print("📈 매도 조건 만족 (RSI 55 이상)! 비트코인 전량 매도 실행") # 메시지도 55로 변경
             order = upbit.create_market_sell_order('BTC/KRW', round(btc_balance, 8)) 
+            account.apply_order(order, 'sell') 
             print("✅ 매도 완료:", order) 
             send_telegram(f"📤 전량 매도 완료 (RSI: {current_rsi:.2f})\n가격: {current_price:,.0f}원\n수량: {round(btc_balance, 8)} BTC") 
             bought_price = 0 
-            time.sleep(TRADE_COOLDOWN_SECONDS) 
+            refreshed_at = 0 
+            cooldown_until = time.time() + TRADE_COOLDOWN_SECONDS
+            save_state()
+            metrics.sleep(TRADE_COOLDOWN_SECONDS) 
 
-        else: 
+        elif refreshed: 
             print("⏳ 조건 미충족: 대기 중...\n") 
 
     except ccxt.NetworkError as e: 
+        metrics.loop_error(e)
         print(f"❌ 네트워크 오류 발생: {e}") 
         send_telegram(f"❌ 네트워크 오류: {str(e)}") 
-        time.sleep(10) 
+        metrics.sleep(10) 
     except ccxt.ExchangeError as e: 
+        metrics.loop_error(e)
         print(f"❌ 거래소 오류 발생: {e}") 
         send_telegram(f"❌ 거래소 오류: {str(e)}") 
-        time.sleep(10) 
+        metrics.sleep(10) 
     except Exception as e: 
+        metrics.loop_error(e)
         print(f"❌ 예상치 못한 오류 발생: {e}") 
         send_telegram(f"❌ 예상치 못한 오류: {str(e)}") 
-        time.sleep(10) 
-
-    time.sleep(60)
\ No newline at end of file
+        metrics.sleep(10) 
\ No newline at end of file
@@ -1,10 +1,13 @@
 import ccxt
 import os
 import time
-import requests
 from dotenv import load_dotenv
-import pandas as pd
-import ta
+from notifier import TelegramNotifier
+from account_cache import AccountCache
+from indicators import IndicatorFeed, RSI
+from market_feed import MarketFeed
+from request_scheduler import schedule
+from metrics import BotMetrics
 
 # ───────────────────────────────
 # 1. 환경변수 로드
@@ -26,16 +29,25 @@ upbit = ccxt.upbit({
     },
 })
 
+# 같은 계정으로 도는 다른 봇들과 업비트 요청 한도를 나눠 씀 (주문 요청 우선)
+schedule(upbit, api_key)
+
+# 루프 단계별 지연 시간 계측 (BOT_METRICS_PORT / BOT_METRICS_DIR 로 내보내기)
+metrics = BotMetrics.from_env('rsi_risk_1')
+metrics.instrument(upbit)
+
+# 잔고 캐시: 주문 체결로 바로 갱신하고, 5분마다 또는 주문 직후에만 거래소 잔고와 대조
+account = AccountCache(upbit)
+
 # ───────────────────────────────
 # 3. 텔레그램 전송 함수
 # ───────────────────────────────
+notifier = TelegramNotifier(telegram_token, telegram_chat_id)
+
 def send_telegram(message):
-    try:
-        url = f"https://api.telegram.org/bot{telegram_token}/sendMessage"
-        payload = {"chat_id": telegram_chat_id, "text": message}
-        requests.post(url, data=payload)
-    except Exception as e:
-        print("❌ 텔레그램 전송 실패:", e)
+    # 큐에 넣기만 하고 바로 반환 (전송은 백그라운드 스레드)
+    with metrics.span('telegram'):
+        notifier.send(message)
 
 # ───────────────────────────────
 # 4. 설정 값
@@ -53,41 +65,52 @@ TRADE_COOLDOWN_SECONDS = 300 # 5분
 STOP_LOSS_PERCENT = 0.05 # 5% 손실 시 손절
 bought_price = 0 # 매수했던 가격을 저장하는 변수 초기화
 
-print("🚀 자동 매수·매도 봇 시작! 1분마다 시세 및 RSI 확인 중...\n")
-send_telegram("🤖 자동매매 봇 시작됨 (1분마다 시세 및 RSI 감시 중)")
+# 60분봉 RSI 증분 계산기
+feed = IndicatorFeed({'rsi': RSI(RSI_PERIOD)}, warmup=RSI_PERIOD * 2)
+
+# 실시간 체결 피드: 체결마다 손절/매매 조건 확인
+REST_REFRESH_SECONDS = 60
+market = MarketFeed('BTC/KRW', rest=upbit).start()
+refreshed_at = 0
+
+print("🚀 자동 매수·매도 봇 시작! 체결마다 시세 및 RSI 확인 중...\n")
+send_telegram("🤖 자동매매 봇 시작됨 (실시간 체결마다 시세 및 RSI 감시 중)")
 
 # ───────────────────────────────
 # 5. 반복 감시
 # ───────────────────────────────
 while True:
+    metrics.loop_tick()
     try:
-        # 현재 시세 확인
-        ticker = upbit.fetch_ticker('BTC/KRW')
-        current_price = ticker['last']
-        now = time.strftime('%Y-%m-%d %H:%M:%S')
-        print(f"[{now}] 현재 BTC 가격: {current_price}원")
-
-        # 내 잔고 정보 가져오기
-        balances = upbit.fetch_balance()
-        krw_balance = balances['total'].get('KRW', 0)
-        btc_balance = balances['total'].get('BTC', 0)
-        
-        # 보유 BTC의 현재가치 (평가액)
-        btc_value_in_krw = btc_balance * current_price
-
-        print(f"현재 KRW 잔고: {krw_balance:,.0f}원")
-        print(f"현재 BTC 잔고: {btc_balance:.8f} BTC ({btc_value_in_krw:,.0f}원)\n")
-
-        # 60분봉 데이터 가져오기 (RSI 계산에 충분한 과거 데이터)
-        ohlcv = upbit.fetch_ohlcv('BTC/KRW', '1h', limit=RSI_PERIOD * 2)
-        df = pd.DataFrame(ohlcv, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
-        df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
-        df['close'] = pd.to_numeric(df['close'])
-
-        # RSI 계산
-        df['rsi'] = ta.momentum.RSIIndicator(df['close'], window=RSI_PERIOD).rsi()
-        current_rsi = df['rsi'].iloc[-1] # 가장 최근 60분봉의 RSI 값
-        print(f"현재 60분봉 RSI: {current_rsi:.2f}\n")
+        # 현재 시세 확인 (새 체결이 들어올 때까지 대기)
+        with metrics.span('market_wait'):
+            current_price = market.wait(timeout=60)
+
+        # 잔고와 60분봉은 REST_REFRESH_SECONDS 마다 갱신 (매매 직후에는 즉시)
+        refreshed = time.time() - refreshed_at >= REST_REFRESH_SECONDS
+        if refreshed:
+            now = time.strftime('%Y-%m-%d %H:%M:%S')
+            print(f"[{now}] 현재 BTC 가격: {current_price}원")
+
+            # 내 잔고 정보 가져오기
+            account.refresh()
+            krw_balance, btc_balance = account.krw, account.btc
+
+            # 보유 BTC의 현재가치 (평가액)
+            btc_value_in_krw = btc_balance * current_price
+
+            print(f"현재 KRW 잔고: {krw_balance:,.0f}원")
+            print(f"현재 BTC 잔고: {btc_balance:.8f} BTC ({btc_value_in_krw:,.0f}원)\n")
+
+            # 60분봉 (처음에만 RSI 계산에 충분한 과거 데이터를 받고, 이후에는 최근 봉만 반영)
+            feed.refresh(lambda limit: upbit.fetch_ohlcv('BTC/KRW', '1h', limit=limit))
+            refreshed_at = time.time()
+
+        # RSI 계산 (진행 중인 60분봉의 종가를 실시간 체결가로 반영)
+        with metrics.span('indicators'):
+            current_rsi = feed.peek_price(current_price)['rsi']
+        if refreshed:
+            print(f"현재 60분봉 RSI: {current_rsi:.2f}\n")
 
         # ── 손절 조건 (가장 먼저 검사) ──
         # BTC를 보유하고 있고, 매수 가격 기록이 있으며, 현재 손실률이 손절 임계값을 초과할 때
@@ -96,10 +119,12 @@ while True:
             if loss_percent >= STOP_LOSS_PERCENT:
                 print(f"🚨 손절 조건 만족 (손실률: {loss_percent:.2%})! 비트코인 전량 매도 실행")
                 order = upbit.create_market_sell_order('BTC/KRW', round(btc_balance, 8))
+                account.apply_order(order, 'sell')
                 print("✅ 손절 매도 완료:", order)
                 send_telegram(f"🚨 손절 매도 완료! (손실률: {loss_percent:.2%})\n매수 가격: {bought_price:,.0f}원\n현재 가격: {current_price:,.0f}원\n수량: {round(btc_balance, 8)} BTC")
                 bought_price = 0 # 손절했으므로 매수 가격 초기화
-                time.sleep(TRADE_COOLDOWN_SECONDS) # 5분 대기 (중복 매도 방지)
+                refreshed_at = 0
+                metrics.sleep(TRADE_COOLDOWN_SECONDS) # 5분 대기 (중복 매도 방지)
                 continue # 손절 후에는 다른 조건 확인하지 않고 다음 루프로 넘어감
 
         # ── 매수 조건 ──
@@ -114,36 +139,41 @@ while True:
                 amount_btc = amount_to_buy_krw / current_price
                 print("💡 매수 조건 만족 (RSI 35 이하)! 비트코인 KRW 전액 매수 실행")
                 order = upbit.create_market_buy_order('BTC/KRW', round(amount_btc, 8))
+                account.apply_order(order, 'buy')
                 print("✅ 매수 완료:", order)
                 send_telegram(f"💰 KRW 전액 매수 완료 (RSI: {current_rsi:.2f})\n가격: {current_price:,.0f}원\n수량: {round(amount_btc, 8)} BTC\n매수 금액: {amount_to_buy_krw:,.0f}원")
                 bought_price = current_price # 매수 가격 기록
-                time.sleep(TRADE_COOLDOWN_SECONDS) # 5분 대기 (중복 매수 방지)
+                refreshed_at = 0
+                metrics.sleep(TRADE_COOLDOWN_SECONDS) # 5분 대기 (중복 매수 방지)
 
         # ── 매도 조건 ──
         # BTC 잔고가 0보다 크고 (비트코인 보유), RSI가 매도 임계값 이상일 때
         elif btc_balance > 0 and current_rsi >= RSI_SELL_THRESHOLD:
             print("📈 매도 조건 만족 (RSI 55 이상)! 비트코인 전량 매도 실행")
             order = upbit.create_market_sell_order('BTC/KRW', round(btc_balance, 8))
+            account.apply_order(order, 'sell')
             print("✅ 매도 완료:", order)
             send_telegram(f"📤 전량 매도 완료 (RSI: {current_rsi:.2f})\n가격: {current_price:,.0f}원\n수량: {round(btc_balance, 8)} BTC")
             bought_price = 0 # 매도했으므로 매수 가격 초기화
-            time.sleep(TRADE_COOLDOWN_SECONDS) # 5분 대기 (중복 매도 방지)
+            refreshed_at = 0
+            metrics.sleep(TRADE_COOLDOWN_SECONDS) # 5분 대기 (중복 매도 방지)
 
-        else:
+        elif refreshed:
             print("⏳ 조건 미충족: 대기 중...\n")
 
     except ccxt.NetworkError as e:
+        metrics.loop_error(e)
         print(f"❌ 네트워크 오류 발생: {e}")
         send_telegram(f"❌ 네트워크 오류: {str(e)}")
-        time.sleep(10) # 잠시 대기 후 재시도
+        metrics.sleep(10) # 잠시 대기 후 재시도
     except ccxt.ExchangeError as e:
+        metrics.loop_error(e)
         print(f"❌ 거래소 오류 발생: {e}")
         send_telegram(f"❌ 거래소 오류: {str(e)}")
         # 예: 최소 주문 금액 미달, 잔고 부족 등. 오류 메시지에 따라 대응 필요.
-        time.sleep(10)
+        metrics.sleep(10)
     except Exception as e:
+        metrics.loop_error(e)
         print(f"❌ 예상치 못한 오류 발생: {e}")
         send_telegram(f"❌ 예상치 못한 오류: {str(e)}")
-        time.sleep(10)
-
-    time.sleep(60) # 1분마다 반복 (매수/매도 후 대기시간은 별도 적용)
\ No newline at end of file
+        metrics.sleep(10)
\ No newline at end of file
@@ -0,0 +1,100 @@
+import argparse
+import json
+import os
+import time
+
+# ───────────────────────────────
+# 봇 상태 스냅샷 (재시작 복원)
+#
+# 매수 가격·손절 기준·쿨다운 종료 시각·증분 지표 상태는 메모리에만 있어서, 봇이 재시작되면
+# 손절이 조용히 꺼지고 지표 워밍업(최대 MA_LONG_PERIOD + 10 봉)을 처음부터 다시 받았습니다.
+# StateStore 는 상태가 바뀔 때마다 <BOT_STATE_DIR>/<bot>.json 에 스냅샷을 씁니다.
+#   • 원자적 교체: 임시 파일에 쓰고 fsync 한 뒤 os.replace (전원이 나가도 이전/새 스냅샷 중 하나만 남음)
+#   • 내용이 그대로면 쓰지 않음 (디스크 쓰기는 실제로 바뀐 경우에만)
+# 시작할 때 load() 로 읽어 IndicatorFeed.restore() 에 넘기면 스냅샷 이후 놓친 봉만 받아 이어 갑니다.
+# ───────────────────────────────
+
+DEFAULT_DIRECTORY = 'bot_state'
+
+
+class StateStore:
+    def __init__(self, path):
+        self.path = path
+        self._written = None
+
+    @classmethod
+    def from_env(cls, bot):
+        directory = os.getenv('BOT_STATE_DIR', DEFAULT_DIRECTORY)
+        return cls(os.path.join(directory, f"{bot}.json"))
+
+    def load(self):
+        """저장된 상태 dict (없거나 깨졌으면 빈 dict)."""
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                state = json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            print(f"⚠️ 상태 파일을 읽지 못해 새로 시작합니다 ({self.path}): {e}")
+            return {}
+        self._written = json.dumps(state.get('state', {}), sort_keys=True)
+        return state.get('state', {})
+
+    def saved_at(self):
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                return json.load(f).get('saved_at')
+        except (OSError, ValueError):
+            return None
+
+    def save(self, **state):
+        """상태가 바뀌었으면 원자적으로 저장하고 True."""
+        text = json.dumps(state, sort_keys=True)
+        if text == self._written:
+            return False
+        directory = os.path.dirname(self.path) or '.'
+        os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'saved_at': time.time(), 'state': state}, f, sort_keys=True)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+        # 이름 교체(디렉터리 항목)까지 디스크에 남겨야 재부팅 뒤에도 새 스냅샷이 보입니다.
+        dir_fd = os.open(directory, os.O_RDONLY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+        self._written = text
+        return True
+
+    def clear(self):
+        existed = os.path.exists(self.path)
+        if existed:
+            os.remove(self.path)
+        self._written = None
+        return existed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="봇 상태 스냅샷 확인/삭제")
+    parser.add_argument('bot', help="봇 이름 (예: rsi_risk_2)")
+    parser.add_argument('--clear', action='store_true', help="스냅샷 삭제 (다음 시작 때 처음부터 워밍업)")
+    args = parser.parse_args()
+
+    store = StateStore.from_env(args.bot)
+    if args.clear:
+        print("🗑️ 삭제했습니다." if store.clear() else "저장된 상태가 없습니다.")
+    else:
+        state = store.load()
+        if not state:
+            print("저장된 상태가 없습니다.")
+        else:
+            saved_at = store.saved_at()
+            print(f"{store.path} (저장: {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(saved_at))})")
+            for key, value in state.items():
+                if key == 'feed':
+                    print(f"  feed: 마지막 마감 봉 {value.get('last_closed_ts')} | 지표 {', '.join(value.get('indicators', {}))}")
+                else:
+                    print(f"  {key}: {value}")
@@ -0,0 +1,267 @@
+import operator
+
+from indicators import RSI, SMA, ADX, CLOSE
+
+# ───────────────────────────────
+# 전략 플러그인 (strategy_host.py 에서 실행)
+#
+# rsi_final / rsi_risk_1 / rsi_risk_2 / ma_adx / ma_mdi 스크립트의 매매 로직을 그대로 옮긴 것입니다.
+# 거래소 객체·시세·잔고·캔들은 호스트가 한 번만 받아서 모든 전략에 나눠 줍니다.
+#   • indicators: 필요한 지표 (같은 timeframe·종류·기간의 지표는 호스트가 하나만 계산)
+#   • on_bar(ctx):  timeframe 봉이 새로 시작될 때 (일봉 전략: 하루 1회)
+#   • on_tick(ctx): 체결마다 (실시간 손절/매매 전략)
+# 주문은 ctx.buy / ctx.sell 로 하고, 쿨다운 동안에는 호스트가 해당 전략만 건너뜁니다.
+# ───────────────────────────────
+
+MIN_ORDER_KRW = 5000  # 업비트 BTC/KRW 최소 주문 금액
+
+
+class Strategy:
+    name = 'strategy'
+    timeframe = '1h'
+    warmup = 0
+    cooldown_seconds = 300
+
+    def __init__(self):
+        self.indicators = {}
+
+    def start_message(self):
+        return f"🤖 {self.name} 전략 시작됨"
+
+    def on_bar(self, ctx):
+        pass
+
+    def on_tick(self, ctx):
+        pass
+
+
+# ───────────────────────────────
+# 60분봉 RSI 전략 (실시간 체결마다 판단)
+# ───────────────────────────────
+class RsiFinal(Strategy):
+    """rsi_final.py: RSI 35 이하 + 이동평균 정배열이면 전액 매수, RSI 55 이상 전량 매도, 5% 손절."""
+
+    name = 'rsi_final'
+    timeframe = '1h'
+
+    def __init__(self, rsi_period=14, buy_threshold=35, sell_threshold=55,
+                 ma_short=50, ma_long=200, stop_loss=0.05):
+        self.buy_threshold = buy_threshold
+        self.sell_threshold = sell_threshold
+        self.stop_loss = stop_loss
+        self.indicators = {'rsi': RSI(rsi_period), 'ma_short': SMA(ma_short), 'ma_long': SMA(ma_long)}
+        self.warmup = max(rsi_period * 2, ma_long + 10)
+        self.bought_price = 0
+
+    def start_message(self):
+        return "🤖 자동매매 봇 시작됨 (실시간 체결마다 시세 및 RSI, 이동평균선 감시 중)"
+
+    def on_tick(self, ctx):
+        current_price, current_rsi = ctx.price, ctx.values['rsi']
+        if ctx.refreshed:
+            print(f"[{self.name}] 60분봉 RSI: {current_rsi:.2f} | "
+                  f"MA: {ctx.values['ma_short']:,.0f} / {ctx.values['ma_long']:,.0f}")
+
+        if ctx.btc_balance > 0 and self.bought_price > 0:
+            loss_percent = (self.bought_price - current_price) / self.bought_price
+            if loss_percent >= self.stop_loss:
+                order = ctx.sell(ctx.btc_balance)
+                ctx.notify(f"🚨 손절 매도 완료! (손실률: {loss_percent:.2%})\n매수 가격: {self.bought_price:,.0f}원\n"
+                           f"현재 가격: {current_price:,.0f}원\n수량: {order['amount']} BTC")
+                self.bought_price = 0
+                return
+
+        if (ctx.btc_balance == 0 and current_rsi <= self.buy_threshold and ctx.krw_balance >= MIN_ORDER_KRW
+                and ctx.values['ma_short'] > ctx.values['ma_long']):
+            amount_krw = ctx.krw_balance
+            order = ctx.buy(amount_krw)
+            ctx.notify(f"💰 KRW 전액 매수 완료 (RSI: {current_rsi:.2f}, 골든 크로스)\n가격: {current_price:,.0f}원\n"
+                       f"수량: {order['amount']} BTC\n매수 금액: {amount_krw:,.0f}원")
+            self.bought_price = current_price
+        elif ctx.btc_balance > 0 and current_rsi >= self.sell_threshold:
+            order = ctx.sell(ctx.btc_balance)
+            ctx.notify(f"📤 전량 매도 완료 (RSI: {current_rsi:.2f})\n가격: {current_price:,.0f}원\n수량: {order['amount']} BTC")
+            self.bought_price = 0
+
+
+class RsiRisk1(Strategy):
+    """rsi_risk_1.py: RSI 35 이하 전액 매수, RSI 55 이상 전량 매도, 5% 손절."""
+
+    name = 'rsi_risk_1'
+    timeframe = '1h'
+
+    def __init__(self, rsi_period=14, buy_threshold=35, sell_threshold=55, stop_loss=0.05):
+        self.buy_threshold = buy_threshold
+        self.sell_threshold = sell_threshold
+        self.stop_loss = stop_loss
+        self.indicators = {'rsi': RSI(rsi_period)}
+        self.warmup = rsi_period * 2
+        self.bought_price = 0
+
+    def start_message(self):
+        return "🤖 자동매매 봇 시작됨 (실시간 체결마다 시세 및 RSI 감시 중)"
+
+    def on_tick(self, ctx):
+        current_price, current_rsi = ctx.price, ctx.values['rsi']
+        if ctx.refreshed:
+            print(f"[{self.name}] 60분봉 RSI: {current_rsi:.2f}")
+
+        if ctx.btc_balance > 0 and self.bought_price > 0:
+            loss_percent = (self.bought_price - current_price) / self.bought_price
+            if loss_percent >= self.stop_loss:
+                order = ctx.sell(ctx.btc_balance)
+                ctx.notify(f"🚨 손절 매도 완료! (손실률: {loss_percent:.2%})\n매수 가격: {self.bought_price:,.0f}원\n"
+                           f"현재 가격: {current_price:,.0f}원\n수량: {order['amount']} BTC")
+                self.bought_price = 0
+                return
+
+        if ctx.btc_balance == 0 and current_rsi <= self.buy_threshold and ctx.krw_balance >= MIN_ORDER_KRW:
+            amount_krw = ctx.krw_balance
+            order = ctx.buy(amount_krw)
+            ctx.notify(f"💰 KRW 전액 매수 완료 (RSI: {current_rsi:.2f})\n가격: {current_price:,.0f}원\n"
+                       f"수량: {order['amount']} BTC\n매수 금액: {amount_krw:,.0f}원")
+            self.bought_price = current_price
+        elif ctx.btc_balance > 0 and current_rsi >= self.sell_threshold:
+            order = ctx.sell(ctx.btc_balance)
+            ctx.notify(f"📤 전량 매도 완료 (RSI: {current_rsi:.2f})\n가격: {current_price:,.0f}원\n수량: {order['amount']} BTC")
+            self.bought_price = 0
+
+
+class RsiRisk2(Strategy):
+    """rsi_risk_2.py: RSI 35/30 에서 50%/100% 매수, RSI 55/60 에서 50%/100% 매도, 5% 손절."""
+
+    name = 'rsi_risk_2'
+    timeframe = '1h'
+
+    def __init__(self, rsi_period=14, buy_partial=35, buy_full=30, sell_partial=55, sell_full=60, stop_loss=0.05):
+        self.buy_partial, self.buy_full = buy_partial, buy_full
+        self.sell_partial, self.sell_full = sell_partial, sell_full
+        self.stop_loss = stop_loss
+        self.indicators = {'rsi': RSI(rsi_period)}
+        self.warmup = rsi_period * 2
+        self.last_buy_price = 0
+
+    def start_message(self):
+        return "🤖 자동매매 봇 시작됨 (실시간 체결마다 시세 및 RSI 감시 중)"
+
+    def on_tick(self, ctx):
+        current_price, current_rsi = ctx.price, ctx.values['rsi']
+        if ctx.refreshed:
+            print(f"[{self.name}] 60분봉 RSI: {current_rsi:.2f}")
+
+        if ctx.btc_balance > 0 and self.last_buy_price > 0:
+            if current_price <= self.last_buy_price * (1 - self.stop_loss):
+                loss = (self.last_buy_price - current_price) / self.last_buy_price * 100
+                order = ctx.sell(ctx.btc_balance)
+                ctx.notify(f"📉 손절 매도 완료! (RSI: {current_rsi:.2f})\n매수가: {self.last_buy_price:,.0f}원\n"
+                           f"현재가: {current_price:,.0f}원\n손실률: {loss:.2f}%\n수량: {order['amount']} BTC")
+                self.last_buy_price = 0
+
+        elif ctx.btc_balance == 0 and ctx.krw_balance >= MIN_ORDER_KRW:
+            if current_rsi <= self.buy_full:
+                amount_krw, percentage = ctx.krw_balance, 100
+            elif current_rsi <= self.buy_partial:
+                amount_krw, percentage = ctx.krw_balance * 0.5, 50
+            else:
+                return
+            if amount_krw >= MIN_ORDER_KRW:
+                order = ctx.buy(amount_krw)
+                self.last_buy_price = current_price
+                ctx.notify(f"💰 KRW {percentage}% 매수 완료 (RSI: {current_rsi:.2f})\n가격: {current_price:,.0f}원\n"
+                           f"수량: {order['amount']} BTC\n매수 금액: {amount_krw:,.0f}원")
+
+        elif ctx.btc_balance > 0:
+            if current_rsi >= self.sell_full:
+                amount_btc, percentage = ctx.btc_balance, 100
+            elif current_rsi >= self.sell_partial:
+                amount_btc, percentage = ctx.btc_balance * 0.5, 50
+            else:
+                return
+            order = ctx.sell(amount_btc)
+            ctx.notify(f"📤 {percentage}% 매도 완료 (RSI: {current_rsi:.2f})\n가격: {current_price:,.0f}원\n수량: {order['amount']} BTC")
+            if percentage == 100:
+                self.last_buy_price = 0
+
+
+# ───────────────────────────────
+# 일봉 MA 크로스 전략 (일봉이 새로 시작될 때 하루 1회 판단)
+# ───────────────────────────────
+class MaCross(Strategy):
+    """ma_adx.py / ma_mdi.py 공통: 골든/데드 크로스 + DMI 필터, 일봉 종가 기준 손절.
+
+    DMI 필터는 dmi_field(ADX 값의 속성: 'adx' / 'adx_neg')를 buy_compare(값, buy_thresh),
+    sell_compare(값, sell_thresh) 로 비교합니다.
+    """
+
+    timeframe = '1d'
+    cooldown_seconds = 0
+    warmup = 100
+
+    def __init__(self, ma_short, ma_long, dmi_window, dmi_field, buy_compare, buy_thresh, sell_compare, sell_thresh,
+                 stop_loss_pct=0.06, trade_fee_rate=0.0005):
+        self.dmi_field = dmi_field
+        self.buy_compare, self.buy_thresh = buy_compare, buy_thresh
+        self.sell_compare, self.sell_thresh = sell_compare, sell_thresh
+        self.stop_loss_pct = stop_loss_pct
+        self.trade_fee_rate = trade_fee_rate
+        self.indicators = {'ma_short': SMA(ma_short), 'ma_long': SMA(ma_long), 'dmi': ADX(dmi_window)}
+        self.last_buy_price = None
+
+    def buy_filter(self, dmi):
+        return self.buy_compare(getattr(dmi, self.dmi_field), self.buy_thresh)
+
+    def sell_filter(self, dmi):
+        return self.sell_compare(getattr(dmi, self.dmi_field), self.sell_thresh)
+
+    def on_bar(self, ctx):
+        curr, prev = ctx.values, ctx.previous
+        today_close = ctx.last_bar[CLOSE]
+        print(f"[{self.name}] 종가: {today_close:.0f}원 | MA: {curr['ma_short']:.0f} / {curr['ma_long']:.0f} | "
+              f"ADX: {curr['dmi'].adx:.2f} | MDI: {curr['dmi'].adx_neg:.2f}")
+
+        if self.last_buy_price and ctx.btc_balance > 0 and today_close <= self.last_buy_price * (1 - self.stop_loss_pct):
+            order = ctx.sell(ctx.btc_balance)
+            ctx.notify(f"⚠️ 손절 매도\n가격: {ctx.average_price(order):.0f}원\n수량: {order['amount']} BTC")
+            self.last_buy_price = None
+
+        golden = (prev['ma_short'] <= prev['ma_long'] and curr['ma_short'] > curr['ma_long']) or (curr['ma_short'] > curr['ma_long'])
+        eligible_krw = ctx.krw_balance * (1 - self.trade_fee_rate)
+        if golden and self.buy_filter(curr['dmi']) and eligible_krw >= MIN_ORDER_KRW:
+            order = ctx.buy(eligible_krw)
+            self.last_buy_price = ctx.average_price(order)
+            ctx.notify(f"💰 매수 완료\n가격: {self.last_buy_price:.0f}원\n수량: {order['amount']} BTC")
+
+        death = (prev['ma_short'] >= prev['ma_long'] and curr['ma_short'] < curr['ma_long']) or (curr['ma_short'] < curr['ma_long'])
+        if (death or self.sell_filter(curr['dmi'])) and ctx.btc_balance > 0:
+            order = ctx.sell(ctx.btc_balance)
+            ctx.notify(f"📤 매도 완료\n가격: {ctx.average_price(order):.0f}원\n수량: {order['amount']} BTC")
+            self.last_buy_price = None
+
+
+class MaAdx(MaCross):
+    """ma_adx.py: 골든 크로스 + ADX > 23 매수, 데드 크로스 또는 ADX < 22 매도."""
+
+    name = 'ma_adx'
+
+    def __init__(self, ma_short=20, ma_long=50, adx_window=30, buy_thresh=23, sell_thresh=22, **kwargs):
+        super().__init__(ma_short, ma_long, adx_window, 'adx', operator.gt, buy_thresh, operator.lt, sell_thresh,
+                         **kwargs)
+
+    def start_message(self):
+        return "🤖 비트코인 자동매매 봇(ADX 기반, 일봉) 시작되었습니다."
+
+
+class MaMdi(MaCross):
+    """ma_mdi.py: 골든 크로스 + MDI ≤ 15 매수, 데드 크로스 또는 MDI ≥ 27 매도."""
+
+    name = 'ma_mdi'
+
+    def __init__(self, ma_short=20, ma_long=50, mdi_window=14, buy_thresh=15, sell_thresh=27, **kwargs):
+        super().__init__(ma_short, ma_long, mdi_window, 'adx_neg', operator.le, buy_thresh, operator.ge, sell_thresh,
+                         **kwargs)
+
+    def start_message(self):
+        return "🤖 비트코인 자동매매 봇(일봉, 하루 1회) 시작되었습니다."
+
+
+STRATEGIES = {cls.name: cls for cls in (RsiFinal, RsiRisk1, RsiRisk2, MaAdx, MaMdi)}
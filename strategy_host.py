@@ -0,0 +1,340 @@
+import argparse
+import os
+import time
+
+import ccxt
+from dotenv import load_dotenv
+
+from account_cache import AccountCache
+from indicators import IndicatorFeed, TS
+from market_feed import MarketFeed
+from metrics import BotMetrics
+from notifier import TelegramNotifier
+from request_scheduler import schedule
+from resampler import DAILY_OPEN_OFFSETS, MinuteStream, Resampler
+from strategies import MIN_ORDER_KRW, STRATEGIES
+
+# ───────────────────────────────
+# 멀티 전략 호스트
+#
+# 전략 스크립트를 따로 띄우면 스크립트마다 ccxt 객체를 만들고 같은 시세·잔고·캔들을 각자 받습니다.
+# 호스트는 한 프로세스에서
+#   • 거래소 객체, 웹소켓 시세 피드, 텔레그램 알림을 하나씩만 두고
+#   • REST_REFRESH_SECONDS 마다 timeframe 별 캔들 1회만 조회하고 (잔고는 AccountCache)
+#   • 같은 지표(종류·기간·timeframe)는 한 번만 계산한 뒤 모든 전략(strategies.py)에 나눠 줍니다.
+# 전략이 주문하면 체결 결과로 잔고 캐시를 바로 갱신하므로 다음 전략도 최신 잔고를 봅니다.
+# resample=True 이면 timeframe 별 캔들 대신 1분봉 한 줄기만 이어 받고 1h·1d 등은 resampler.py 로 만듭니다
+# (처음 워밍업에 필요한 과거 봉만 timeframe 별로 한 번 받음).
+#
+# 전략마다 전액 매수/전량 매도를 하므로 전략이 둘 이상이면 지갑 하나를 그대로 나눠 보게 두면 안 됩니다
+# (한 전략의 매도가 다른 전략이 산 BTC 를 팔고, 남아 있던 매수 가격으로 엉뚱한 손절이 남).
+# 그래서 시작할 때 잔고를 allocations 비율(기본: 균등)로 나눠 전략별 장부(StrategyBook)를 만들고,
+# 주문 전후 잔고 변화를 주문한 전략의 장부에만 반영합니다. 전략은 ctx.krw_balance / ctx.btc_balance 로
+# 자기 몫만 봅니다. 장부는 메모리에만 있어 재시작하면 그때의 잔고를 다시 나눕니다.
+# 전략이 하나면 장부 없이 지갑 잔고를 그대로 씁니다.
+# ───────────────────────────────
+
+REST_REFRESH_SECONDS = 60
+ERROR_COOLDOWN_SECONDS = 10
+BTC_DUST = 1e-8       # 업비트 수량 단위: 이보다 작은 장부 잔량은 0 으로
+KRW_DUST = 1.0
+
+
+def indicator_key(indicator):
+    return f"{type(indicator).__name__}{indicator.window}"
+
+
+class StrategyBook:
+    """전략 하나의 몫: 배정받은 KRW 와 이 전략의 주문으로 바뀐 잔고."""
+
+    def __init__(self, krw=0.0, btc=0.0):
+        self.krw = krw
+        self.btc = btc
+
+    def apply(self, krw_delta, btc_delta):
+        # 전량 매도 후 부동소수점 뺄셈으로 남는 잔량(예: 8.67e-19 BTC)은 0 으로 정리
+        self.krw = self.krw + krw_delta
+        self.btc = self.btc + btc_delta
+        if self.krw < KRW_DUST:
+            self.krw = 0.0
+        if self.btc < BTC_DUST:
+            self.btc = 0.0
+
+
+def parse_allocations(text):
+    # "rsi_final=0.3,ma_adx=0.7" → {'rsi_final': 0.3, 'ma_adx': 0.7}
+    allocations = {}
+    for item in text.split(','):
+        if item.strip():
+            name, _, weight = item.partition('=')
+            allocations[name.strip()] = float(weight)
+    return allocations
+
+
+class Context:
+    """전략 콜백에 넘기는 이번 틱/봉의 시장 데이터와 주문 함수."""
+
+    def __init__(self, host, strategy, price, values, previous, last_bar, refreshed):
+        self.host = host
+        self.strategy = strategy
+        self.price = price
+        self.values = values
+        self.previous = previous
+        self.last_bar = last_bar
+        self.refreshed = refreshed
+
+    @property
+    def krw_balance(self):
+        return self.host.krw_balance(self.strategy)
+
+    @property
+    def btc_balance(self):
+        return self.host.btc_balance(self.strategy, self.price)
+
+    def buy(self, krw_amount):
+        return self.host.buy(self.strategy, krw_amount, self.price)
+
+    def sell(self, btc_amount):
+        return self.host.sell(self.strategy, btc_amount)
+
+    def notify(self, message):
+        self.host.notify(f"[{self.strategy.name}] {message}")
+
+    @staticmethod
+    def average_price(order):
+        filled = order.get('filled') or 0
+        return order['cost'] / filled if filled > 0 and order.get('cost') else (order.get('price') or 0)
+
+
+class StrategyHost:
+    def __init__(self, exchange, strategies, market, symbol='BTC/KRW', notify=print,
+                 refresh_seconds=REST_REFRESH_SECONDS, metrics=None, resample=False, daily_open='utc',
+                 allocations=None):
+        self.exchange = exchange
+        self.strategies = strategies
+        self.market = market
+        self.symbol = symbol
+        self.notify = notify
+        self.refresh_seconds = refresh_seconds
+        self.metrics = metrics or BotMetrics('strategy_host')
+        self.base, self.quote = symbol.split('/')
+
+        self.account = AccountCache(exchange, base=self.base, quote=self.quote, on_drift=notify)
+        self.rest_calls = 0
+        self.refreshed_at = 0
+        self._cooldown_until = {strategy.name: 0 for strategy in strategies}
+
+        # 전략별 장부 비율 (전략이 하나면 장부 없이 지갑 전체)
+        self.allocations = None
+        self.books = None
+        if len(strategies) > 1:
+            weights = {strategy.name: (allocations or {}).get(strategy.name, 0 if allocations else 1)
+                       for strategy in strategies}
+            unknown = set(allocations or {}) - set(weights)
+            if unknown:
+                raise ValueError(f"배분 비율에 실행하지 않는 전략이 있습니다: {', '.join(sorted(unknown))}")
+            total = sum(weights.values())
+            if total <= 0 or min(weights.values()) < 0:
+                raise ValueError(f"배분 비율이 올바르지 않습니다: {weights}")
+            self.allocations = {name: weight / total for name, weight in weights.items()}
+
+        # timeframe 별로 지표를 하나의 IndicatorFeed 에 모음 (같은 지표는 공유)
+        self.feeds = {}
+        self._names = {}              # 전략 이름 → {전략의 지표 이름: 공유 지표 키}
+        for strategy in strategies:
+            indicators = {indicator_key(indicator): indicator for indicator in strategy.indicators.values()}
+            self._names[strategy.name] = {name: indicator_key(indicator)
+                                          for name, indicator in strategy.indicators.items()}
+            feed = self.feeds.get(strategy.timeframe)
+            if feed is None:
+                self.feeds[strategy.timeframe] = IndicatorFeed(indicators, warmup=strategy.warmup)
+            else:
+                for key, indicator in indicators.items():
+                    feed.indicators.setdefault(key, indicator)
+                feed.warmup = max(feed.warmup, strategy.warmup)
+        self._bar_values = {timeframe: {} for timeframe in self.feeds}
+        self._bar_ts = {timeframe: None for timeframe in self.feeds}
+
+        self.resampler = None
+        self.minutes = None
+        if resample:
+            history = max(feed.warmup for feed in self.feeds.values()) + 1
+            self.resampler = Resampler(self.feeds, daily_open=daily_open, history=history)
+            self.minutes = MinuteStream(exchange, symbol, self.resampler)
+
+    # ── REST 조회 (틱당 한 번, 모든 전략 공용) ──
+    def _fetch_ohlcv(self, timeframe, limit):
+        if self.resampler is not None:
+            if not self.resampler.seeded(timeframe) and self.resampler.available(timeframe) < limit:
+                # 1분봉으로 만든 봉이 워밍업에 모자라면 그 앞쪽 과거 봉만 한 번 받아 채움
+                self.rest_calls += 1
+                self.resampler.seed(timeframe, self.exchange.fetch_ohlcv(self.symbol, timeframe, limit=limit))
+            return self.resampler.ohlcv(timeframe, limit)
+        self.rest_calls += 1
+        return self.exchange.fetch_ohlcv(self.symbol, timeframe, limit=limit)
+
+    def refresh(self, price):
+        new_bars = []
+        if self.minutes is not None:
+            requests = self.minutes.requests
+            with self.metrics.span('candles'):
+                self.minutes.sync()
+            self.rest_calls += self.minutes.requests - requests
+        for timeframe, feed in self.feeds.items():
+            with self.metrics.span('indicators'):
+                self._bar_values[timeframe] = feed.refresh(lambda limit, tf=timeframe: self._fetch_ohlcv(tf, limit))
+            if feed.last_bar is not None and feed.last_bar[TS] != self._bar_ts[timeframe]:
+                self._bar_ts[timeframe] = feed.last_bar[TS]
+                new_bars.append(timeframe)
+        self.refreshed_at = time.time()
+
+        print(f"[{time.strftime('%Y-%m-%d %H:%M:%S')}] 현재 {self.symbol} 가격: {price:,.0f}원 | "
+              f"KRW: {self.account.krw:,.0f}원 | {self.base}: {self.account.btc:.8f} | "
+              f"REST 호출 누적: 캔들 {self.rest_calls} · 잔고 {self.account.fetches}")
+        return new_bars
+
+    # ── 전략별 장부 ──
+    def _open_books(self):
+        # 처음 받은 잔고를 배분 비율로 나눔 (이미 들고 있던 BTC 도 같은 비율)
+        if self.allocations is not None and self.books is None:
+            self.books = {name: StrategyBook(self.account.krw * weight, self.account.btc * weight)
+                          for name, weight in self.allocations.items()}
+
+    def krw_balance(self, strategy):
+        if self.books is None:
+            return self.account.krw
+        return min(self.books[strategy.name].krw, self.account.krw)
+
+    def btc_balance(self, strategy, price):
+        if self.books is None:
+            return self.account.btc
+        # 최소 주문 금액에 못 미치는 잔량은 팔 수 없으므로 보유 없음으로 봄 (매 틱 0원 매도 시도 방지)
+        btc = min(self.books[strategy.name].btc, self.account.btc)
+        return btc if btc * price >= MIN_ORDER_KRW else 0.0
+
+    # ── 주문 (전략 공용) ──
+    def buy(self, strategy, krw_amount, price):
+        before = (self.account.krw, self.account.btc)
+        order = self.exchange.create_market_buy_order(self.symbol, round(krw_amount / price, 8))
+        self._after_order(strategy, order, 'buy', before)
+        return order
+
+    def sell(self, strategy, btc_amount):
+        before = (self.account.krw, self.account.btc)
+        order = self.exchange.create_market_sell_order(self.symbol, round(btc_amount, 8))
+        self._after_order(strategy, order, 'sell', before)
+        return order
+
+    def _after_order(self, strategy, order, side, before):
+        print(f"✅ [{strategy.name}] 주문 완료:", order)
+        if not self.account.apply_order(order, side):
+            # 체결 정보가 없는 주문이면 다음 전략 전에 거래소 잔고를 다시 조회
+            self.account.refresh(force=True)
+        if self.books is not None:
+            # 주문 전후 잔고 차이(체결 금액·수수료 포함)를 주문한 전략의 장부에만 반영
+            self.books[strategy.name].apply(self.account.krw - before[0], self.account.btc - before[1])
+        self._cooldown_until[strategy.name] = time.time() + strategy.cooldown_seconds
+
+    # ── 전략 호출 ──
+    def _context(self, strategy, price, values, refreshed):
+        feed = self.feeds[strategy.timeframe]
+        names = self._names[strategy.name]
+        return Context(
+            self, strategy, price,
+            values={name: values[key] for name, key in names.items()},
+            previous={name: feed.previous.get(key) for name, key in names.items()},
+            last_bar=feed.last_bar,
+            refreshed=refreshed,
+        )
+
+    def _call(self, strategy, handler, ctx):
+        if time.time() < self._cooldown_until[strategy.name]:
+            return
+        try:
+            with self.metrics.span(f"strategy_{strategy.name}"):
+                handler(ctx)
+        except ccxt.NetworkError as e:
+            self.metrics.loop_error(e)
+            print(f"❌ [{strategy.name}] 네트워크 오류 발생: {e}")
+            self.notify(f"❌ [{strategy.name}] 네트워크 오류: {e}")
+            self._cooldown_until[strategy.name] = time.time() + ERROR_COOLDOWN_SECONDS
+        except ccxt.ExchangeError as e:
+            self.metrics.loop_error(e)
+            print(f"❌ [{strategy.name}] 거래소 오류 발생: {e}")
+            self.notify(f"❌ [{strategy.name}] 거래소 오류: {e}")
+            self._cooldown_until[strategy.name] = time.time() + ERROR_COOLDOWN_SECONDS
+        except Exception as e:
+            self.metrics.loop_error(e)
+            print(f"❌ [{strategy.name}] 예상치 못한 오류 발생: {e}")
+            self.notify(f"❌ [{strategy.name}] 예상치 못한 오류: {e}")
+            self._cooldown_until[strategy.name] = time.time() + ERROR_COOLDOWN_SECONDS
+
+    def step(self, price):
+        self.account.refresh()
+        self._open_books()
+        refreshed = time.time() - self.refreshed_at >= self.refresh_seconds
+        new_bars = self.refresh(price) if refreshed else []
+
+        for strategy in self.strategies:
+            if strategy.timeframe in new_bars:
+                self._call(strategy, strategy.on_bar,
+                           self._context(strategy, price, self._bar_values[strategy.timeframe], refreshed))
+
+        # 진행 중인 봉의 종가를 실시간 체결가로 두고 timeframe 별로 한 번만 peek
+        with self.metrics.span('indicators'):
+            tick_values = {timeframe: feed.peek_price(price) for timeframe, feed in self.feeds.items()
+                           if feed.last_bar is not None}
+        for strategy in self.strategies:
+            if strategy.timeframe in tick_values:
+                self._call(strategy, strategy.on_tick,
+                           self._context(strategy, price, tick_values[strategy.timeframe], refreshed))
+
+    def run(self):
+        for strategy in self.strategies:
+            self.notify(strategy.start_message())
+        while True:
+            self.metrics.loop_tick()
+            try:
+                with self.metrics.span('market_wait'):
+                    price = self.market.wait(timeout=60)
+                self.step(price)
+            except Exception as e:
+                self.metrics.loop_error(e)
+                print(f"❌ 호스트 루프 오류 발생: {e}")
+                self.notify(f"❌ 호스트 루프 오류: {e}")
+                self.refreshed_at = 0
+                self.metrics.sleep(ERROR_COOLDOWN_SECONDS)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="여러 전략을 한 프로세스에서 실행")
+    parser.add_argument('--strategies', default=','.join(STRATEGIES),
+                        help=f"쉼표로 구분한 전략 이름 (기본: 전부) — {', '.join(STRATEGIES)}")
+    parser.add_argument('--symbol', default='BTC/KRW')
+    parser.add_argument('--resample', action='store_true',
+                        help="1분봉 한 줄기만 받아 전략 timeframe 봉을 로컬에서 만듦")
+    parser.add_argument('--daily-open', choices=list(DAILY_OPEN_OFFSETS), default='utc',
+                        help="--resample 일봉 시작: utc(업비트, KST 09:00) / kst(KST 자정)")
+    parser.add_argument('--allocation', default=None,
+                        help="전략별 자금 배분 비율, 예: rsi_final=0.3,ma_adx=0.7 (기본: 실행하는 전략에 균등 배분)")
+    args = parser.parse_args()
+
+    load_dotenv()
+    upbit = ccxt.upbit({
+        'apiKey': os.getenv('UPBIT_API_KEY'),
+        'secret': os.getenv('UPBIT_SECRET_KEY'),
+    })
+    schedule(upbit, os.getenv('UPBIT_API_KEY'))
+    metrics = BotMetrics.from_env('strategy_host')
+    metrics.instrument(upbit)
+    notifier = TelegramNotifier(os.getenv('TELEGRAM_TOKEN'), os.getenv('TELEGRAM_CHAT_ID'))
+    market = MarketFeed(args.symbol, rest=upbit).start()
+    strategies = [STRATEGIES[name.strip()]() for name in args.strategies.split(',') if name.strip()]
+    host = StrategyHost(upbit, strategies, market, symbol=args.symbol, notify=notifier.send, metrics=metrics,
+                        resample=args.resample, daily_open=args.daily_open,
+                        allocations=parse_allocations(args.allocation) if args.allocation else None)
+
+    allocation = (f" | 자금 배분: {', '.join(f'{name} {weight:.0%}' for name, weight in host.allocations.items())}"
+                  if host.allocations else "")
+    print(f"🚀 멀티 전략 호스트 시작! ({', '.join(strategy.name for strategy in strategies)}){allocation}\n")
+    host.run()
@@ -0,0 +1,279 @@
+import argparse
+import json
+import os
+import time
+from multiprocessing import Pool
+
+import numpy as np
+import pandas as pd
+
+import backtest_cache
+import backtest_engine
+import param_sweep
+from backtest_cache import BacktestCache, data_digest
+
+# ───────────────────────────────
+# 워크포워드 최적화 (MA/ADX · MA/MDI)
+#
+# backtest_bot 의 START_DATE/END_DATE 전체 구간에서 고른 파라미터는 그 구간을 이미 본 결과입니다.
+# 여기서는 기간을 [학습 train_months | 검증 test_months] 창으로 나눠 test_months 씩 밀어 가며
+#   • 학습 창에서 param_sweep 의 그리드 전체를 시뮬레이션해 목표 지표가 가장 좋은 조합을 고르고
+#   • 바로 다음 검증 창에서 그 조합만 돌려 표본 외(out-of-sample) 성과를 구한 뒤
+#   • 검증 창들의 자산 곡선을 이어 붙여 (앞 창의 최종 자산에서 다음 창 시작) 하나의 곡선으로 요약합니다.
+# 각 창(fold)은 워커 프로세스에서 독립적으로 돌고, 캔들 배열은 param_sweep 과 같이 공유 메모리에 한 번만 올립니다.
+#
+# 지표는 워커마다 전체 배열에서 (지표 파라미터별로 한 번) 계산하고 창마다 잘라 씁니다. 지표는 과거 봉만
+# 쓰므로 창 앞쪽 워밍업은 이미 올려 둔 이전 봉들이 채우고, 창마다 캔들을 다시 받거나 지표를 처음부터
+# 다시 계산하지 않습니다. 창이 데이터 시작에 걸리면 일반 백테스트처럼 워밍업이 끝난 봉부터 판단합니다.
+# 검증 창 끝에 남은 포지션은 마지막 종가로 평가하고, 다음 창은 현금으로 새 파라미터를 시작합니다.
+# 손절은 학습·검증 모두 같은 판정(기본: backtest_bot 과 같은 봉 저가 기준, --stop close 로 종가)으로 시뮬레이션합니다.
+# ───────────────────────────────
+
+TRAIN_MONTHS = 24
+TEST_MONTHS = 6
+OBJECTIVES = ('total_return', 'monthly_avg_return', 'max_drawdown')
+
+_worker_data = None
+_worker_shm = None
+_worker_cache = None
+_worker_digest = None
+_worker_indicators = {}
+
+
+# ───────────────────────────────
+# 창 나누기
+# ───────────────────────────────
+def walk_forward_folds(index, train_months=TRAIN_MONTHS, test_months=TEST_MONTHS, anchored=False):
+    """[{'fold', 'train': (시작 행, 끝 행), 'test': (시작 행, 끝 행)}, ...] (끝 행은 포함하지 않음).
+
+    anchored=True 이면 학습 창 시작을 데이터 처음에 고정하고 끝만 늘립니다. 마지막 검증 창은 데이터 끝에서 잘립니다.
+    """
+    if len(index) == 0:
+        return []
+    origin = index[0].normalize()
+    folds = []
+    while True:
+        shift = pd.DateOffset(months=test_months * len(folds))
+        train_start = origin if anchored else origin + shift
+        test_start = origin + shift + pd.DateOffset(months=train_months)
+        test_end = test_start + pd.DateOffset(months=test_months)
+        if test_start > index[-1]:
+            break
+        rows = index.searchsorted([train_start, test_start, test_end]).tolist()
+        folds.append({'fold': len(folds) + 1, 'train': (rows[0], rows[1]), 'test': (rows[1], rows[2])})
+    return folds
+
+
+# ───────────────────────────────
+# 창 하나 평가
+# ───────────────────────────────
+def window_rows(ohlcv_data, indicators, start, end, warmup):
+    # 전체 구간 지표를 end 까지 잘라 창 [start, end) 의 판단 행을 구함 (앞쪽 워밍업은 이전 봉이 채움)
+    frame = ohlcv_data.iloc[:end]
+    sliced = {key: values[:end] for key, values in indicators.items()}
+    return frame, sliced, backtest_engine.decision_rows(frame, sliced, max(start, warmup))
+
+
+def rank_table(table, objective='total_return'):
+    # 목표 지표가 큰 순 (같으면 낙폭이 작은 순). max_drawdown 은 음수이므로 역시 큰 쪽이 좋음.
+    # 인덱스는 table 의 원래 위치를 유지합니다.
+    table = pd.DataFrame(table)
+    if table.empty:
+        return table
+    keys = [objective] if objective == 'max_drawdown' else [objective, 'max_drawdown']
+    return table.sort_values(keys, ascending=False, na_position='last', kind='stable')
+
+
+def evaluate_fold(ohlcv_data, strategy, groups, fold, objective='total_return', indicators=None,
+                  stop_mode=param_sweep.STOP_MODE):
+    """학습 창에서 조합 전체를 평가해 최적 조합을 고르고, 검증 창에서 그 조합을 평가합니다.
+
+    indicators(strategy, 조합) 는 전체 구간 지표 dict 를 돌려주는 함수입니다 (기본: 매번 계산).
+    """
+    config = param_sweep.STRATEGIES[strategy]
+    if indicators is None:
+        def indicators(strategy, combo):
+            return config['indicators'](ohlcv_data, combo['ma_short'], combo['ma_long'], combo[config['window']])
+
+    train_start, train_end = fold['train']
+    trained = []
+    for combos in groups:
+        frame, sliced, rows = window_rows(ohlcv_data, indicators(strategy, combos[0]), train_start, train_end,
+                                          param_sweep.warmup_bars(strategy, combos[0]))
+        trained.extend(param_sweep.simulate_group(frame, strategy, combos, sliced, rows, stop_mode)[0])
+    ranked = rank_table(trained, objective)
+    result = {'fold': fold['fold'], 'train': fold['train'], 'test': fold['test'], 'best': None}
+    if ranked.empty:
+        return result
+    best = trained[ranked.index[0]]
+    params = {key: best[key] for key in groups[0][0]}
+
+    test_start, test_end = fold['test']
+    frame, sliced, rows = window_rows(ohlcv_data, indicators(strategy, params), test_start, test_end,
+                                      param_sweep.warmup_bars(strategy, params))
+    tested, grid_result = param_sweep.simulate_group(frame, strategy, [params], sliced, rows, stop_mode)
+    result.update({
+        'best': params,
+        'train_summary': {key: best[key] for key in ('total_return', 'monthly_avg_return', 'max_drawdown', 'trades')},
+        'test_summary': {key: tested[0][key] for key in ('total_return', 'monthly_avg_return', 'max_drawdown',
+                                                          'trades', 'final_value')},
+        'dates': ohlcv_data.index.asi8[rows] // 1_000_000,
+        'values': grid_result['values'][:, 0],
+    })
+    return result
+
+
+# ───────────────────────────────
+# 워커 (공유 메모리 캔들 + 워커별 지표 메모)
+# ───────────────────────────────
+def _init_worker(name, shape, cache_args=None, digest=None):
+    global _worker_shm, _worker_data, _worker_cache, _worker_digest
+    _worker_shm, _worker_data = param_sweep.attach_ohlcv(name, shape)
+    if cache_args is not None:
+        _worker_cache = BacktestCache(*cache_args)
+        _worker_digest = digest
+
+
+def _worker_indicator(strategy, combo):
+    # 같은 워커가 맡은 여러 창에서 같은 지표 파라미터는 한 번만 계산 (캐시를 켜면 워커 간에도 공유)
+    config = param_sweep.STRATEGIES[strategy]
+    key = (strategy, combo['ma_short'], combo['ma_long'], combo[config['window']])
+    if key not in _worker_indicators:
+        if _worker_cache is not None:
+            _worker_indicators[key] = backtest_cache.indicators(_worker_cache, _worker_data, *key,
+                                                                digest=_worker_digest)
+        else:
+            _worker_indicators[key] = config['indicators'](_worker_data, *key[1:])
+    return _worker_indicators[key]
+
+
+def _run_fold(task):
+    strategy, groups, fold, objective, stop_mode = task
+    return evaluate_fold(_worker_data, strategy, groups, fold, objective, indicators=_worker_indicator,
+                         stop_mode=stop_mode)
+
+
+# ───────────────────────────────
+# 실행 · 이어 붙이기
+# ───────────────────────────────
+def stitch_equity(fold_results, initial_krw):
+    # 검증 창 곡선을 이어 붙임: 각 창은 initial_krw 로 시작하므로 직전 창까지의 누적 자산 비율로 환산
+    portfolio_values = []
+    equity = float(initial_krw)
+    for result in fold_results:
+        if result['best'] is None:
+            continue
+        scale = equity / initial_krw
+        portfolio_values.extend(
+            {'date': date, 'value': value * scale}
+            for date, value in zip(pd.to_datetime(result['dates'], unit='ms').to_pydatetime(),
+                                   result['values'].tolist())
+        )
+        equity *= result['test_summary']['final_value'] / initial_krw
+    return portfolio_values, equity
+
+
+def run_walk_forward(ohlcv_data, grid, base_params, strategy='ma_adx', train_months=TRAIN_MONTHS,
+                     test_months=TEST_MONTHS, anchored=False, objective='total_return', workers=None, cache=None,
+                     stop_mode=param_sweep.STOP_MODE):
+    if objective not in OBJECTIVES:
+        raise ValueError(f"알 수 없는 목표 지표: {objective} ({', '.join(OBJECTIVES)})")
+    groups = param_sweep.expand_grid(grid, base_params, strategy)
+    folds = walk_forward_folds(ohlcv_data.index, train_months, test_months, anchored)
+    tasks = [(strategy, groups, fold, objective, stop_mode) for fold in folds]
+    workers = min(workers or os.cpu_count(), max(len(tasks), 1))
+    cache_args = (cache.directory, cache.max_bytes) if cache is not None else None
+    digest = data_digest(ohlcv_data) if cache is not None else None
+
+    shm, shape = param_sweep.share_ohlcv(ohlcv_data)
+    try:
+        with Pool(workers, initializer=_init_worker, initargs=(shm.name, shape, cache_args, digest)) as pool:
+            fold_results = pool.map(_run_fold, tasks)
+    finally:
+        shm.close()
+        shm.unlink()
+
+    initial_krw = base_params['initial_krw']
+    portfolio_values, final_value = stitch_equity(fold_results, initial_krw)
+    _, returns = backtest_engine.monthly_returns(portfolio_values, initial_krw)
+    valid_returns = returns.dropna() if returns is not None else pd.Series(dtype=float)
+    summary = {
+        'total_return': final_value / initial_krw - 1,
+        'monthly_avg_return': valid_returns.mean() if not valid_returns.empty else np.nan,
+        'max_drawdown': backtest_engine.max_drawdown(portfolio_values),
+        'trades': sum(result['test_summary']['trades'] for result in fold_results if result['best'] is not None),
+        'final_value': final_value,
+    }
+    return {'folds': fold_results, 'portfolio_values': portfolio_values, 'summary': summary}
+
+
+def fold_table(walk_forward, ohlcv_data, strategy='ma_adx'):
+    index = ohlcv_data.index
+    columns = [key for key in param_sweep.DEFAULT_GRIDS[strategy]]
+    rows = []
+    for result in walk_forward['folds']:
+        (train_start, train_end), (test_start, test_end) = result['train'], result['test']
+        row = {'fold': result['fold'],
+               'train': f"{index[train_start]:%Y-%m-%d}~{index[train_end - 1]:%Y-%m-%d}",
+               'test': f"{index[test_start]:%Y-%m-%d}~{index[test_end - 1]:%Y-%m-%d}"}
+        if result['best'] is not None:
+            row.update({key: result['best'][key] for key in columns})
+            row.update({f"train_{key}": value for key, value in result['train_summary'].items()})
+            row.update({f"test_{key}": value for key, value in result['test_summary'].items()
+                        if key != 'final_value'})
+        rows.append(row)
+    return pd.DataFrame(rows).set_index('fold')
+
+
+def print_fold_table(table):
+    shown = table.copy()
+    for column in shown.columns:
+        if column.endswith(('_return', '_drawdown')):
+            shown[column] = (shown[column] * 100).map(lambda v: f"{v:.2f}%")
+    print(shown.to_string())
+
+
+if __name__ == "__main__":
+    import backtest_bot
+
+    parser = argparse.ArgumentParser(description="MA/ADX · MA/MDI 전략 워크포워드 최적화")
+    parser.add_argument('--strategy', choices=list(param_sweep.STRATEGIES), default='ma_adx')
+    parser.add_argument('--grid', type=str, default=None,
+                        help='JSON 파라미터 범위, 예: \'{"ma_short": [10, 20], "adx_buy_thresh": [20, 25]}\'')
+    parser.add_argument('--train-months', type=int, default=TRAIN_MONTHS, help="학습 창 길이 (개월)")
+    parser.add_argument('--test-months', type=int, default=TEST_MONTHS, help="검증 창 길이 = 이동 간격 (개월)")
+    parser.add_argument('--anchored', action='store_true', help="학습 창 시작을 데이터 처음에 고정 (확장 창)")
+    parser.add_argument('--objective', choices=OBJECTIVES, default='total_return', help="학습 창에서 고르는 기준")
+    parser.add_argument('--workers', type=int, default=None, help="워커 프로세스 수 (기본: CPU 코어 수)")
+    parser.add_argument('--candle-file', default=None, help="캔들 저장소 대신 읽을 컬럼형 캔들 파일 (.upc)")
+    parser.add_argument('--output', type=str, default=None, help="창별 결과 CSV 저장 경로")
+    parser.add_argument('--no-cache', action='store_true', help="지표 디스크 캐시를 쓰지 않기")
+    parser.add_argument('--stop', choices=backtest_engine.GRID_STOP_MODES, default=backtest_bot.STOP_MODE,
+                        help="손절 판정: low(봉 저가, backtest_bot 기본) / close(종가)")
+    args = parser.parse_args()
+
+    grid = {**param_sweep.DEFAULT_GRIDS[args.strategy], **(json.loads(args.grid) if args.grid else {})}
+    base_params = backtest_bot.strategy_params()
+    if args.strategy == 'ma_mdi':
+        base_params = {key: value for key, value in base_params.items() if not key.startswith('adx_')}
+        base_params.update(param_sweep.MA_MDI_PARAMS)
+    ohlcv_data = backtest_bot.load_backtest_data(candle_file=args.candle_file)
+    if ohlcv_data.empty:
+        raise SystemExit("❌ 지정된 기간의 데이터를 가져오지 못했습니다.")
+
+    started = time.perf_counter()
+    walk_forward = run_walk_forward(ohlcv_data, grid, base_params, strategy=args.strategy,
+                                    train_months=args.train_months, test_months=args.test_months,
+                                    anchored=args.anchored, objective=args.objective, workers=args.workers,
+                                    cache=None if args.no_cache else BacktestCache.from_env(), stop_mode=args.stop)
+    table = fold_table(walk_forward, ohlcv_data, args.strategy)
+    print(f"✅ {len(table)}개 창 완료 ({time.perf_counter() - started:.1f}초, 손절 판정: {args.stop})\n")
+    print_fold_table(table)
+
+    summary = walk_forward['summary']
+    print(f"\n📈 표본 외 이어 붙인 성과: 최종 {summary['final_value']:,.0f}원 | "
+          f"총 수익률 {summary['total_return'] * 100:.2f}% | 월평균 {summary['monthly_avg_return'] * 100:.2f}% | "
+          f"최대 낙폭 {summary['max_drawdown'] * 100:.2f}% | 거래 {summary['trades']}회")
+    if args.output:
+        table.to_csv(args.output)
+        print(f"\n💾 결과 저장: {args.output}")